@@ -2,9 +2,66 @@
 
 import requests
 from ..config import API_BASE_URL
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import gzip
+import hashlib
 import json
+import os
+import shutil
+import tempfile
+import time
+
+try:
+    import zstandard
+except ImportError:
+    # Sans zstandard, les fichiers sont compressés en gzip
+    zstandard = None
+
+JOB_FINISHED_STATES = {'done', 'failed', 'cancelled'}
+
+# Envoi par morceaux des gros fichiers (reprenable après une coupure réseau)
+CHUNKED_UPLOAD_THRESHOLD_BYTES = 32 * 1024 * 1024
+UPLOAD_CHUNK_SIZE = 8 * 1024 * 1024
+UPLOAD_PARALLEL_CHUNKS = 4
+UPLOAD_CHUNK_RETRIES = 3
+
+# Compression des fichiers texte avant envoi (décompressés par le serveur à la réception)
+COMPRESSIBLE_EXTENSIONS = ('.csv', '.txt', '.tsv', '.json', '.xml')
+UPLOAD_COMPRESSION_MIN_BYTES = 256 * 1024
+UPLOAD_GZIP_LEVEL = 3       # Niveaux rapides : la compression ne doit pas coûter plus que le transfert économisé
+UPLOAD_ZSTD_LEVEL = 3
+ENCODING_CONTENT_TYPES = {'gzip': 'application/gzip', 'zstd': 'application/zstd'}
+
+_hash_memo = {}         # (chemin, taille, date de modification) -> sha256
+_upload_sessions = {}   # (chemin, taille, date de modification) -> {'session_id', 'upload_path'} de l'envoi en cours, repris au prochain essai
+
+def _file_memo_key(path):
+    stat = os.stat(path)
+    return (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+
+def file_sha256(path, chunk_size=1024 * 1024):
+    """SHA-256 d'un fichier local, mémorisé tant que le fichier n'est pas modifié (un export relancé n'est haché qu'une fois)."""
+    memo_key = _file_memo_key(path)
+    if memo_key not in _hash_memo:
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(chunk_size), b''):
+                digest.update(chunk)
+        _hash_memo[memo_key] = digest.hexdigest()
+    return _hash_memo[memo_key]
+
+def compress_file(path, encoding, target):
+    """Compresse le fichier path dans le fichier binaire ouvert target, sans le charger en mémoire."""
+    with open(path, 'rb') as source:
+        if encoding == 'zstd':
+            zstandard.ZstdCompressor(level=UPLOAD_ZSTD_LEVEL).copy_stream(source, target)
+        else:
+            with gzip.GzipFile(fileobj=target, mode='wb', compresslevel=UPLOAD_GZIP_LEVEL, mtime=0) as compressed:
+                shutil.copyfileobj(source, compressed, 1024 * 1024)
 
 class ApiClient:
+    _server_encodings = None    # Compressions acceptées par le serveur (GET /uploads/capabilities)
+
     def _make_request(self, method, url, **kwargs):
         """
         Méthode centralisée pour effectuer des requêtes et gérer les erreurs réseau.
@@ -79,12 +136,272 @@ class ApiClient:
         return self._make_request('delete', f"{API_BASE_URL}/controls/{control_id}", json={'username': username})    
 
     def execute_control(self, control_id, files_dict, data_dict):
+        """
+        Exécute un contrôle et attend ses résultats. data_dict peut contenir staged_inputs et input_refs
+        (voir reference_known_inputs) : les entrées ainsi désignées ne sont pas jointes dans files_dict.
+        """
         url = f"{API_BASE_URL}/controls/{control_id}/execute"
         return self._make_request('post', url, files=files_dict, data=data_dict)
         
+    def dry_run_control(self, control_id, files_dict, data_dict):
+        """Exécute le contrôle sur un échantillon des fichiers (data_dict : rows, method). Rien n'est enregistré dans l'historique."""
+        return self._make_request('post', f"{API_BASE_URL}/controls/{control_id}/dry-run", files=files_dict, data=data_dict)
+
+    def upload_encoding(self, path):
+        """
+        Compression à utiliser pour envoyer ce fichier ('zstd' ou 'gzip'), ou None s'il est envoyé tel quel :
+        fichier peu compressible ou trop petit, ou serveur qui n'accepte pas de fichiers compressés.
+        """
+        if not path.lower().endswith(COMPRESSIBLE_EXTENSIONS) or os.path.getsize(path) < UPLOAD_COMPRESSION_MIN_BYTES:
+            return None
+        if ApiClient._server_encodings is None:
+            try:
+                ApiClient._server_encodings = self._make_request('get', f"{API_BASE_URL}/uploads/capabilities")['encodings']
+            except Exception:
+                return None     # Serveur d'une version antérieure ou injoignable : envoi sans compression
+        if zstandard is not None and 'zstd' in ApiClient._server_encodings:
+            return 'zstd'
+        return 'gzip' if 'gzip' in ApiClient._server_encodings else None
+
+    def open_upload(self, path):
+        """
+        Fichier à joindre à une requête multipart (files=...) : (nom, fichier ouvert[, type de contenu]).
+        Un fichier compressible est compressé dans un fichier temporaire, supprimé à sa fermeture.
+        """
+        encoding = self.upload_encoding(path)
+        if encoding is None:
+            return (os.path.basename(path), open(path, 'rb'))
+        compressed = tempfile.TemporaryFile()
+        try:
+            compress_file(path, encoding, compressed)
+            compressed.seek(0)
+        except BaseException:
+            compressed.close()
+            raise
+        return (os.path.basename(path), compressed, ENCODING_CONTENT_TYPES[encoding])
+
+    def lookup_inputs(self, hashes, username):
+        """Ensemble des SHA-256 (parmi hashes) dont le serveur a déjà le contenu."""
+        response = self._make_request('post', f"{API_BASE_URL}/uploads/lookup", json={'username': username, 'hashes': list(hashes)})
+        return set(response['known'])
+
+    def reference_known_inputs(self, file_paths, username):
+        """
+        Pour les fichiers locaux ({clé: chemin}) que le serveur a déjà, retourne {clé: {'sha256', 'filename'}}
+        à transmettre dans le champ input_refs au lieu de les envoyer. Retourne {} si le serveur ne peut pas répondre.
+        """
+        if not file_paths:
+            return {}
+        hashes = {key: file_sha256(path) for key, path in file_paths.items()}
+        try:
+            known = self.lookup_inputs(hashes.values(), username)
+        except Exception as e:
+            print(f"Recherche des fichiers déjà présents sur le serveur impossible, ils seront envoyés : {e}")
+            return {}
+        return {key: {'sha256': sha256, 'filename': os.path.basename(file_paths[key])}
+                for key, sha256 in hashes.items() if sha256 in known}
+
+    def upload_file_chunked(self, file_path, username, on_progress=None):
+        """
+        Envoie un gros fichier par morceaux (UPLOAD_PARALLEL_CHUNKS à la fois, chacun réessayé en cas d'erreur)
+        et le fait ranger dans le stockage du serveur. Après un échec, un nouvel appel pour le même fichier reprend
+        la session et n'envoie que les morceaux manquants. Retourne {'sha256', 'size_bytes', 'filename'},
+        à utiliser comme référence (input_refs, envoi anticipé par hash).
+        Un fichier compressible est d'abord compressé dans un fichier temporaire (gardé pour une reprise) :
+        les morceaux sont ceux du fichier compressé, le SHA-256 annoncé celui du fichier d'origine.
+        on_progress(morceaux envoyés, morceaux à envoyer) est appelé après chaque morceau.
+        """
+        memo_key = _file_memo_key(file_path)
+        pending = _upload_sessions.get(memo_key)
+        session = None
+        if pending:
+            try:
+                session = self._make_request('get', f"{API_BASE_URL}/uploads/sessions/{pending['session_id']}?username={username}")
+            except Exception:
+                session = None  # Session expirée ou inconnue : l'envoi recommence
+        if session is None:
+            upload_path, encoding = file_path, self.upload_encoding(file_path)
+            if pending and pending['upload_path'] != file_path and os.path.exists(pending['upload_path']):
+                upload_path, encoding = pending['upload_path'], pending['encoding']
+            elif encoding:
+                fd, upload_path = tempfile.mkstemp(suffix=f".{encoding}")
+                with os.fdopen(fd, 'wb') as compressed:
+                    compress_file(file_path, encoding, compressed)
+            session = self._make_request('post', f"{API_BASE_URL}/uploads/sessions", json={
+                'username': username, 'filename': os.path.basename(file_path), 'size_bytes': os.path.getsize(upload_path),
+                'chunk_size': UPLOAD_CHUNK_SIZE, 'sha256': file_sha256(file_path), 'encoding': encoding,
+            })
+            pending = {'session_id': session['session_id'], 'upload_path': upload_path, 'encoding': encoding}
+            _upload_sessions[memo_key] = pending
+
+        missing = session['missing']
+        with ThreadPoolExecutor(max_workers=UPLOAD_PARALLEL_CHUNKS) as executor:
+            futures = [executor.submit(self._put_chunk, pending['upload_path'], session, index, username) for index in missing]
+            for sent, future in enumerate(as_completed(futures), start=1):
+                future.result()
+                if on_progress:
+                    on_progress(sent, len(missing))
+        stored = self._make_request('post', f"{API_BASE_URL}/uploads/sessions/{session['session_id']}/complete", json={'username': username})
+        _upload_sessions.pop(memo_key, None)
+        if pending['upload_path'] != file_path:
+            os.remove(pending['upload_path'])
+        return stored
+
+    def _put_chunk(self, file_path, session, index, username):
+        with open(file_path, 'rb') as f:
+            f.seek(index * session['chunk_size'])
+            data = f.read(session['chunk_size'])
+        url = f"{API_BASE_URL}/uploads/sessions/{session['session_id']}/chunks/{index}?username={username}"
+        headers = {'X-Chunk-SHA256': hashlib.sha256(data).hexdigest(), 'Content-Type': 'application/octet-stream'}
+        for attempt in range(UPLOAD_CHUNK_RETRIES):
+            try:
+                return self._make_request('put', url, data=data, headers=headers)
+            except Exception:
+                if attempt == UPLOAD_CHUNK_RETRIES - 1:
+                    raise
+                time.sleep(2 ** attempt)
+
+    def upload_large_inputs(self, file_paths, username):
+        """
+        Envoie par morceaux les fichiers ({clé: chemin}) de plus de CHUNKED_UPLOAD_THRESHOLD_BYTES.
+        Retourne {clé: {'sha256', 'filename'}} à transmettre dans input_refs ; les autres restent à joindre à la requête.
+        """
+        input_refs = {}
+        for key, path in file_paths.items():
+            if os.path.getsize(path) >= CHUNKED_UPLOAD_THRESHOLD_BYTES:
+                stored = self.upload_file_chunked(path, username)
+                input_refs[key] = {'sha256': stored['sha256'], 'filename': os.path.basename(path)}
+        return input_refs
+
+    def stage_input(self, control_id, key, file_path, username):
+        """
+        Envoie un fichier d'entrée dès sa sélection : le serveur le vérifie et commence aussitôt à le lire.
+        Si le serveur a déjà ce contenu, seul son hash est transmis (réponse avec reused=True) ;
+        un gros fichier est d'abord envoyé par morceaux (upload_file_chunked).
+        L'upload_id retourné remplace le fichier au lancement de l'analyse (champ staged_inputs).
+        """
+        data = {'control_id': control_id, 'key': key, 'user_data': json.dumps({'username': username})}
+        reference = self.reference_known_inputs({key: file_path}, username).get(key)
+        if not reference:
+            reference = self.upload_large_inputs({key: file_path}, username).get(key)
+        if reference:
+            try:
+                return self._make_request('post', f"{API_BASE_URL}/uploads", data={**data, **reference})
+            except Exception as e:
+                print(f"Référence au fichier déjà présent refusée, envoi complet : {e}")
+        upload = self.open_upload(file_path)
+        try:
+            return self._make_request('post', f"{API_BASE_URL}/uploads", files={'file': upload}, data=data)
+        finally:
+            upload[1].close()
+
+    def submit_analysis_job(self, control_id, files_dict, data_dict):
+        """Soumet une analyse asynchrone. Le serveur répond immédiatement avec l'identifiant du job."""
+        data_with_id = {'control_id': control_id, **data_dict}
+        return self._make_request('post', f"{API_BASE_URL}/jobs", files=files_dict, data=data_with_id)
+
+    def get_job(self, job_id, username):
+        return self._make_request('get', f"{API_BASE_URL}/jobs/{job_id}?username={username}")
+
+    def cancel_job(self, job_id, username):
+        return self._make_request('delete', f"{API_BASE_URL}/jobs/{job_id}", json={'username': username})
+
+    def wait_for_job(self, job_id, username, poll_interval=1.0, on_update=None):
+        """
+        Interroge le serveur jusqu'à la fin du job et retourne ses résultats.
+        on_update(job) est appelé à chaque interrogation. Lève une exception si le job échoue ou est annulé.
+        """
+        while True:
+            job = self.get_job(job_id, username)
+            if on_update:
+                on_update(job)
+            if job['state'] in JOB_FINISHED_STATES:
+                break
+            time.sleep(poll_interval)
+        if job['state'] == 'cancelled':
+            raise Exception("L'analyse a été annulée.")
+        if job['state'] == 'failed':
+            raise Exception(job.get('error') or "L'analyse a échoué.")
+        return job.get('results', [])
+
+    def stream_job_events(self, job_id, username, after_id=0):
+        """
+        Lit le flux Server-Sent Events d'un job et produit des couples (type d'événement, données).
+        Le serveur ferme le flux à intervalles réguliers par un événement 'reconnect' : il est alors
+        rouvert aussitôt après le dernier événement reçu. Le flux se termine après l'événement 'end'.
+        """
+        url = f"{API_BASE_URL}/jobs/{job_id}/events"
+        try:
+            while True:
+                with requests.get(url, params={'username': username, 'after': after_id}, stream=True, timeout=(10, 60)) as response:
+                    if not response.ok:
+                        self._handle_response(response)
+                    event_type, event_id, data_lines = 'message', None, []
+                    reconnect = False
+                    for line in response.iter_lines(decode_unicode=True):
+                        if line is None:
+                            continue
+                        if line == '':
+                            # Ligne vide : fin d'un événement
+                            if event_type == 'reconnect':
+                                reconnect = True
+                                break
+                            if data_lines:
+                                if event_id is not None:
+                                    after_id = event_id
+                                yield event_type, json.loads('\n'.join(data_lines))
+                                if event_type == 'end':
+                                    return
+                            event_type, event_id, data_lines = 'message', None, []
+                        elif line.startswith('event:'):
+                            event_type = line[len('event:'):].strip()
+                        elif line.startswith('id:'):
+                            event_id = int(line[len('id:'):].strip())
+                        elif line.startswith('data:'):
+                            data_lines.append(line[len('data:'):].strip())
+                if not reconnect:
+                    return
+        except requests.exceptions.ConnectionError:
+            raise Exception("Erreur de connexion : Impossible de joindre le serveur. Vérifiez qu'il est bien démarré et accessible.")
+        except requests.exceptions.RequestException as e:
+            raise Exception(f"Une erreur réseau est survenue : {e}")
+
+    def follow_job(self, job_id, username, on_event=None):
+        """
+        Suit un job via son flux d'événements jusqu'à sa fin et retourne ses résultats.
+        on_event(type, données) est appelé pour chaque événement. Si le flux est interrompu ou
+        refusé (serveur saturé), le suivi se poursuit par interrogation périodique.
+        """
+        try:
+            for event_type, data in self.stream_job_events(job_id, username):
+                if on_event:
+                    on_event(event_type, data)
+        except Exception as e:
+            print(f"Flux d'événements interrompu ({e}), passage à l'interrogation périodique.")
+        return self.wait_for_job(job_id, username, on_update=(lambda job: on_event('job', job)) if on_event else None)
+
     def get_result_file_content(self, filename):
         return self._make_request('get', f"{API_BASE_URL}/results/{filename}")
 
+    def get_result_section_page(self, run_uid, section_index, offset=0):
+        return self._make_request('get', f"{API_BASE_URL}/results/{run_uid}/sections/{section_index}?offset={offset}")
+
+    def load_all_section_items(self, section):
+        """
+        Toutes les lignes d'une section de résultats. Les sections volumineuses ne contiennent que
+        leur première page (results_handle) : les pages suivantes sont demandées au serveur.
+        """
+        items = list(section.get('items') or [])
+        handle = section.get('results_handle')
+        if not handle:
+            return items
+        offset = len(items)
+        while offset is not None and offset < section['total_rows']:
+            page = self.get_result_section_page(handle['run_uid'], handle['section'], offset)
+            items.extend(page['items'])
+            offset = page['next_offset']
+        return items
+
     def execute_and_generate_report(self, control_id, files_dict, data_dict):
         url = f"{API_BASE_URL}/reports/execute-and-generate"
         data_with_id = {'control_id': control_id, **data_dict}
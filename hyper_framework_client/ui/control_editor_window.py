@@ -1,6 +1,9 @@
 import customtkinter as ctk
-from tkinter import messagebox
+from tkinter import messagebox, filedialog
+import json
+import os
 import re
+import threading
 from ..api.api_client import api_client
 
 class ControlEditorWindow(ctk.CTkToplevel):
@@ -10,6 +13,8 @@ class ControlEditorWindow(ctk.CTkToplevel):
         self.control_id = control_id
         self.is_edit_mode = control_id is not None
         self.read_only = read_only
+        self.input_definitions = []
+        self.saved_script_code = None
         
         title = "Visualisation" if self.read_only else ("Éditer" if self.is_edit_mode else "Créer")
         self.title(f"{title} du Contrôle")
@@ -37,7 +42,12 @@ class ControlEditorWindow(ctk.CTkToplevel):
         button_container.grid(row=2, column=1, sticky='e', padx=10, pady=(5, 0))
 
         self.save_btn = ctk.CTkButton(button_container, text="Sauvegarder", command=self.save_control)
-        self.save_btn.pack() # On le place simplement dans son conteneur
+        self.save_btn.pack(side='right') # On le place simplement dans son conteneur
+
+        # Exécution à blanc de la version sauvegardée, sur un échantillon des fichiers
+        self.dry_run_btn = ctk.CTkButton(button_container, text="Tester sur un échantillon", fg_color="gray", command=self.dry_run_control)
+        if self.is_edit_mode:
+            self.dry_run_btn.pack(side='right', padx=(0, 10))
 
         # --- MODIFICATION --- Le cadre du script est déplacé à la ligne 3
         script_frame = ctk.CTkFrame(main_frame)
@@ -97,15 +107,22 @@ class ControlEditorWindow(ctk.CTkToplevel):
 # --- DÉFINITION DES ENTRÉES ---
 # Le serveur lit cette variable pour générer les boutons de chargement.
 # La clé "format" est optionnelle mais recommandée pour guider l'utilisateur.
+# La clé "read_options" (optionnelle) donne les options de lecture du fichier : le serveur le lit
+# dès son envoi, et load_table(chemin, mêmes options) reprend alors directement cette lecture.
 __hyper_inputs__ = [
     {"key": "ad_users", "label": "Extraction utilisateurs AD", "format": "csv"},
     {"key": "sap_rh", "label": "Fichier employés SAP", "format": "xlsx"},
     {"key": "notes", "label": "Notes de réunion", "format": "txt"}
 ]
+
+# --- LIMITES D'EXÉCUTION (optionnel) ---
+# Surcharge les limites globales du serveur pour ce contrôle.
+# __hyper_limits__ = {"timeout": 1800, "cpu_seconds": 1200, "max_rss_mb": 4096}
 # -------------------------------------------------------------------
 
 import pandas as pd
 import os
+from hyper_framework_server.sdk.tables import load_table
 
 def run(input_file_paths, output_dir_path):
     \"\"\"
@@ -126,7 +143,7 @@ def run(input_file_paths, output_dir_path):
     # Exemple de lecture du fichier CSV
     # ad_users_path = input_file_paths.get('ad_users')
     # if ad_users_path:
-    #     df_ad = pd.read_csv(ad_users_path)
+    #     df_ad = load_table(ad_users_path)  # Encodage et séparateur détectés
     #     # ... votre code d'analyse sur df_ad ...
     
     # Exemple de structuration d'un résultat (à adapter)
@@ -153,6 +170,7 @@ def run(input_file_paths, output_dir_path):
         self.script_text.configure(state='disabled')
         # --- MODIFICATION --- On utilise pack_forget() au lieu de grid_remove()
         self.save_btn.pack_forget()
+        self.dry_run_btn.pack_forget()
 
     def save_control(self):
         name = self.name_entry.get().strip()
@@ -183,7 +201,74 @@ def run(input_file_paths, output_dir_path):
             self.name_entry.insert(0, data.get('name', ''))
             self.desc_entry.insert(0, data.get('description', ''))
             self.script_text.insert("1.0", data.get('script_code', ''))
+            self.input_definitions = data.get('input_definitions', [])
+            self.saved_script_code = data.get('script_code', '')
             self.highlight_syntax()
         except Exception as e:
             messagebox.showerror("Erreur", f"Impossible de charger le contrôle : {e}", parent=self)
-            self.destroy()
\ No newline at end of file
+            self.destroy()
+
+    def dry_run_control(self):
+        """Lance le contrôle sauvegardé sur les premières lignes (ou un tirage aléatoire) des fichiers choisis."""
+        if self.script_text.get("1.0", "end-1c").strip() != (self.saved_script_code or '').strip():
+            if not messagebox.askyesno("Modifications non sauvegardées",
+                                       "Le test porte sur la version sauvegardée du script. Continuer ?", parent=self):
+                return
+
+        file_paths = {}
+        for input_def in self.input_definitions:
+            label = input_def.get('label', input_def['key'])
+            file_path = filedialog.askopenfilename(title=f"Sélectionnez '{label}'", parent=self)
+            if not file_path: return
+            file_paths[input_def['key']] = file_path
+
+        rows = ctk.CTkInputDialog(text="Nombre de lignes conservées par fichier :", title="Échantillon").get_input()
+        if rows is None: return
+        if not rows.strip().isdigit() or int(rows) < 1:
+            return messagebox.showerror("Erreur", "Le nombre de lignes doit être un entier positif.", parent=self)
+        method = 'sample' if messagebox.askyesno(
+            "Échantillon", "Tirer les lignes au hasard sur tout le fichier ?\n(Non : les premières lignes du fichier)", parent=self
+        ) else 'head'
+
+        self.dry_run_btn.configure(state='disabled', text="Test en cours...")
+
+        def dry_run_thread():
+            files_to_send = {}
+            try:
+                for key, path in file_paths.items():
+                    files_to_send[key] = api_client.open_upload(path)
+                data_payload = {'user_data': json.dumps(self.user_data), 'rows': rows.strip(), 'method': method}
+                outcome = api_client.dry_run_control(self.control_id, files_to_send, data_payload)
+                self.after(0, lambda: self._show_dry_run_outcome(outcome))
+            except Exception as e:
+                error_message = str(e)
+                self.after(0, lambda: messagebox.showerror("Erreur du test", error_message, parent=self))
+            finally:
+                for f in files_to_send.values(): f[1].close()
+                self.after(0, lambda: self.dry_run_btn.configure(state='normal', text="Tester sur un échantillon"))
+
+        threading.Thread(target=dry_run_thread, daemon=True).start()
+
+    def _show_dry_run_outcome(self, outcome):
+        lines = ["Fichiers d'entrée :"]
+        for key, sample in outcome.get('samples', {}).items():
+            if sample['rows_kept'] is None:
+                lines.append(f"  {key} : fichier transmis en entier (format non échantillonnable)")
+            else:
+                approx = "~" if sample['rows_total_estimated'] else ""
+                lines.append(f"  {key} : {sample['rows_kept']} lignes sur {approx}{sample['rows_total']}")
+
+        lines.append("\nRésultats :")
+        for section in outcome.get('results', []):
+            lines.append(f"  {section.get('title', 'Sans titre')} : {len(section.get('items') or [])} lignes")
+
+        extrapolation = outcome.get('extrapolation')
+        if extrapolation:
+            approx = " (volume estimé)" if extrapolation['estimated'] else ""
+            lines.append(f"\nDurée sur l'échantillon : {extrapolation['sample_seconds']:.2f} s")
+            lines.append(f"Durée estimée sur les fichiers complets{approx} : {extrapolation['full_seconds']:.1f} s "
+                         f"(x{extrapolation['scale_factor']})")
+            for stage in extrapolation['stages']:
+                if stage['full_seconds'] is not None:
+                    lines.append(f"  {stage['stage']} : {stage['sample_seconds']:.2f} s -> ~{stage['full_seconds']:.1f} s")
+        messagebox.showinfo("Test sur échantillon", "\n".join(lines), parent=self)
@@ -6,7 +6,7 @@ import datetime
 import json
 import threading
 from ..api.api_client import api_client
-from .themed_treeview import style_treeview
+from .themed_treeview import style_treeview, add_remaining_rows_loader
 
 class GenericAnalysisFrame(ctk.CTkFrame):
     def __init__(self, master, app_parent, control_id, week_label):
@@ -16,8 +16,11 @@ class GenericAnalysisFrame(ctk.CTkFrame):
         self.week_label = week_label
         
         self.file_paths = {}
+        self.staged_uploads = {}    # clé -> (chemin, upload_id) des fichiers déjà envoyés au serveur
+        self.staging_threads = {}   # clé -> thread d'envoi anticipé en cours
         self.input_widgets = {}
         self.analysis_results_data = None 
+        self.current_job_id = None
 
         try:
             # L'utilisateur courant est nécessaire pour la journalisation
@@ -43,7 +46,63 @@ class GenericAnalysisFrame(ctk.CTkFrame):
             return
         self.file_paths[file_key] = file_path
         filename = os.path.basename(file_path)
-        self.input_widgets[file_key]['label'].configure(text=filename, text_color=("black", "white"))
+        self.input_widgets[file_key]['label'].configure(text=f"{filename} (envoi...)", text_color=("black", "white"))
+        self.start_staging(file_key, file_path)
+
+    def start_staging(self, file_key, file_path):
+        """Envoie le fichier en arrière-plan dès sa sélection : le serveur commence à le lire avant le lancement."""
+        self.staged_uploads.pop(file_key, None)
+        filename = os.path.basename(file_path)
+
+        def stage_thread():
+            try:
+                staged = api_client.stage_input(self.control_id, file_key, file_path, self.user_data['username'])
+                status_text = f"{filename} (déjà sur le serveur)" if staged.get('reused') else f"{filename} (envoyé)"
+            except Exception as e:
+                staged = None
+                print(f"Envoi anticipé de '{filename}' impossible, il sera envoyé au lancement : {e}")
+                status_text = filename
+            # Le fichier a pu être remplacé par une autre sélection pendant l'envoi
+            if self.file_paths.get(file_key) != file_path:
+                return
+            if staged:
+                self.staged_uploads[file_key] = (file_path, staged['upload_id'])
+            self.after(0, lambda: self._set_input_status(file_key, status_text))
+
+        thread = threading.Thread(target=stage_thread, daemon=True)
+        self.staging_threads[file_key] = thread
+        thread.start()
+
+    def _set_input_status(self, file_key, text):
+        label = self.input_widgets[file_key]['label']
+        if label.winfo_exists():
+            label.configure(text=text)
+
+    def wait_for_staged_uploads(self):
+        """Attend la fin des envois anticipés et retourne {clé: upload_id} des fichiers sélectionnés déjà envoyés."""
+        for thread in list(self.staging_threads.values()):
+            thread.join()
+        return {key: upload_id for key, (path, upload_id) in list(self.staged_uploads.items())
+                if self.file_paths.get(key) == path}
+
+    def prepare_inputs(self, files_to_send, data_payload):
+        """
+        Référence les fichiers déjà envoyés (staged_inputs) ou dont le serveur a déjà le contenu (input_refs),
+        envoie les gros fichiers restants par morceaux, et ouvre les autres pour les joindre à la requête
+        (compressés s'ils s'y prêtent, voir ApiClient.open_upload).
+        """
+        staged = self.wait_for_staged_uploads()
+        remaining = {key: path for key, path in self.file_paths.items() if key not in staged}
+        input_refs = api_client.reference_known_inputs(remaining, self.user_data['username'])
+        input_refs.update(api_client.upload_large_inputs(
+            {key: path for key, path in remaining.items() if key not in input_refs}, self.user_data['username']))
+        for key, path in remaining.items():
+            if key not in input_refs:
+                files_to_send[key] = api_client.open_upload(path)
+        if staged:
+            data_payload['staged_inputs'] = json.dumps(staged)
+        if input_refs:
+            data_payload['input_refs'] = json.dumps(input_refs)
 
     def run_analysis(self):
         if len(self.file_paths) != len(self.control_data['input_definitions']):
@@ -63,45 +122,124 @@ class GenericAnalysisFrame(ctk.CTkFrame):
                                    font=ctk.CTkFont(size=14))
         info_label.pack(pady=10)
 
+        # Durées par étape, alimentées par les événements d'avancement du script
+        stages_label = ctk.CTkLabel(self.results_frame, text="", justify="left", font=ctk.CTkFont(size=12))
+        stages_label.pack(pady=5)
+        stage_timings = {}  # étape -> [secondes au premier événement, secondes au dernier]
+
         self.update_idletasks()
 
         # Désactiver les boutons pendant l'exécution
         self.export_btn.configure(state='disabled')
         self.generate_report_btn.configure(state='disabled')
 
-        # Préparer les fichiers à envoyer
+        # Fichiers à envoyer : remplis dans le thread, une fois les envois anticipés terminés
         files_to_send = {}
-        for key, path in self.file_paths.items():
-            files_to_send[key] = (os.path.basename(path), open(path, 'rb'))
 
         data_payload = {
             'user_data': json.dumps(self.user_data),
             'week_label': self.week_label
         }
 
+        # Bouton d'annulation du job en cours
+        cancel_btn = ctk.CTkButton(self.results_frame, text="Annuler l'analyse", command=self.cancel_analysis, fg_color="gray")
+        cancel_btn.pack(pady=5)
+
         # Fonction qui sera exécutée dans le thread
         def execute_analysis_thread():
             try:
-                # Appel API qui peut prendre du temps
-                final_results_data = api_client.execute_control(self.control_id, files_to_send, data_payload)
+                self.prepare_inputs(files_to_send, data_payload)
+                # Soumission du job : le serveur rend la main immédiatement
+                job = api_client.submit_analysis_job(self.control_id, files_to_send, data_payload)
+                self.current_job_id = job['job_id']
+
+                # Suivi du job via son flux d'événements (état, avancement) jusqu'à sa fin
+                final_results_data = api_client.follow_job(
+                    self.current_job_id, self.user_data['username'],
+                    on_event=lambda t, d: self.after(0, lambda: self._on_job_event(t, d, progress_bar, info_label, stages_label, stage_timings))
+                )
 
                 # Mettre à jour l'interface dans le thread principal
-                self.after(0, lambda: self._on_analysis_complete(final_results_data, progress_bar, info_label, files_to_send))
+                self.after(0, lambda: self._on_analysis_complete(final_results_data, progress_bar, info_label, files_to_send, cancel_btn, stages_label))
 
             except Exception as e:
+                # Les fichiers seront renvoyés en entier au prochain lancement (envoi anticipé expiré...)
+                self.staged_uploads.clear()
                 # Gérer les erreurs dans le thread principal
-                self.after(0, lambda: self._on_analysis_error(str(e), progress_bar, info_label, files_to_send))
+                error_message = str(e)
+                self.after(0, lambda: self._on_analysis_error(error_message, progress_bar, info_label, files_to_send, cancel_btn, stages_label))
+            finally:
+                self.current_job_id = None
 
         # Lancer l'analyse dans un thread séparé
         analysis_thread = threading.Thread(target=execute_analysis_thread, daemon=True)
         analysis_thread.start()
 
-    def _on_analysis_complete(self, final_results_data, progress_bar, info_label, files_to_send):
+    def _on_job_event(self, event_type, data, progress_bar, info_label, stages_label, stage_timings):
+        """Met à jour la barre de progression et les durées par étape à partir d'un événement du job"""
+        if not info_label.winfo_exists():
+            return
+        if event_type in ('job', 'end'):
+            # État complet du job (interrogation périodique ou fin du flux)
+            self._on_job_update(data, info_label)
+            for stage in data.get('stages') or []:
+                stage_timings[stage['stage']] = [stage['started_seconds'], stage['started_seconds'] + stage['duration_seconds']]
+            if data.get('progress'):
+                self._show_progress(data['progress'], progress_bar, info_label)
+        elif event_type == 'state':
+            self._on_job_update({'state': data['message']}, info_label)
+        elif event_type == 'progress':
+            if data.get('stage'):
+                timing = stage_timings.setdefault(data['stage'], [data['elapsed_seconds'], data['elapsed_seconds']])
+                timing[1] = data['elapsed_seconds']
+            self._show_progress(data, progress_bar, info_label)
+        if stage_timings:
+            stages_label.configure(text="\n".join(f"{stage} : {last - first:.1f} s" for stage, (first, last) in stage_timings.items()))
+
+    def _show_progress(self, event, progress_bar, info_label):
+        if event.get('fraction') is not None:
+            # Premier avancement chiffré : la barre devient déterminée
+            if progress_bar.cget('mode') != 'determinate':
+                progress_bar.stop()
+                progress_bar.configure(mode='determinate')
+            progress_bar.set(event['fraction'])
+        text = event.get('stage') or ''
+        if event.get('message'):
+            text = f"{text} - {event['message']}" if text else event['message']
+        if text:
+            percent = f" ({int(event['fraction'] * 100)} %)" if event.get('fraction') is not None else ""
+            info_label.configure(text=f"{text}{percent}")
+
+    def _on_job_update(self, job, info_label):
+        """Affiche l'état courant du job (en file d'attente, en cours...)"""
+        if not info_label.winfo_exists():
+            return
+        if job['state'] == 'queued':
+            position = job.get('queue_position')
+            position_text = f" (position {position})" if position else ""
+            reason = (job.get('admission') or {}).get('waiting_reason')
+            reason_text = f"\n{reason}" if reason else ""
+            info_label.configure(text=f"Analyse en file d'attente{position_text}...{reason_text}")
+        elif job['state'] == 'running' and not job.get('progress'):
+            elapsed = int(job.get('running_seconds') or 0)
+            info_label.configure(text=f"Analyse en cours, veuillez patienter... ({elapsed} s)")
+
+    def cancel_analysis(self):
+        if not self.current_job_id:
+            return
+        try:
+            api_client.cancel_job(self.current_job_id, self.user_data['username'])
+        except Exception as e:
+            messagebox.showerror("Erreur", f"Impossible d'annuler l'analyse : {e}", parent=self)
+
+    def _on_analysis_complete(self, final_results_data, progress_bar, info_label, files_to_send, cancel_btn, stages_label):
         """Appelée quand l'analyse est terminée avec succès"""
         try:
             progress_bar.stop()
             progress_bar.destroy()
             info_label.destroy()
+            cancel_btn.destroy()
+            stages_label.destroy()
 
             self.analysis_results_data = final_results_data
             self.export_btn.configure(state='normal')
@@ -117,12 +255,14 @@ class GenericAnalysisFrame(ctk.CTkFrame):
                 if file_tuple[1] and not file_tuple[1].closed:
                     file_tuple[1].close()
 
-    def _on_analysis_error(self, error_message, progress_bar, info_label, files_to_send):
+    def _on_analysis_error(self, error_message, progress_bar, info_label, files_to_send, cancel_btn, stages_label):
         """Appelée quand l'analyse échoue"""
         try:
             progress_bar.stop()
             progress_bar.destroy()
             info_label.destroy()
+            cancel_btn.destroy()
+            stages_label.destroy()
             messagebox.showerror("Erreur d'analyse", error_message, parent=self)
         finally:
             # Fermer les fichiers
@@ -227,6 +367,8 @@ class GenericAnalysisFrame(ctk.CTkFrame):
             ysb = ctk.CTkScrollbar(tree_frame, command=tree.yview); ysb.grid(row=0, column=1, sticky='ns')
             xsb = ctk.CTkScrollbar(tree_frame, command=tree.xview, orientation="horizontal"); xsb.grid(row=1, column=0, sticky='ew')
             tree.configure(yscrollcommand=ysb.set, xscrollcommand=xsb.set)
+            if data.get('results_handle') and len(items) < data.get('total_rows', 0):
+                add_remaining_rows_loader(frame, tree, data, column_keys)
         else:
             ctk.CTkLabel(frame, text="Aucun élément à afficher.", font=ctk.CTkFont(slant='italic')).pack(padx=10, pady=10)
 
@@ -238,12 +380,11 @@ class GenericAnalysisFrame(ctk.CTkFrame):
         files_to_send = {}
         generated_filename = None
         try:
-            for key, path in self.file_paths.items():
-                files_to_send[key] = (os.path.basename(path), open(path, 'rb'))
             data_payload = {
                 'user_data': json.dumps(self.user_data),
                 'week_label': self.week_label
             }
+            self.prepare_inputs(files_to_send, data_payload)
             response = api_client.execute_and_generate_report(self.control_id, files_to_send, data_payload)
             generated_filename = response.get('report_filename')
             if not generated_filename:
@@ -292,7 +433,7 @@ class GenericAnalysisFrame(ctk.CTkFrame):
                     column_keys = [col['key'] for col in display_columns]
                     column_labels = {col['key']: col['label'] for col in display_columns}
 
-                    df = pd.DataFrame(items)[column_keys].rename(columns=column_labels)
+                    df = pd.DataFrame(api_client.load_all_section_items(section))[column_keys].rename(columns=column_labels)
                     df.to_excel(writer, sheet_name=title, index=False)
             messagebox.showinfo("Succès", f"Fichier Excel exporté:\n{file_path}", parent=self)
         except Exception as e: messagebox.showerror("Erreur d'exportation", f"Une erreur est survenue :\n{e}", parent=self)
\ No newline at end of file
@@ -46,4 +46,42 @@ def style_treeview(widget_instance):
     # if current_theme == "Dark":
     #     widget_instance.tag_configure('evenrow', background="#343638")
     # else:
-    #     widget_instance.tag_configure('evenrow', background="#e0e0e0")
\ No newline at end of file
+    #     widget_instance.tag_configure('evenrow', background="#e0e0e0")
+
+def add_remaining_rows_loader(frame, tree, section, column_keys):
+    """
+    Section de résultats paginée (results_handle) : seule la première page est dans le tableau.
+    Ajoute sous le tableau le nombre de lignes affichées et un bouton qui charge les suivantes.
+    """
+    import threading
+    from tkinter import messagebox
+    from ..api.api_client import api_client
+
+    info_label = ctk.CTkLabel(frame, text=f"{len(section['items'])} premières lignes affichées sur {section['total_rows']}.",
+                              font=ctk.CTkFont(slant='italic'))
+    info_label.pack(anchor='w', padx=10)
+
+    def load_remaining_rows():
+        load_btn.configure(state='disabled', text="Chargement...")
+
+        def fetch_thread():
+            try:
+                items = api_client.load_all_section_items(section)
+            except Exception as e:
+                error_message = str(e)
+                frame.after(0, lambda: messagebox.showerror("Erreur", f"Chargement impossible : {error_message}", parent=frame))
+                frame.after(0, lambda: load_btn.configure(state='normal', text="Afficher toutes les lignes"))
+                return
+
+            def show_rows():
+                for item in items[len(section['items']):]:
+                    tree.insert('', 'end', values=[item.get(key, '') for key in column_keys])
+                section['items'] = items    # L'export n'aura plus rien à demander au serveur
+                info_label.configure(text=f"{len(items)} lignes affichées.")
+                load_btn.destroy()
+            frame.after(0, show_rows)
+
+        threading.Thread(target=fetch_thread, daemon=True).start()
+
+    load_btn = ctk.CTkButton(frame, text="Afficher toutes les lignes", command=load_remaining_rows)
+    load_btn.pack(anchor='w', padx=10, pady=(0, 10))
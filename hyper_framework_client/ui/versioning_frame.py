@@ -1,7 +1,7 @@
 import customtkinter as ctk
 from tkinter import ttk, messagebox, filedialog
 from ..api.api_client import api_client
-from .themed_treeview import style_treeview
+from .themed_treeview import style_treeview, add_remaining_rows_loader
 import datetime
 import re
 
@@ -338,6 +338,8 @@ class VersioningFrame(ctk.CTkFrame):
             xsb = ctk.CTkScrollbar(tree_frame, command=tree.xview, orientation="horizontal")
             xsb.grid(row=1, column=0, sticky='ew')
             tree.configure(yscrollcommand=ysb.set, xscrollcommand=xsb.set)
+            if data.get('results_handle') and len(items) < data.get('total_rows', 0):
+                add_remaining_rows_loader(frame, tree, data, column_keys)
         else:
             ctk.CTkLabel(
                 frame, 
@@ -388,7 +390,7 @@ class VersioningFrame(ctk.CTkFrame):
                     column_keys = [col['key'] for col in display_columns]
                     column_labels = {col['key']: col['label'] for col in display_columns}
 
-                    df = pd.DataFrame(items)[column_keys].rename(columns=column_labels)
+                    df = pd.DataFrame(api_client.load_all_section_items(section))[column_keys].rename(columns=column_labels)
                     df.to_excel(writer, sheet_name=title, index=False)
             
             messagebox.showinfo("Succès", f"Fichier Excel exporté:\n{file_path}", parent=self)
@@ -0,0 +1,73 @@
+#---> NOUVEAU FICHIER : hyper_framework_server/api/admin_routes.py
+
+from flask import Blueprint, request, jsonify, current_app
+from ..auth.roles import Role, Permission, ROLE_PERMISSIONS
+from ..database.database import get_db
+from ..services.logging_service import logging_service
+from ..services.input_store import input_store
+from ..services.result_cache import result_cache
+from ..services.run_outputs import run_outputs
+from .analysis_routes import permission_required
+
+bp = Blueprint('admin', __name__, url_prefix='/api/admin')
+
+def _has_permission(username, permission):
+    user = get_db().execute("SELECT role FROM users WHERE username = ?", (username,)).fetchone()
+    return bool(user) and permission in ROLE_PERMISSIONS.get(Role(user['role']), set())
+
+@bp.route('/result-cache', methods=['GET'])
+def get_result_cache():
+    """Contenu et taille du cache des résultats d'analyse."""
+    username = request.args.get('username', 'unknown')
+    if not _has_permission(username, Permission.MANAGE_CONTROLS):
+        return jsonify({'error': 'Permission refusée.'}), 403
+    stats = result_cache.stats()
+    logging_service.log_action(username, 'VIEW_RESULT_CACHE', 'SUCCESS', {'entries': stats['entries_count']})
+    return jsonify(stats)
+
+@bp.route('/result-cache', methods=['DELETE'])
+@permission_required(Permission.MANAGE_CONTROLS)
+def purge_result_cache():
+    """Vide le cache des résultats, entièrement ou pour un seul contrôle ('control_id')."""
+    data = request.get_json()
+    username = data.get('username', 'unknown')
+    control_id = data.get('control_id')
+    deleted = result_cache.purge(control_id)
+    logging_service.log_action(username, 'PURGE_RESULT_CACHE', 'SUCCESS', {'control_id': control_id, 'deleted': deleted})
+    return jsonify({'deleted': deleted})
+
+@bp.route('/input-store', methods=['GET'])
+def get_input_store():
+    """Occupation du stockage des fichiers d'entrée (contenus, références, anciens fichiers)."""
+    username = request.args.get('username', 'unknown')
+    if not _has_permission(username, Permission.MANAGE_CONTROLS):
+        return jsonify({'error': 'Permission refusée.'}), 403
+    return jsonify(input_store.stats(get_db(), current_app.config['INPUTS_DIR']))
+
+@bp.route('/input-store/gc', methods=['POST'])
+@permission_required(Permission.MANAGE_CONTROLS)
+def collect_input_store():
+    """Lance immédiatement la collecte des fichiers d'entrée qui ne sont plus référencés."""
+    data = request.get_json()
+    username = data.get('username', 'unknown')
+    outcome = input_store.collect_garbage(get_db(), current_app.config['INPUTS_DIR'])
+    logging_service.log_action(username, 'INPUT_STORE_GC', 'SUCCESS', outcome)
+    return jsonify(outcome)
+
+@bp.route('/run-outputs', methods=['GET'])
+def get_run_outputs():
+    """Occupation des dossiers d'exécution (fichiers produits et résultats volumineux)."""
+    username = request.args.get('username', 'unknown')
+    if not _has_permission(username, Permission.MANAGE_CONTROLS):
+        return jsonify({'error': 'Permission refusée.'}), 403
+    return jsonify(run_outputs.stats(get_db(), current_app.config['OUTPUTS_DIR']))
+
+@bp.route('/run-outputs/gc', methods=['POST'])
+@permission_required(Permission.MANAGE_CONTROLS)
+def collect_run_outputs():
+    """Lance immédiatement la collecte des dossiers d'exécution expirés."""
+    data = request.get_json()
+    username = data.get('username', 'unknown')
+    outcome = run_outputs.collect_garbage(get_db(), current_app.config['OUTPUTS_DIR'])
+    logging_service.log_action(username, 'RUN_OUTPUTS_GC', 'SUCCESS', outcome)
+    return jsonify(outcome)
@@ -8,13 +8,24 @@ import json
 import os
 import re
 import ast
+import tempfile
 from functools import wraps
 from datetime import datetime
 from ..database.database import get_db
-from ..services.script_execution_engine import execute_script_from_file
+from ..services.analysis_service import save_uploaded_inputs, read_uploaded_inputs, input_hashes_from, run_control_analysis, run_dry_analysis, get_run_directory, RunProfile, save_run_profile
+from ..services.input_sampling import SAMPLE_METHODS, SAMPLE_HEAD
+from ..services.result_store import get_spill_directory, read_section_page, section_exists
+from ..services.run_stats import get_control_run_stats
+from ..services.campaign_service import campaign_manager, Backfill
+from .job_routes import _is_owner_or_admin
+from ..services.worker_pool import worker_pool
 from ..auth.roles import Role, Permission, ROLE_PERMISSIONS
 from ..services.logging_service import logging_service
 from ..services.security_service import analyze_code_security
+from .. import config
+from ..services.exceptions import MissingInputError, InvalidInputError, ScriptLimitExceeded, MemoryBudgetExceeded
+from ..services.input_staging import input_staging
+from ..services.run_scheduler import RunTicket, PRIORITY_INTERACTIVE
 
 bp = Blueprint('analysis', __name__, url_prefix='/api')
 
@@ -88,63 +99,97 @@ def execute_control(control_id):
     
     try:
         script_path = os.path.join(current_app.config['SCRIPTS_DIR'], control['script_filename'])
-        run_timestamp = datetime.now().strftime('%Y%m%d-%H%M%S')
-        inputs_dir = current_app.config['INPUTS_DIR']
-        outputs_dir = current_app.config['OUTPUTS_DIR']
-        input_file_paths = {}
         input_definitions = json.loads(control['input_definitions'])
-        
-        # Collecter les informations sur les fichiers chargés
-        files_info = []
-        
-        for input_def in input_definitions:
-            key = input_def['key']
-            if key not in request.files: return jsonify({'error': f"Fichier manquant: {key}"}), 400
-            file = request.files[key]
-            safe_filename = secure_filename(file.filename)
-            unique_filename = f"{run_timestamp}_{key}_{safe_filename}"
-            saved_path = os.path.join(inputs_dir, unique_filename)
-            file.save(saved_path)
-            input_file_paths[key] = saved_path
-            
-            # Enregistrer les infos du fichier
-            files_info.append({
-                'key': key,
-                'original_name': file.filename,
-                'saved_name': unique_filename
-            })
-            
-        results_with_dfs = execute_script_from_file(script_path, input_file_paths, outputs_dir)
-        
-        serialized_results = []
-        for result in results_with_dfs:
-            if 'dataframe' in result and isinstance(result['dataframe'], pd.DataFrame):
-                result['items'] = result['dataframe'].to_dict('records')
-                del result['dataframe']
-            serialized_results.append(result)
-
-        # Sauvegarder l'historique de l'analyse dans la base de données
-        try:
-            db.execute(
-                """INSERT INTO analysis_runs 
-                   (control_id, control_name, week_label, username, results_json, files_info) 
-                   VALUES (?, ?, ?, ?, ?, ?)""",
-                (control_id, control_name, week_label, username, 
-                 json.dumps(serialized_results), json.dumps(files_info))
-            )
-            db.commit()
-        except Exception as e:
-            print(f"Erreur lors de la sauvegarde de l'historique: {e}")
-            # On continue même si la sauvegarde échoue
+        profile = RunProfile()
+        with profile.measure('upload_save'):
+            staged_inputs = input_staging.resolve(json.loads(request.form.get('staged_inputs', '{}')), control_id, username, current_app.config['INPUTS_DIR'])
+            input_file_paths, files_info = save_uploaded_inputs(request.files, input_definitions, current_app.config['INPUTS_DIR'], staged_inputs,
+                                                                json.loads(request.form.get('input_refs', '{}')))
 
-        logging_service.log_action(username, 'ANALYSIS_EXECUTE', 'SUCCESS', {'control_id': control_id, 'control_name': control_name, 'week_label': week_label})
+        serialized_results, run_info = run_control_analysis(
+            control_id, control_name, script_path, input_file_paths, files_info,
+            username, week_label, current_app.config['OUTPUTS_DIR'],
+            ticket=RunTicket(username, control_id, PRIORITY_INTERACTIVE), profile=profile,
+            input_hashes=input_hashes_from(files_info)
+        )
+
+        with profile.measure('logging'):
+            logging_service.log_action(username, 'ANALYSIS_EXECUTE', 'SUCCESS', {'control_id': control_id, 'control_name': control_name, 'week_label': week_label, 'cache_hit': run_info['cache_hit']})
+        save_run_profile(run_info['run_id'], profile)
         return jsonify(serialized_results)
+
+    except (MissingInputError, InvalidInputError) as e:
+        return jsonify({'error': str(e)}), 400
+
+    except ScriptLimitExceeded as e:
+        logging_service.log_action(username, 'ANALYSIS_EXECUTE', 'FAILURE', {'control_id': control_id, 'control_name': control_name, 'error': str(e), **e.to_log_details()})
+        return jsonify({'error': str(e), 'limit': e.limit}), 500
+
+    except MemoryBudgetExceeded as e:
+        logging_service.log_action(username, 'ANALYSIS_EXECUTE', 'FAILURE', {'control_id': control_id, 'control_name': control_name, 'error': str(e), **e.to_log_details()})
+        return jsonify({'error': str(e), 'limit': 'memory_budget_mb'}), 503
         
     except Exception as e:
         import traceback; traceback.print_exc()
         logging_service.log_action(username, 'ANALYSIS_EXECUTE', 'FAILURE', {'control_id': control_id, 'control_name': control_name, 'error': str(e)})
         return jsonify({'error': f"Erreur serveur: {e}"}), 500
 
+@bp.route('/controls/<int:control_id>/dry-run', methods=['POST'])
+def dry_run_control(control_id):
+    """
+    Exécution à blanc : le contrôle tourne sur un échantillon de chaque fichier envoyé.
+    Formulaire : comme /execute, plus rows (enregistrements conservés par fichier), method ('head' : les
+    premiers, 'sample' : tirage aléatoire sur tout le fichier) et header_rows (lignes d'en-tête recopiées).
+    Rien n'est enregistré dans l'historique ; la réponse contient les résultats et une estimation
+    de la durée sur les fichiers complets.
+    """
+    user_data = json.loads(request.form.get('user_data', '{}'))
+    username = user_data.get('username', 'unknown')
+    method = request.form.get('method', SAMPLE_HEAD)
+    try:
+        rows = int(request.form.get('rows', config.DRY_RUN_DEFAULT_ROWS))
+        header_rows = int(request.form.get('header_rows', 1))
+    except ValueError:
+        return jsonify({'error': 'rows et header_rows doivent être des entiers.'}), 400
+    if method not in SAMPLE_METHODS:
+        return jsonify({'error': f"Méthode d'échantillonnage inconnue : {method}"}), 400
+    if not 1 <= rows <= config.DRY_RUN_MAX_ROWS or header_rows < 0:
+        return jsonify({'error': f"rows doit être compris entre 1 et {config.DRY_RUN_MAX_ROWS}."}), 400
+
+    db = get_db()
+    control = db.execute("SELECT name, script_filename, input_definitions FROM controls WHERE id = ?", (control_id,)).fetchone()
+    if not control:
+        return jsonify({'error': 'Contrôle non trouvé.'}), 404
+
+    log_details = {'control_id': control_id, 'control_name': control['name'], 'rows': rows, 'method': method}
+    try:
+        script_path = os.path.join(current_app.config['SCRIPTS_DIR'], control['script_filename'])
+        # Les fichiers complets ne sont pas archivés : l'échantillon est lu directement dans les fichiers reçus
+        with tempfile.TemporaryDirectory(prefix='hyper_dry_run_upload_') as upload_dir:
+            input_files = read_uploaded_inputs(request.files, json.loads(control['input_definitions']), upload_dir)
+            outcome = run_dry_analysis(
+                control_id, script_path, input_files, current_app.config['OUTPUTS_DIR'],
+                RunTicket(username, control_id, PRIORITY_INTERACTIVE), rows, method, header_rows
+            )
+        logging_service.log_action(username, 'ANALYSIS_DRY_RUN', 'SUCCESS', log_details)
+        return jsonify(outcome)
+
+    except (MissingInputError, InvalidInputError) as e:
+        return jsonify({'error': str(e)}), 400
+
+    except ScriptLimitExceeded as e:
+        logging_service.log_action(username, 'ANALYSIS_DRY_RUN', 'FAILURE', {**log_details, 'error': str(e), **e.to_log_details()})
+        return jsonify({'error': str(e), 'limit': e.limit}), 500
+
+    except MemoryBudgetExceeded as e:
+        logging_service.log_action(username, 'ANALYSIS_DRY_RUN', 'FAILURE', {**log_details, 'error': str(e), **e.to_log_details()})
+        return jsonify({'error': str(e), 'limit': 'memory_budget_mb'}), 503
+
+    except Exception as e:
+        import traceback; traceback.print_exc()
+        logging_service.log_action(username, 'ANALYSIS_DRY_RUN', 'FAILURE', {**log_details, 'error': str(e)})
+        return jsonify({'error': f"Erreur serveur: {e}"}), 500
+
 @bp.route('/results/<filename>', methods=['GET'])
 def get_result_file(filename):
     try:
@@ -152,6 +197,37 @@ def get_result_file(filename):
     except FileNotFoundError:
         return jsonify({'error': 'Fichier de résultat non trouvé.'}), 404
 
+@bp.route('/results/<run_uid>/sections/<int:section_index>', methods=['GET'])
+def get_result_section_page(run_uid, section_index):
+    """
+    Une page d'une section de résultats volumineuse (voir results_handle dans les résultats).
+    Paramètres : offset (première ligne, défaut 0) et limit (défaut et maximum : RESULT_PAGE_SIZE).
+    """
+    offset = request.args.get('offset', 0, type=int)
+    limit = min(request.args.get('limit', config.RESULT_PAGE_SIZE, type=int), config.RESULT_PAGE_SIZE)
+    if offset < 0 or limit < 1:
+        return jsonify({'error': 'offset et limit invalides.'}), 400
+    spill_dir = get_spill_directory(current_app.config['OUTPUTS_DIR'], secure_filename(run_uid))
+    if not section_exists(spill_dir, section_index):
+        return jsonify({'error': 'Section de résultats non trouvée.'}), 404
+    items, total_rows = read_section_page(spill_dir, section_index, offset, limit)
+    next_offset = offset + len(items)
+    return jsonify({
+        'items': items,
+        'offset': offset,
+        'total_rows': total_rows,
+        'next_offset': next_offset if next_offset < total_rows else None,
+    })
+
+@bp.route('/results/<run_uid>/<path:filename>', methods=['GET'])
+def get_run_result_file(run_uid, filename):
+    """Sert un fichier produit par une exécution donnée (dossier outputs/runs/<run_uid>)."""
+    run_dir = get_run_directory(current_app.config['OUTPUTS_DIR'], secure_filename(run_uid))
+    try:
+        return send_from_directory(run_dir, filename, as_attachment=False)
+    except FileNotFoundError:
+        return jsonify({'error': 'Fichier de résultat non trouvé.'}), 404
+
 @bp.route('/controls', methods=['GET'])
 def get_all_controls():
     username = request.args.get('username', 'unknown')
@@ -255,6 +331,8 @@ def update_control(control_id):
         script_path = os.path.join(current_app.config['SCRIPTS_DIR'], control_row['script_filename'])
         with open(script_path, 'w', encoding='utf-8') as f: f.write(script_code)
         db.commit()
+        # Les workers ne doivent plus garder l'ancienne version compilée du script
+        worker_pool.invalidate_script(script_path)
         
         logging_service.log_action(username, 'CONTROL_UPDATE', 'SUCCESS', {'control_id': control_id, 'new_name': data['name']})
         return jsonify({"message": "Contrôle mis à jour."})
@@ -276,6 +354,7 @@ def delete_control(control_id):
         if control_row:
             script_path = os.path.join(current_app.config['SCRIPTS_DIR'], control_row['script_filename'])
             if os.path.exists(script_path): os.remove(script_path)
+            worker_pool.invalidate_script(script_path)
         db.commit()
         logging_service.log_action(username, 'CONTROL_DELETE', 'SUCCESS', {'control_id': control_id, 'control_name': control_name})
         return '', 204
@@ -325,9 +404,130 @@ def get_analysis_run_details(run_id):
         run_data['results_json'] = json.loads(run_data['results_json'])
         if run_data['files_info']:
             run_data['files_info'] = json.loads(run_data['files_info'])
+        run_data['artifacts_json'] = json.loads(run_data['artifacts_json']) if run_data.get('artifacts_json') else []
+        run_data['profile_json'] = json.loads(run_data['profile_json']) if run_data.get('profile_json') else None
         
         logging_service.log_action(username, 'VIEW_ANALYSIS_RUN_DETAILS', 'SUCCESS', {'run_id': run_id})
         return jsonify(run_data)
     except Exception as e:
         logging_service.log_action(username, 'VIEW_ANALYSIS_RUN_DETAILS', 'FAILURE', {'run_id': run_id, 'error': str(e)})
-        return jsonify({'error': f"Erreur lors de la récupération des détails: {e}"}), 500
\ No newline at end of file
+        return jsonify({'error': f"Erreur lors de la récupération des détails: {e}"}), 500
+
+
+@bp.route('/analysis-runs/<int:run_id>/artifacts', methods=['GET'])
+def get_analysis_run_artifacts(run_id):
+    """Retourne le manifeste des fichiers produits par une exécution"""
+    username = request.args.get('username', 'unknown')
+    db = get_db()
+    row = db.execute("SELECT run_uid, artifacts_json FROM analysis_runs WHERE id = ?", (run_id,)).fetchone()
+    if not row:
+        return jsonify({'error': 'Analyse non trouvée.'}), 404
+
+    artifacts = json.loads(row['artifacts_json']) if row['artifacts_json'] else []
+    for artifact in artifacts:
+        artifact['url'] = f"/api/results/{row['run_uid']}/{artifact['name']}"
+    logging_service.log_action(username, 'VIEW_ANALYSIS_RUN_ARTIFACTS', 'SUCCESS', {'run_id': run_id, 'count': len(artifacts)})
+    return jsonify({'run_id': run_id, 'run_uid': row['run_uid'], 'artifacts': artifacts})
+
+
+@bp.route('/analysis-runs/<int:run_id>/profile', methods=['GET'])
+def get_analysis_run_profile(run_id):
+    """Retourne la décomposition des durées d'une exécution (serveur, worker, étapes du script)"""
+    username = request.args.get('username', 'unknown')
+    db = get_db()
+    row = db.execute("SELECT control_id, control_name, executed_at, profile_json FROM analysis_runs WHERE id = ?", (run_id,)).fetchone()
+    if not row:
+        return jsonify({'error': 'Analyse non trouvée.'}), 404
+    if not row['profile_json']:
+        return jsonify({'error': "Aucun profil n'a été enregistré pour cette analyse."}), 404
+
+    logging_service.log_action(username, 'VIEW_ANALYSIS_RUN_PROFILE', 'SUCCESS', {'run_id': run_id})
+    return jsonify({
+        'run_id': run_id,
+        'control_id': row['control_id'],
+        'control_name': row['control_name'],
+        'executed_at': row['executed_at'],
+        'profile': json.loads(row['profile_json']),
+    })
+
+
+@bp.route('/controls/<int:control_id>/run-stats', methods=['GET'])
+def get_control_run_statistics(control_id):
+    """p50/p95 de la mémoire, du CPU, de la durée et des volumes des dernières exécutions d'un contrôle"""
+    username = request.args.get('username', 'unknown')
+    limit = request.args.get('limit', 200, type=int)
+    db = get_db()
+    control = db.execute("SELECT name FROM controls WHERE id = ?", (control_id,)).fetchone()
+    if not control:
+        return jsonify({'error': 'Contrôle non trouvé.'}), 404
+
+    stats = get_control_run_stats(db, control_id, limit)
+    stats['control_name'] = control['name']
+    logging_service.log_action(username, 'VIEW_CONTROL_RUN_STATS', 'SUCCESS', {'control_id': control_id, 'runs': stats['overall']['runs']})
+    return jsonify(stats)
+
+
+def _week_number(week_label):
+    """Numéro d'une étiquette de semaine ('S22' -> 22), ou None si elle n'en contient pas."""
+    match = re.search(r'\d+', week_label or '')
+    return int(match.group()) if match else None
+
+
+@bp.route('/controls/<int:control_id>/backfill', methods=['POST'])
+@permission_required(Permission.MANAGE_CONTROLS)
+def backfill_control(control_id):
+    """
+    Recalcule les semaines passées d'un contrôle à partir des fichiers archivés de leurs exécutions.
+    Corps JSON : username, et soit week_labels (liste), soit from_week / to_week (bornes incluses, ex. 'S10' et 'S14').
+    Pour chaque semaine, la dernière exécution enregistrée sert de source ; les nouveaux résultats
+    sont ajoutés à l'historique (source_run_id) sans remplacer les anciens.
+    """
+    data = request.get_json()
+    username = data['username']
+    db = get_db()
+    control = db.execute("SELECT id, name, script_filename, input_definitions FROM controls WHERE id = ?", (control_id,)).fetchone()
+    if not control:
+        return jsonify({'error': 'Contrôle non trouvé.'}), 404
+
+    week_labels = data.get('week_labels')
+    if not week_labels and data.get('from_week') and data.get('to_week'):
+        low, high = _week_number(data['from_week']), _week_number(data['to_week'])
+        if low is None or high is None:
+            return jsonify({'error': 'Bornes de semaines invalides.'}), 400
+        existing = db.execute("SELECT DISTINCT week_label FROM analysis_runs WHERE control_id = ?", (control_id,)).fetchall()
+        week_labels = sorted(
+            (row['week_label'] for row in existing if _week_number(row['week_label']) is not None and low <= _week_number(row['week_label']) <= high),
+            key=_week_number
+        )
+    if not week_labels:
+        return jsonify({'error': 'Aucune semaine à recalculer.'}), 400
+
+    source_runs, not_found = [], []
+    for week_label in week_labels:
+        run = db.execute(
+            """SELECT id, week_label, files_info FROM analysis_runs
+               WHERE control_id = ? AND week_label = ? ORDER BY id DESC LIMIT 1""",
+            (control_id, week_label)
+        ).fetchone()
+        if run:
+            source_runs.append(run)
+        else:
+            not_found.append(week_label)
+
+    backfill = campaign_manager.submit_backfill(current_app._get_current_object(), control, source_runs, username)
+    backfill.skipped.extend({'week_label': week_label, 'source_run_id': None, 'reason': 'Aucune exécution enregistrée'} for week_label in not_found)
+    logging_service.log_action(username, 'CONTROL_BACKFILL', 'SUCCESS', {
+        'control_id': control_id, 'control_name': control['name'], 'backfill_id': backfill.id,
+        'weeks': len(backfill.jobs), 'skipped': len(backfill.skipped),
+    })
+    return jsonify(backfill.to_dict()), 202
+
+
+@bp.route('/backfills/<backfill_id>', methods=['GET'])
+def get_backfill(backfill_id):
+    """Avancement et débit (exécutions par minute, Mo/s) d'un backfill"""
+    username = request.args.get('username', 'unknown')
+    backfill = campaign_manager.get(backfill_id, Backfill)
+    if not backfill or not _is_owner_or_admin(username, backfill.username):
+        return jsonify({'error': 'Backfill non trouvé.'}), 404
+    return jsonify(backfill.to_dict())
@@ -0,0 +1,85 @@
+#---> NOUVEAU FICHIER : hyper_framework_server/api/campaign_routes.py
+
+from flask import Blueprint, request, jsonify, current_app
+import json
+from ..database.database import get_db
+from ..services.analysis_service import save_shared_inputs
+from ..services.campaign_service import campaign_manager, resolve_campaign_inputs
+from ..services.exceptions import InvalidInputError, MissingInputError
+from ..services.logging_service import logging_service
+from ..services.run_scheduler import PRIORITY_RANKS, PRIORITY_INTERACTIVE
+from .job_routes import _is_owner_or_admin
+
+bp = Blueprint('campaigns', __name__, url_prefix='/api/campaigns')
+
+@bp.route('', methods=['POST'])
+def submit_campaign():
+    """
+    Lance plusieurs contrôles pour une semaine sur un même jeu de fichiers, envoyés une seule fois.
+    Formulaire : user_data, week_label, control_ids (liste JSON), priority (optionnel) et
+    mapping (optionnel, JSON {id du contrôle: {clé d'entrée: nom du champ de fichier}}).
+    Une clé d'entrée sans mapping est associée au fichier envoyé sous le même nom.
+    """
+    user_data = json.loads(request.form.get('user_data', '{}'))
+    username = user_data.get('username', 'unknown')
+    week_label = request.form.get('week_label', 'N/A')
+    priority = request.form.get('priority', PRIORITY_INTERACTIVE)
+    try:
+        control_ids = [int(control_id) for control_id in json.loads(request.form.get('control_ids', '[]'))]
+        mapping = json.loads(request.form.get('mapping', '{}'))
+    except (ValueError, TypeError):
+        return jsonify({'error': 'control_ids ou mapping invalide.'}), 400
+    if not control_ids:
+        return jsonify({'error': 'Aucun contrôle sélectionné.'}), 400
+    if priority not in PRIORITY_RANKS:
+        return jsonify({'error': f"Priorité inconnue : {priority}"}), 400
+
+    db = get_db()
+    placeholders = ', '.join('?' for _ in control_ids)
+    controls = db.execute(
+        f"SELECT id, name, script_filename, input_definitions FROM controls WHERE id IN ({placeholders})", control_ids
+    ).fetchall()
+    missing_controls = set(control_ids) - {control['id'] for control in controls}
+    if missing_controls:
+        logging_service.log_action(username, 'CAMPAIGN_SUBMIT', 'FAILURE', {'control_ids': control_ids, 'error': 'Control not found'})
+        return jsonify({'error': f"Contrôle(s) non trouvé(s) : {sorted(missing_controls)}"}), 404
+
+    try:
+        shared_inputs = save_shared_inputs(request.files, current_app.config['INPUTS_DIR'])
+        resolved_inputs = resolve_campaign_inputs(controls, mapping, shared_inputs)
+    except (MissingInputError, InvalidInputError) as e:
+        return jsonify({'error': str(e)}), 400
+
+    campaign = campaign_manager.submit(
+        current_app._get_current_object(), controls, resolved_inputs, username, week_label, priority
+    )
+    logging_service.log_action(username, 'CAMPAIGN_SUBMIT', 'SUCCESS', {
+        'campaign_id': campaign.id, 'week_label': week_label,
+        'control_ids': control_ids, 'files': sorted(shared_inputs),
+    })
+    return jsonify(campaign.to_dict()), 202
+
+@bp.route('/<campaign_id>', methods=['GET'])
+def get_campaign(campaign_id):
+    """
+    État d'une campagne : ses jobs si elle est encore en mémoire, et les exécutions enregistrées
+    dans analysis_runs (disponibles aussi après un redémarrage du serveur).
+    """
+    username = request.args.get('username', 'unknown')
+    campaign = campaign_manager.get(campaign_id)
+    if campaign and not _is_owner_or_admin(username, campaign.username):
+        return jsonify({'error': 'Campagne non trouvée.'}), 404
+
+    runs = get_db().execute(
+        """SELECT id, control_id, control_name, week_label, username, executed_at, run_uid, cache_hit
+           FROM analysis_runs WHERE campaign_id = ? ORDER BY id""",
+        (campaign_id,)
+    ).fetchall()
+    if not campaign:
+        if not runs or not _is_owner_or_admin(username, runs[0]['username']):
+            return jsonify({'error': 'Campagne non trouvée.'}), 404
+        data = {'campaign_id': campaign_id, 'username': runs[0]['username'], 'week_label': runs[0]['week_label'], 'state': 'unknown'}
+    else:
+        data = campaign.to_dict()
+    data['runs'] = [dict(row) for row in runs]
+    return jsonify(data)
@@ -0,0 +1,17 @@
+#---> NOUVEAU FICHIER : hyper_framework_server/api/health_routes.py
+
+from flask import Blueprint, jsonify
+from ..services.warmup import server_warmup
+
+bp = Blueprint('health', __name__, url_prefix='/api/health')
+
+@bp.route('', methods=['GET'])
+def liveness():
+    """Le processus serveur répond (même si le préchauffage n'est pas terminé)."""
+    return jsonify({'status': 'alive'})
+
+@bp.route('/ready', methods=['GET'])
+def readiness():
+    """200 quand le préchauffage est terminé, 503 sinon. Attendu par les lanceurs avant d'ouvrir le client."""
+    status = server_warmup.status()
+    return jsonify(status), (200 if server_warmup.is_ready else 503)
@@ -0,0 +1,153 @@
+#---> NOUVEAU FICHIER : hyper_framework_server/api/job_routes.py
+
+from flask import Blueprint, request, jsonify, current_app, Response, stream_with_context
+import json
+import os
+import threading
+import time
+from .. import config
+from ..auth.roles import Role
+from ..database.database import get_db
+from ..services.analysis_service import save_uploaded_inputs, input_hashes_from, RunProfile
+from ..services.exceptions import MissingInputError, InvalidInputError
+from ..services.input_staging import input_staging
+from ..services.job_service import job_manager, job_queue, FINISHED_STATES, EXECUTION_MODE_QUEUE
+from ..services.logging_service import logging_service
+from ..services.run_scheduler import run_scheduler, PRIORITY_RANKS, PRIORITY_INTERACTIVE
+
+bp = Blueprint('jobs', __name__, url_prefix='/api/jobs')
+
+# Intervalle des commentaires envoyés sur un flux d'événements inactif (garde la connexion ouverte)
+EVENTS_KEEPALIVE_SECONDS = 15
+
+# Flux d'événements ouverts (chacun occupe un thread du serveur)
+_open_streams = 0
+_open_streams_lock = threading.Lock()
+
+def _release_stream():
+    global _open_streams
+    with _open_streams_lock:
+        _open_streams -= 1
+
+def _is_owner_or_admin(username, owner):
+    """Le propriétaire d'un job (ou d'une campagne) et les administrateurs peuvent le consulter ou l'annuler."""
+    if username == owner:
+        return True
+    user = get_db().execute("SELECT role FROM users WHERE username = ?", (username,)).fetchone()
+    return bool(user) and Role(user['role']) in (Role.SUPER_ADMIN, Role.ADMIN)
+
+@bp.route('', methods=['POST'])
+def submit_job():
+    """
+    Soumet l'exécution d'un contrôle et retourne immédiatement l'identifiant du job.
+    Les fichiers déjà envoyés à l'avance (/api/uploads) sont référencés par staged_inputs ({clé: upload_id}).
+    """
+    user_data = json.loads(request.form.get('user_data', '{}'))
+    username = user_data.get('username', 'unknown')
+    week_label = request.form.get('week_label', 'N/A')
+    control_id = request.form.get('control_id', type=int)
+    priority = request.form.get('priority', PRIORITY_INTERACTIVE)
+    if not control_id:
+        return jsonify({'error': 'control_id manquant.'}), 400
+    if priority not in PRIORITY_RANKS:
+        return jsonify({'error': f"Priorité inconnue : {priority}"}), 400
+
+    db = get_db()
+    control = db.execute("SELECT name, script_filename, input_definitions FROM controls WHERE id = ?", (control_id,)).fetchone()
+    if not control:
+        logging_service.log_action(username, 'ANALYSIS_SUBMIT', 'FAILURE', {'control_id': control_id, 'error': 'Control not found'})
+        return jsonify({'error': 'Contrôle non trouvé.'}), 404
+
+    try:
+        script_path = os.path.join(current_app.config['SCRIPTS_DIR'], control['script_filename'])
+        profile = RunProfile()
+        with profile.measure('upload_save'):
+            staged_inputs = input_staging.resolve(json.loads(request.form.get('staged_inputs', '{}')), control_id, username, current_app.config['INPUTS_DIR'])
+            input_file_paths, files_info = save_uploaded_inputs(request.files, json.loads(control['input_definitions']), current_app.config['INPUTS_DIR'], staged_inputs,
+                                                                json.loads(request.form.get('input_refs', '{}')))
+    except (MissingInputError, InvalidInputError) as e:
+        return jsonify({'error': str(e)}), 400
+
+    job = job_manager.submit(
+        current_app._get_current_object(), control_id, control['name'], script_path,
+        input_file_paths, files_info, username, week_label, priority, profile=profile,
+        input_hashes=input_hashes_from(files_info)
+    )
+    logging_service.log_action(username, 'ANALYSIS_SUBMIT', 'SUCCESS', {'control_id': control_id, 'control_name': control['name'], 'job_id': job.id})
+    return jsonify(job.to_dict(include_results=False)), 202
+
+@bp.route('/queue', methods=['GET'])
+def get_queue():
+    """État du planificateur (ou de la file partagée en mode 'queue') : exécutions en cours et file d'attente ordonnée."""
+    if config.JOB_EXECUTION_MODE == EXECUTION_MODE_QUEUE:
+        return jsonify(job_queue.snapshot())
+    return jsonify(run_scheduler.snapshot())
+
+@bp.route('/<job_id>', methods=['GET'])
+def get_job(job_id):
+    username = request.args.get('username', 'unknown')
+    job = job_manager.get(job_id)
+    if not job or not _is_owner_or_admin(username, job.username):
+        return jsonify({'error': 'Job non trouvé.'}), 404
+    return jsonify(job.to_dict())
+
+@bp.route('/<job_id>/events', methods=['GET'])
+def stream_job_events(job_id):
+    """
+    Flux Server-Sent Events des événements du job (changements d'état et avancement du script).
+    Reprise possible via l'en-tête Last-Event-ID ou le paramètre ?after=<id>.
+    Le flux se termine par un événement 'end' contenant l'état final du job (sans les résultats).
+    Pour ne pas immobiliser un thread du serveur pendant toute l'analyse, il est fermé après
+    JOB_EVENTS_STREAM_MAX_SECONDS par un événement 'reconnect' : le client rouvre le flux après le dernier id reçu.
+    Au-delà de JOB_EVENTS_MAX_STREAMS flux ouverts, la requête est refusée (503) et le client interroge le job.
+    """
+    global _open_streams
+    username = request.args.get('username', 'unknown')
+    job = job_manager.get(job_id)
+    if not job or not _is_owner_or_admin(username, job.username):
+        return jsonify({'error': 'Job non trouvé.'}), 404
+    after_id = request.headers.get('Last-Event-ID', type=int) or request.args.get('after', 0, type=int)
+
+    with _open_streams_lock:
+        if _open_streams >= config.JOB_EVENTS_MAX_STREAMS:
+            return jsonify({'error': "Trop de flux d'événements ouverts, suivez le job par interrogation."}), 503
+        _open_streams += 1
+
+    def generate():
+        last_id = after_id
+        deadline = time.monotonic() + config.JOB_EVENTS_STREAM_MAX_SECONDS
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                yield f"event: reconnect\ndata: {json.dumps({'after': last_id})}\n\n"
+                return
+            events = job.wait_for_events(last_id, min(EVENTS_KEEPALIVE_SECONDS, remaining))
+            if not events and not job.is_finished:
+                yield ": keep-alive\n\n"
+                continue
+            for event in events:
+                last_id = event['id']
+                yield f"id: {event['id']}\nevent: {event['type']}\ndata: {json.dumps(event)}\n\n"
+            if not events or (events[-1]['type'] == 'state' and events[-1]['message'] in FINISHED_STATES):
+                yield f"event: end\ndata: {json.dumps(job.to_dict(include_results=False))}\n\n"
+                return
+
+    response = Response(stream_with_context(generate()), mimetype='text/event-stream',
+                        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+    # Appelé à la fermeture de la réponse, y compris si le client se déconnecte avant la première lecture
+    response.call_on_close(_release_stream)
+    return response
+
+@bp.route('/<job_id>', methods=['DELETE'])
+def cancel_job(job_id):
+    data = request.get_json(silent=True) or {}
+    username = data.get('username', request.args.get('username', 'unknown'))
+    job = job_manager.get(job_id)
+    if not job or not _is_owner_or_admin(username, job.username):
+        return jsonify({'error': 'Job non trouvé.'}), 404
+    if job.is_finished:
+        return jsonify({'error': f"Le job est déjà terminé ({job.state})."}), 409
+
+    job_manager.cancel(job_id)
+    logging_service.log_action(username, 'ANALYSIS_CANCEL', 'SUCCESS', {'control_id': job.control_id, 'job_id': job_id})
+    return jsonify(job.to_dict(include_results=False)), 202
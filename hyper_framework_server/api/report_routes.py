@@ -7,7 +7,11 @@ import pandas as pd
 from datetime import datetime
 
 from ..services.report_service import report_service
-from ..services.script_execution_engine import execute_script_from_file
+from ..services.analysis_service import save_uploaded_inputs, input_hashes_from, execute_control_script
+from ..services.exceptions import MissingInputError, InvalidInputError
+from ..services.input_staging import input_staging
+from ..services.result_store import load_all_items
+from ..services.run_scheduler import RunTicket, PRIORITY_INTERACTIVE
 from ..database.database import get_db
 from ..services.logging_service import logging_service
 
@@ -35,27 +39,22 @@ def execute_and_generate_report():
         control_data['input_definitions'] = json.loads(control_data['input_definitions'])
 
         script_path = os.path.join(current_app.config['SCRIPTS_DIR'], control_data['script_filename'])
-        inputs_dir = current_app.config['INPUTS_DIR']
-        run_timestamp = datetime.now().strftime('%Y%m%d-%H%M%S')
-        input_file_paths = {}
+        try:
+            staged_inputs = input_staging.resolve(json.loads(request.form.get('staged_inputs', '{}')), control_data['id'], username, current_app.config['INPUTS_DIR'])
+            input_file_paths, files_info = save_uploaded_inputs(request.files, control_data['input_definitions'], current_app.config['INPUTS_DIR'], staged_inputs,
+                                                                json.loads(request.form.get('input_refs', '{}')))
+        except (MissingInputError, InvalidInputError) as e:
+            return jsonify({'error': str(e)}), 400
 
-        for input_def in control_data['input_definitions']:
-            key = input_def['key']
-            if key not in request.files: return jsonify({'error': f"Fichier manquant: {key}"}), 400
-            file = request.files[key]
-            unique_filename = f"{run_timestamp}_{key}_{secure_filename(file.filename)}"
-            saved_path = os.path.join(inputs_dir, unique_filename)
-            file.save(saved_path)
-            input_file_paths[key] = saved_path
-
-        results_with_dfs = execute_script_from_file(script_path, input_file_paths, current_app.config['OUTPUTS_DIR'])
-        
-        analysis_results = []
-        for result in results_with_dfs:
-            if 'dataframe' in result and isinstance(result['dataframe'], pd.DataFrame):
-                result['items'] = result['dataframe'].to_dict('records')
-                del result['dataframe']
-            analysis_results.append(result)
+        outcome = execute_control_script(
+            control_data['id'], script_path, input_file_paths, current_app.config['OUTPUTS_DIR'],
+            RunTicket(username, control_data['id'], PRIORITY_INTERACTIVE),
+            params={'week_label': request.form.get('week_label', 'N/A')},
+            input_hashes=input_hashes_from(files_info)
+        )
+        # Le rapport reprend toutes les lignes, y compris celles des sections paginées
+        analysis_results = load_all_items(outcome['results'], current_app.config['OUTPUTS_DIR'])
+        control_data_for_log['cache_hit'] = outcome['cache_hit']
 
         safe_name = re.sub(r'[^\w\.-]', '_', control_data.get('name', 'analyse'))
         report_filename = f"Rapport_{safe_name}_{datetime.now().strftime('%Y-%m-%d-%H-%M-%S')}.docx"
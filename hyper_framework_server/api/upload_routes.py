@@ -0,0 +1,167 @@
+#---> NOUVEAU FICHIER : hyper_framework_server/api/upload_routes.py
+
+from flask import Blueprint, request, jsonify, current_app
+import json
+from .. import config
+from ..database.database import get_db
+from ..services.chunked_upload import chunked_uploads
+from ..services.compression import supported_encodings
+from ..services.exceptions import InvalidInputError, UploadSessionError
+from ..services.input_staging import input_staging
+from ..services.input_store import input_store
+from ..services.logging_service import logging_service
+
+bp = Blueprint('uploads', __name__, url_prefix='/api/uploads')
+
+def _public_fields(staged):
+    return {key: staged[key] for key in ('upload_id', 'control_id', 'input_key', 'original_name', 'sha256',
+                                         'size_bytes', 'parse_state', 'parse_error', 'parsed_rows', 'parse_seconds')}
+
+@bp.route('', methods=['POST'])
+def stage_input():
+    """
+    Envoi anticipé d'un fichier d'entrée, dès sa sélection dans le client.
+    Formulaire : user_data, control_id, key (clé de l'entrée) et le fichier dans 'file', ou bien
+    sha256 et filename si le serveur a déjà ce contenu (voir /lookup) : rien n'est alors transféré.
+    La réponse contient upload_id, à transmettre au lancement de l'analyse (champ staged_inputs).
+    """
+    user_data = json.loads(request.form.get('user_data', '{}'))
+    username = user_data.get('username', 'unknown')
+    control_id = request.form.get('control_id', type=int)
+    key = request.form.get('key')
+    file = request.files.get('file')
+    reference = None
+    if file is None and request.form.get('sha256') and request.form.get('filename'):
+        reference = {'sha256': request.form['sha256'], 'filename': request.form['filename']}
+    if not control_id or not key or (file is None and reference is None):
+        return jsonify({'error': 'control_id, key et file (ou sha256 et filename) sont requis.'}), 400
+
+    control = get_db().execute("SELECT name, input_definitions FROM controls WHERE id = ?", (control_id,)).fetchone()
+    if not control:
+        return jsonify({'error': 'Contrôle non trouvé.'}), 404
+    input_def = next((item for item in json.loads(control['input_definitions']) if item['key'] == key), None)
+    if input_def is None:
+        return jsonify({'error': f"Entrée inconnue pour ce contrôle : {key}"}), 400
+
+    try:
+        staged = input_staging.stage(current_app._get_current_object(), file, control_id, input_def, username, reference)
+    except InvalidInputError as e:
+        return jsonify({'error': str(e)}), 400
+    logging_service.log_action(username, 'INPUT_STAGE', 'SUCCESS', {
+        'control_id': control_id, 'control_name': control['name'], 'key': key,
+        'upload_id': staged['upload_id'], 'size_bytes': staged['size_bytes'], 'reused': reference is not None,
+    })
+    return jsonify(dict(_public_fields(staged), reused=reference is not None)), 201
+
+@bp.route('/lookup', methods=['POST'])
+def lookup_inputs():
+    """
+    Indique, parmi les SHA-256 calculés par le client ('hashes'), ceux dont le serveur a déjà le contenu.
+    Le client les désigne ensuite par leur hash (staged_inputs par référence, ou champ input_refs) au lieu de les envoyer.
+    """
+    data = request.get_json() or {}
+    hashes = data.get('hashes')
+    if not isinstance(hashes, list):
+        return jsonify({'error': 'hashes doit être une liste de SHA-256.'}), 400
+    known = input_store.known_hashes(hashes, current_app.config['INPUTS_DIR'])
+    return jsonify({'known': known, 'missing': [sha256 for sha256 in hashes if sha256 not in known]})
+
+@bp.route('/capabilities', methods=['GET'])
+def upload_capabilities():
+    """
+    Possibilités d'envoi du serveur : compressions acceptées (parties multipart de type application/gzip
+    ou application/zstd, ou 'encoding' d'une session par morceaux), limites de taille et taille des morceaux.
+    """
+    return jsonify({
+        'encodings': supported_encodings(),
+        'max_file_bytes': config.UPLOAD_MAX_FILE_BYTES,
+        'max_request_bytes': current_app.config.get('MAX_CONTENT_LENGTH'),
+        'chunk_size': config.UPLOAD_CHUNK_SIZE,
+    })
+
+@bp.route('/<upload_id>', methods=['GET'])
+def get_staged_input(upload_id):
+    """État d'un fichier envoyé à l'avance (lecture anticipée en cours, terminée, impossible...)."""
+    username = request.args.get('username', 'unknown')
+    staged = input_staging.get(upload_id)
+    if not staged or staged['username'] != username:
+        return jsonify({'error': 'Fichier non trouvé.'}), 404
+    return jsonify(_public_fields(staged))
+
+def _owned_session(session_id, username):
+    session = chunked_uploads.get(session_id)
+    return session if session and session['username'] == username else None
+
+def _session_error(e):
+    if e.missing is not None:
+        return jsonify({'error': str(e), 'missing': e.missing}), 409
+    return jsonify({'error': str(e)}), 400
+
+@bp.route('/sessions', methods=['POST'])
+def create_upload_session():
+    """
+    Ouvre un envoi par morceaux. JSON : username, filename, size_bytes, et facultativement chunk_size,
+    sha256 (vérifié à la fin) et encoding ('gzip' ou 'zstd' : size_bytes est alors la taille compressée et
+    sha256 celui du contenu d'origine). La réponse donne session_id, chunk_size, chunk_count et les morceaux attendus.
+    """
+    data = request.get_json() or {}
+    username = data.get('username', 'unknown')
+    try:
+        session = chunked_uploads.create(current_app.config['INPUTS_DIR'], username, data.get('filename'),
+                                         data.get('size_bytes'), data.get('chunk_size'), data.get('sha256'),
+                                         data.get('encoding'))
+    except UploadSessionError as e:
+        return _session_error(e)
+    return jsonify(chunked_uploads.describe(session)), 201
+
+@bp.route('/sessions/<session_id>', methods=['GET'])
+def get_upload_session(session_id):
+    """État d'un envoi par morceaux : 'missing' liste les morceaux à (r)envoyer, par exemple après une coupure."""
+    session = _owned_session(session_id, request.args.get('username', 'unknown'))
+    if not session:
+        return jsonify({'error': "Session d'envoi non trouvée."}), 404
+    return jsonify(chunked_uploads.describe(session))
+
+@bp.route('/sessions/<session_id>/chunks/<int:index>', methods=['PUT'])
+def put_upload_chunk(session_id, index):
+    """Reçoit un morceau (corps brut de la requête), accompagné de son SHA-256 dans l'en-tête X-Chunk-SHA256."""
+    session = _owned_session(session_id, request.args.get('username', 'unknown'))
+    if not session:
+        return jsonify({'error': "Session d'envoi non trouvée."}), 404
+    try:
+        chunked_uploads.write_chunk(current_app.config['INPUTS_DIR'], session, index, request.stream,
+                                    request.headers.get('X-Chunk-SHA256', '').lower())
+    except UploadSessionError as e:
+        return _session_error(e)
+    return jsonify({'session_id': session_id, 'index': index}), 200
+
+@bp.route('/sessions/<session_id>/complete', methods=['POST'])
+def complete_upload_session(session_id):
+    """
+    Termine l'envoi : le fichier est vérifié et rangé dans le stockage des entrées. La réponse (sha256, filename)
+    sert à le désigner au lancement de l'analyse (input_refs) ou à l'envoi anticipé (sha256 et filename).
+    Répond 409 avec 'missing' si des morceaux manquent encore.
+    """
+    data = request.get_json() or {}
+    username = data.get('username', 'unknown')
+    session = _owned_session(session_id, username)
+    if not session:
+        return jsonify({'error': "Session d'envoi non trouvée."}), 404
+    try:
+        stored = chunked_uploads.complete(current_app.config['INPUTS_DIR'], session)
+    except UploadSessionError as e:
+        return _session_error(e)
+    logging_service.log_action(username, 'INPUT_UPLOAD', 'SUCCESS', {
+        'session_id': session_id, 'filename': stored['filename'], 'size_bytes': stored['size_bytes'],
+        'chunk_count': session['chunk_count'],
+    })
+    return jsonify(stored)
+
+@bp.route('/sessions/<session_id>', methods=['DELETE'])
+def abort_upload_session(session_id):
+    data = request.get_json() or {}
+    session = _owned_session(session_id, data.get('username', 'unknown'))
+    if not session:
+        return jsonify({'error': "Session d'envoi non trouvée."}), 404
+    chunked_uploads.abort(current_app.config['INPUTS_DIR'], session)
+    return '', 204
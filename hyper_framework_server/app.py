@@ -1,11 +1,15 @@
-from flask import Flask
+from flask import Flask, jsonify
+from werkzeug.exceptions import RequestEntityTooLarge, UnsupportedMediaType
 from .database import database
-from .api import auth_routes, analysis_routes, report_routes, logging_routes # Ajout de logging_routes
+from .api import auth_routes, analysis_routes, report_routes, logging_routes, job_routes, admin_routes, campaign_routes, health_routes, upload_routes # Ajout de logging_routes
 from . import config
+from .services.upload_ingest import IngestRequest
 import os
 
 def create_app():
     app = Flask(__name__)
+    # Fichiers envoyés écrits directement dans le stockage des entrées pendant la réception
+    app.request_class = IngestRequest
 
     app.config.from_object(config)
 
@@ -14,7 +18,25 @@ def create_app():
     app.register_blueprint(analysis_routes.bp)
     app.register_blueprint(report_routes.bp)
     app.register_blueprint(logging_routes.bp) # Enregistrement du nouveau blueprint
+    app.register_blueprint(job_routes.bp)
+    app.register_blueprint(admin_routes.bp)
+    app.register_blueprint(campaign_routes.bp)
+    app.register_blueprint(health_routes.bp)
+    app.register_blueprint(upload_routes.bp)
     
+    @app.errorhandler(RequestEntityTooLarge)
+    def request_too_large(e):
+        if e.description == RequestEntityTooLarge.description:
+            # Limite de taille de la requête entière (MAX_CONTENT_LENGTH)
+            return jsonify({'error': f"Requête trop volumineuse (limite : {app.config['MAX_CONTENT_LENGTH'] // (1024 * 1024)} Mo). "
+                                     "Envoyez les fichiers séparément ou par morceaux."}), 413
+        return jsonify({'error': e.description}), 413
+
+    @app.errorhandler(UnsupportedMediaType)
+    def unsupported_media_type(e):
+        # Fichier envoyé avec une compression que le serveur ne sait pas lire (voir /api/uploads/capabilities)
+        return jsonify({'error': e.description}), 415
+
     @app.route('/')
     def index():
         return "Hyper-Framework Server is running."
@@ -8,8 +8,11 @@ from pathlib import Path
 # Le chemin racine du package serveur
 SERVER_ROOT = Path(__file__).resolve().parent
 
-# Dossier principal pour les données modifiables par l'utilisateur
-_APP_DATA_DIR = SERVER_ROOT / "data"
+# Dossier principal pour les données modifiables par l'utilisateur.
+# Surchargeable par la variable d'environnement ci-dessous (héritée par les processus du pool de workers,
+# qui réimportent ce module) : c'est ainsi qu'un worker de file pointe vers le dossier data partagé du serveur.
+DATA_DIR_ENV_VAR = "HYPER_FRAMEWORK_DATA_DIR"
+_APP_DATA_DIR = Path(os.environ.get(DATA_DIR_ENV_VAR) or SERVER_ROOT / "data")
 
 # Base de données
 _DB_FILE = _APP_DATA_DIR / "hyper_framework_server.db"
@@ -20,6 +23,7 @@ _INPUTS_DIR = _APP_DATA_DIR / "inputs"
 _OUTPUTS_DIR = _APP_DATA_DIR / "outputs"
 _REPORTS_DIR = _APP_DATA_DIR / "reports"
 _LOGS_DIR = _APP_DATA_DIR / "logs" # <-- NOUVEAU
+_CACHE_DIR = _APP_DATA_DIR / "cache"
 
 
 # Dossier pour les assets internes par défaut (non modifiables)
@@ -35,7 +39,8 @@ dirs_to_create = [
     _INPUTS_DIR,
     _OUTPUTS_DIR,
     _REPORTS_DIR,
-    _LOGS_DIR # <-- NOUVEAU
+    _LOGS_DIR, # <-- NOUVEAU
+    _CACHE_DIR
 ]
 
 for dir_path in dirs_to_create:
@@ -51,6 +56,130 @@ INPUTS_DIR = str(_INPUTS_DIR)
 OUTPUTS_DIR = str(_OUTPUTS_DIR)
 REPORTS_DIR = str(_REPORTS_DIR)
 LOGS_DIR = str(_LOGS_DIR) # <-- NOUVEAU
-
-# Timeout pour l'exécution des scripts
-SCRIPT_EXECUTION_TIMEOUT = 30
\ No newline at end of file
+CACHE_DIR = str(_CACHE_DIR)
+
+# --- Limites d'exécution des scripts ---
+# Valeurs globales, surchargeables par script via la variable __hyper_limits__.
+# Une exécution qui dépasse une limite est tuée avec son worker.
+SCRIPT_EXECUTION_TIMEOUT = 900   # Temps d'horloge maximal en secondes
+SCRIPT_CPU_TIME_LIMIT = None     # Temps CPU maximal en secondes (None = illimité)
+SCRIPT_MAX_RSS_MB = 4096         # Mémoire résidente maximale du worker en Mo (None = illimité)
+SCRIPT_LIMIT_POLL_INTERVAL = 0.5 # Intervalle de surveillance des workers en secondes
+
+# Pool de processus workers pour l'exécution des scripts de contrôle
+SCRIPT_WORKER_POOL_SIZE = max(1, (os.cpu_count() or 2) - 1)
+# Nombre d'exécutions après lequel un worker est recyclé (libère la mémoire)
+SCRIPT_WORKER_MAX_RUNS = 20
+
+# Durée de conservation en mémoire des jobs asynchrones terminés (secondes)
+JOB_RETENTION_SECONDS = 3600
+
+# --- Planification des exécutions (file d'attente équitable) ---
+RUN_MAX_CONCURRENT = SCRIPT_WORKER_POOL_SIZE  # Exécutions simultanées, tous utilisateurs confondus
+RUN_MAX_PER_USER = 2                          # Exécutions simultanées pour un même utilisateur
+RUN_MAX_PER_CONTROL = 2                       # Copies simultanées d'un même contrôle
+
+# --- Admission selon la mémoire prévue ---
+# La mémoire d'une exécution est prévue à partir de la taille de ses fichiers d'entrée et du rapport
+# (mémoire utilisée / Mo d'entrée) observé sur les exécutions passées du contrôle. Une exécution attend
+# si elle ferait dépasser le budget aux exécutions en cours, et est refusée si elle le dépasse à elle seule.
+try:
+    import psutil
+    MEMORY_BUDGET_MB = int(psutil.virtual_memory().total / (1024 * 1024) * 0.75)  # 75 % de la mémoire de la machine
+except ImportError:
+    MEMORY_BUDGET_MB = None             # None : pas de contrôle de la mémoire
+MEMORY_WORKER_BASELINE_MB = 150         # Mémoire d'un worker au repos (bibliothèques chargées)
+MEMORY_DEFAULT_MB_PER_INPUT_MB = 6      # Rapport utilisé tant qu'un contrôle n'a pas assez d'historique
+MEMORY_HISTORY_MIN_RUNS = 3             # Exécutions passées nécessaires pour utiliser le rapport observé
+MEMORY_HISTORY_RUNS = 50                # Exécutions passées prises en compte
+
+# Nombre maximal de versions de scripts gardées compilées en mémoire par worker
+SCRIPT_MODULE_CACHE_SIZE = 32
+
+# --- Cache des résultats (mémoïsation par hash du script, des entrées et des paramètres) ---
+RESULT_CACHE_ENABLED = True
+RESULT_CACHE_MAX_ENTRIES = 200
+RESULT_CACHE_MAX_BYTES = 512 * 1024 * 1024
+
+# --- Pipelines d'étapes (scripts déclarant un Pipeline au lieu de run()) ---
+PIPELINE_MAX_THREADS = 4                           # Étapes indépendantes exécutées en parallèle
+PIPELINE_CACHE_DIR = os.path.join(CACHE_DIR, "pipeline")
+PIPELINE_CACHE_MAX_BYTES = 2 * 1024 * 1024 * 1024  # Taille maximale du cache des sorties d'étapes
+
+# --- Serveur HTTP ---
+# Chaque flux d'avancement (Server-Sent Events) occupe un thread Waitress tant qu'il est ouvert
+SERVER_THREADS = 16
+JOB_EVENTS_STREAM_MAX_SECONDS = 60                 # Le flux est fermé ensuite ; le client se reconnecte (reprise via Last-Event-ID)
+JOB_EVENTS_MAX_STREAMS = SERVER_THREADS // 2       # Au-delà : 503, le client suit le job par interrogation
+
+# --- Dossiers de dépôt surveillés (exécutions automatiques hors heures ouvrées) ---
+# Chaque dossier associe des contrôles (nom du fichier de script) à un motif de nom de fichier par entrée.
+# Exemple :
+# DROP_FOLDERS = [
+#     {'path': r'\\serveur\exports', 'controls': {
+#         'revue_intune.py': {'intune_file': 'Intune*.csv', 'ad_users': 'AD_users*.txt', 'glpi_data': 'GLPI*.csv'},
+#     }},
+# ]
+DROP_FOLDERS = []
+DROP_FOLDER_POLL_SECONDS = 60
+DROP_FILE_STABLE_SECONDS = 120          # Un fichier est complet quand sa taille et sa date n'ont pas changé depuis ce délai
+DROP_FOLDER_OFF_PEAK_HOURS = (20, 6)    # Exécutions entre 20h et 6h (None : à tout moment)
+DROP_FOLDER_USERNAME = 'system-scheduler'
+
+# --- Exécution à blanc (dry run) sur un échantillon des fichiers d'entrée ---
+DRY_RUN_DEFAULT_ROWS = 1000     # Enregistrements conservés par fichier si le client n'en précise pas
+DRY_RUN_MAX_ROWS = 100000
+
+# --- Exécution distribuée des jobs ---
+# 'local' : les jobs s'exécutent dans le processus du serveur.
+# 'queue' : le serveur place les jobs dans la table job_queue ; des processus run_worker.py
+#           (sur cette machine ou sur d'autres partageant le dossier data) les exécutent.
+JOB_EXECUTION_MODE = 'local'
+JOB_QUEUE_POLL_SECONDS = 1.0        # Intervalle de consultation de la file (workers) et de suivi des jobs (serveur)
+JOB_QUEUE_LEASE_SECONDS = 30        # Un job dont le worker ne s'est pas manifesté depuis ce délai est remis en file
+JOB_QUEUE_MAX_ATTEMPTS = 2          # Nombre d'exécutions tentées avant d'abandonner un job (worker disparu)
+JOB_QUEUE_STOP_TIMEOUT_SECONDS = 30 # Attente maximale de l'interruption des jobs en cours à l'arrêt d'un worker
+
+# --- Résultats volumineux ---
+# Une section de plus de RESULT_SPILL_ROW_THRESHOLD lignes est écrite en Parquet par le worker
+# (OUTPUTS_DIR/results/<run_uid>) : seule sa première page est renvoyée, les suivantes sont lues à la demande.
+RESULT_SPILL_ROW_THRESHOLD = 20000
+RESULT_PAGE_SIZE = 5000
+
+# --- Dossiers des exécutions (OUTPUTS_DIR/runs et OUTPUTS_DIR/results, un sous-dossier par run_uid) ---
+# Un dossier encore référencé par le cache des résultats est toujours conservé.
+RUN_OUTPUTS_RETENTION_DAYS = 90                 # Au-delà, fichiers produits et pages de résultats sont supprimés. None : jamais
+RUN_OUTPUTS_ORPHAN_GRACE_SECONDS = 24 * 3600    # Exécution jamais enregistrée (échec, annulation) : dossier supprimé après ce délai
+RUN_OUTPUTS_GC_INTERVAL_SECONDS = 3600          # Intervalle minimal entre deux collectes automatiques
+
+# --- Démarrage du serveur (préchauffage) ---
+# Au démarrage, les scripts de SCRIPTS_DIR sont compilés, vérifiés et chargés dans chaque worker ;
+# /api/health/ready répond 503 tant que ce préchauffage n'est pas terminé.
+WARMUP_SCRIPT_TIMEOUT_SECONDS = 120     # Délai maximal de chargement des scripts par un worker
+
+# --- Envoi anticipé des fichiers d'entrée ---
+# Le client envoie chaque fichier dès qu'il est sélectionné. Le serveur le range dans INPUTS_DIR et en
+# prépare aussitôt une version Parquet (PARSED_INPUTS_DIR), lue directement par sdk.tables.load_table.
+STAGED_INPUT_TTL_SECONDS = 24 * 3600            # Fichiers envoyés mais jamais utilisés : supprimés après ce délai
+INPUT_PREPARSE_WORKERS = 1                      # Processus consacrés à la lecture anticipée des fichiers
+PARSED_INPUTS_DIR = os.path.join(CACHE_DIR, "parsed")
+PARSED_INPUTS_MAX_BYTES = 2 * 1024 * 1024 * 1024
+
+# --- Stockage des fichiers d'entrée ---
+# Les fichiers sont rangés par contenu (INPUTS_DIR/blobs, nommés par leur SHA-256) : un fichier envoyé plusieurs
+# fois n'est stocké qu'une fois. Un contenu n'est supprimé que lorsqu'aucune exécution enregistrée ni aucun
+# fichier envoyé à l'avance ne le référence plus.
+INPUT_BLOB_GRACE_SECONDS = 24 * 3600    # Délai de conservation d'un contenu sans référence après sa dernière utilisation
+INPUT_RUN_RETENTION_DAYS = None         # Au-delà, une exécution libère ses fichiers (plus de backfill possible). None : jamais
+INPUT_GC_INTERVAL_SECONDS = 3600        # Intervalle minimal entre deux collectes automatiques
+
+# --- Réception des fichiers envoyés ---
+# Les fichiers d'une requête sont écrits directement dans le stockage des entrées pendant leur réception.
+UPLOAD_MAX_FILE_BYTES = 2 * 1024 * 1024 * 1024     # Taille maximale d'un fichier d'entrée
+MAX_CONTENT_LENGTH = 4 * 1024 * 1024 * 1024        # Taille maximale d'une requête (Flask : 413 au-delà)
+
+# --- Envoi des gros fichiers par morceaux (reprenable après une coupure réseau) ---
+UPLOAD_CHUNK_SIZE = 8 * 1024 * 1024         # Taille des morceaux si le client n'en propose pas
+UPLOAD_CHUNK_MIN_SIZE = 256 * 1024
+UPLOAD_CHUNK_MAX_SIZE = 64 * 1024 * 1024    # Un morceau est gardé en mémoire le temps de sa vérification
+UPLOAD_SESSION_TTL_SECONDS = 24 * 3600      # Session sans nouveau morceau depuis ce délai : abandonnée
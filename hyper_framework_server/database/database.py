@@ -6,6 +6,32 @@ from flask import current_app, g
 import os
 import sys
 
+# Colonnes ajoutées à analysis_runs après sa création (migration automatique des bases existantes)
+ANALYSIS_RUNS_EXTRA_COLUMNS = {
+    'run_uid': 'TEXT',            # Identifiant du dossier de sortie propre à l'exécution
+    'artifacts_json': 'TEXT',     # Manifeste des fichiers produits par le script
+    'profile_json': 'TEXT',       # Décomposition des durées de l'exécution (serveur, worker, étapes)
+    # Consommation de ressources (NULL pour un résultat repris du cache)
+    'cache_hit': 'INTEGER DEFAULT 0',
+    'script_sha256': 'TEXT',      # Version du script exécutée
+    'peak_rss_mb': 'REAL',
+    'cpu_user_seconds': 'REAL',
+    'cpu_system_seconds': 'REAL',
+    'duration_seconds': 'REAL',
+    'input_bytes': 'INTEGER',
+    'results_bytes': 'INTEGER',   # Taille des résultats sérialisés (JSON)
+    'campaign_id': 'TEXT',        # Campagne à laquelle appartient l'exécution (NULL sinon)
+    'source_run_id': 'INTEGER',   # Exécution passée recalculée par un backfill (NULL sinon)
+    'inputs_released': 'INTEGER DEFAULT 0',  # 1 : références aux fichiers d'entrée rendues (INPUT_RUN_RETENTION_DAYS)
+}
+
+def _add_missing_columns(cursor, table, columns):
+    """Ajoute à une table existante les colonnes qui lui manquent."""
+    existing = {row[1] for row in cursor.execute(f"PRAGMA table_info({table})").fetchall()}
+    for column, declaration in columns.items():
+        if column not in existing:
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {declaration}")
+
 def _initialize_schema_if_needed(db):
     """
     Vérifie et crée les tables nécessaires sans détruire les données existantes.
@@ -37,9 +63,161 @@ def _initialize_schema_if_needed(db):
         );
     """)
 
+    # 3. Table 'analysis_runs' (historique des exécutions)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS analysis_runs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            control_id INTEGER NOT NULL,
+            control_name TEXT NOT NULL,
+            week_label TEXT NOT NULL,
+            username TEXT NOT NULL,
+            executed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            results_json TEXT NOT NULL,
+            files_info TEXT,
+            FOREIGN KEY (control_id) REFERENCES controls(id) ON DELETE CASCADE
+        );
+    """)
+    _add_missing_columns(cursor, 'analysis_runs', ANALYSIS_RUNS_EXTRA_COLUMNS)
+
+    # 4. Table 'result_cache' (mémoïsation des résultats par hash du script et des entrées)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS result_cache (
+            cache_key TEXT PRIMARY KEY,
+            control_id INTEGER,
+            results_json TEXT NOT NULL,
+            size_bytes INTEGER NOT NULL,
+            run_uid TEXT,
+            artifacts_json TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            last_used_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            hit_count INTEGER DEFAULT 0
+        );
+    """)
+
+    # 5. Table 'drop_folder_files' (fichiers des dossiers de dépôt déjà traités par le planificateur)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS drop_folder_files (
+            signature TEXT PRIMARY KEY,
+            control_id INTEGER,
+            files_json TEXT,
+            job_id TEXT,
+            processed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+    """)
+
+    # 6. Tables 'job_queue' et 'job_events' (jobs exécutés par les processus run_worker.py)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS job_queue (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            job_id TEXT UNIQUE NOT NULL,
+            control_id INTEGER NOT NULL,
+            control_name TEXT NOT NULL,
+            script_filename TEXT NOT NULL,
+            inputs_json TEXT NOT NULL,
+            files_info TEXT,
+            input_hashes_json TEXT,
+            username TEXT NOT NULL,
+            week_label TEXT,
+            priority TEXT NOT NULL,
+            priority_rank INTEGER NOT NULL,
+            campaign_id TEXT,
+            source_run_id INTEGER,
+            profile_json TEXT,
+            state TEXT NOT NULL,
+            attempts INTEGER DEFAULT 0,
+            worker_id TEXT,
+            lease_expires_at REAL,
+            cancel_requested INTEGER DEFAULT 0,
+            submitted_at TEXT NOT NULL,
+            started_at TEXT,
+            finished_at TEXT,
+            run_id INTEGER,
+            run_uid TEXT,
+            artifacts_json TEXT,
+            cache_hit INTEGER DEFAULT 0,
+            error TEXT
+        );
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_job_queue_state ON job_queue (state, priority_rank, seq)")
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS job_events (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            job_id TEXT NOT NULL,
+            type TEXT NOT NULL,
+            stage TEXT,
+            fraction REAL,
+            message TEXT,
+            elapsed_seconds REAL
+        );
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_job_events_job ON job_events (job_id, id)")
+
+    # 7. Table 'staged_inputs' (fichiers envoyés dès leur sélection dans le client, avant le lancement)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS staged_inputs (
+            upload_id TEXT PRIMARY KEY,
+            control_id INTEGER NOT NULL,
+            input_key TEXT NOT NULL,
+            username TEXT NOT NULL,
+            original_name TEXT NOT NULL,
+            saved_name TEXT NOT NULL,
+            sha256 TEXT NOT NULL,
+            size_bytes INTEGER NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            used_at TIMESTAMP,
+            parse_state TEXT NOT NULL,
+            parse_error TEXT,
+            parsed_rows INTEGER,
+            parse_seconds REAL
+        );
+    """)
+
+    # 8. Table 'input_blobs' (références aux fichiers d'entrée rangés par contenu, voir input_store)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS input_blobs (
+            saved_name TEXT PRIMARY KEY,
+            sha256 TEXT NOT NULL,
+            size_bytes INTEGER,
+            ref_count INTEGER NOT NULL DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            last_used_at TIMESTAMP
+        );
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_input_blobs_sha256 ON input_blobs (sha256)")
+
+    # 9. Tables 'upload_sessions' et 'upload_chunks' (envois par morceaux reprenables, voir chunked_upload)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS upload_sessions (
+            session_id TEXT PRIMARY KEY,
+            username TEXT NOT NULL,
+            filename TEXT NOT NULL,
+            size_bytes INTEGER NOT NULL,
+            chunk_size INTEGER NOT NULL,
+            chunk_count INTEGER NOT NULL,
+            sha256 TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP,
+            completed_at TIMESTAMP,
+            stored_sha256 TEXT,
+            encoding TEXT,
+            stored_size_bytes INTEGER
+        );
+    """)
+    _add_missing_columns(cursor, 'upload_sessions', {'encoding': 'TEXT', 'stored_size_bytes': 'INTEGER'})
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS upload_chunks (
+            session_id TEXT NOT NULL,
+            chunk_index INTEGER NOT NULL,
+            sha256 TEXT NOT NULL,
+            size_bytes INTEGER NOT NULL,
+            received_at TIMESTAMP,
+            PRIMARY KEY (session_id, chunk_index)
+        );
+    """)
+
     # La table ActionLogs n'est plus créée ici
 
-    # 4. Vérifier si 'superadmin' doit être créé
+    # 10. Vérifier si 'superadmin' doit être créé
     cursor.execute("SELECT id FROM users WHERE username = 'superadmin'")
     if not cursor.fetchone():
         click.echo("Superadmin not found. Creating initial superadmin...")
@@ -2,6 +2,15 @@
 
 DROP TABLE IF EXISTS users;
 DROP TABLE IF EXISTS controls;
+DROP TABLE IF EXISTS analysis_runs;
+DROP TABLE IF EXISTS result_cache;
+DROP TABLE IF EXISTS drop_folder_files;
+DROP TABLE IF EXISTS job_queue;
+DROP TABLE IF EXISTS job_events;
+DROP TABLE IF EXISTS staged_inputs;
+DROP TABLE IF EXISTS input_blobs;
+DROP TABLE IF EXISTS upload_sessions;
+DROP TABLE IF EXISTS upload_chunks;
 
 CREATE TABLE users (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -35,5 +44,139 @@ CREATE TABLE analysis_runs (
     executed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     results_json TEXT NOT NULL,         -- Résultats de l'analyse au format JSON
     files_info TEXT,                    -- Information sur les fichiers utilisés (noms, etc.)
+    run_uid TEXT,                       -- Dossier de sortie propre à l'exécution (outputs/runs/<run_uid>)
+    artifacts_json TEXT,                -- Manifeste des fichiers produits (taille, hash, durée d'écriture)
+    profile_json TEXT,                  -- Décomposition des durées (serveur, worker, étapes du script)
+    cache_hit INTEGER DEFAULT 0,        -- 1 si le résultat a été repris du cache (pas de mesures d'exécution)
+    script_sha256 TEXT,                 -- Version du script exécutée
+    peak_rss_mb REAL,                   -- Pic de mémoire du worker pendant l'exécution
+    cpu_user_seconds REAL,
+    cpu_system_seconds REAL,
+    duration_seconds REAL,              -- Durée de l'exécution dans le worker
+    input_bytes INTEGER,                -- Taille totale des fichiers d'entrée
+    results_bytes INTEGER,              -- Taille des résultats sérialisés (JSON)
+    campaign_id TEXT,                   -- Campagne (plusieurs contrôles lancés sur les mêmes fichiers)
+    source_run_id INTEGER,              -- Exécution passée dont celle-ci recalcule les résultats (backfill)
+    inputs_released INTEGER DEFAULT 0,  -- 1 : références aux fichiers d'entrée rendues (INPUT_RUN_RETENTION_DAYS)
     FOREIGN KEY (control_id) REFERENCES controls(id) ON DELETE CASCADE
 );
+
+-- Cache des résultats d'analyse (clé : hash du script + hash des entrées + paramètres)
+CREATE TABLE result_cache (
+    cache_key TEXT PRIMARY KEY,
+    control_id INTEGER,
+    results_json TEXT NOT NULL,
+    size_bytes INTEGER NOT NULL,
+    run_uid TEXT,                       -- Exécution d'origine (ses fichiers produits restent servis)
+    artifacts_json TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    last_used_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    hit_count INTEGER DEFAULT 0
+);
+
+-- Fichiers des dossiers de dépôt déjà traités (une signature par contrôle et jeu de fichiers)
+CREATE TABLE drop_folder_files (
+    signature TEXT PRIMARY KEY,
+    control_id INTEGER,
+    files_json TEXT,                    -- Fichiers utilisés : clé, chemin, taille, date de modification
+    job_id TEXT,
+    processed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- File des jobs exécutés par les processus run_worker.py (JOB_EXECUTION_MODE = 'queue')
+CREATE TABLE job_queue (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,  -- Ordre d'arrivée
+    job_id TEXT UNIQUE NOT NULL,
+    control_id INTEGER NOT NULL,
+    control_name TEXT NOT NULL,
+    script_filename TEXT NOT NULL,
+    inputs_json TEXT NOT NULL,              -- {clé d'entrée: chemin relatif à INPUTS_DIR}
+    files_info TEXT,
+    input_hashes_json TEXT,
+    username TEXT NOT NULL,
+    week_label TEXT,
+    priority TEXT NOT NULL,
+    priority_rank INTEGER NOT NULL,
+    campaign_id TEXT,
+    source_run_id INTEGER,
+    profile_json TEXT,                      -- Durées mesurées par le serveur avant la mise en file
+    state TEXT NOT NULL,                    -- queued, running, done, failed, cancelled
+    attempts INTEGER DEFAULT 0,
+    worker_id TEXT,
+    lease_expires_at REAL,                  -- Horodatage (epoch) au-delà duquel le job est remis en file
+    cancel_requested INTEGER DEFAULT 0,
+    submitted_at TEXT NOT NULL,
+    started_at TEXT,
+    finished_at TEXT,
+    run_id INTEGER,                         -- Exécution enregistrée dans analysis_runs
+    run_uid TEXT,
+    artifacts_json TEXT,
+    cache_hit INTEGER DEFAULT 0,
+    error TEXT
+);
+CREATE INDEX idx_job_queue_state ON job_queue (state, priority_rank, seq);
+
+-- Événements d'avancement émis par les scripts exécutés dans les workers
+CREATE TABLE job_events (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    job_id TEXT NOT NULL,
+    type TEXT NOT NULL,
+    stage TEXT,
+    fraction REAL,
+    message TEXT,
+    elapsed_seconds REAL
+);
+CREATE INDEX idx_job_events_job ON job_events (job_id, id);
+
+-- Fichiers envoyés dès leur sélection dans le client, puis référencés au lancement de l'analyse
+CREATE TABLE staged_inputs (
+    upload_id TEXT PRIMARY KEY,
+    control_id INTEGER NOT NULL,
+    input_key TEXT NOT NULL,
+    username TEXT NOT NULL,
+    original_name TEXT NOT NULL,
+    saved_name TEXT NOT NULL,               -- Fichier dans INPUTS_DIR (blobs/.. : stockage par contenu)
+    sha256 TEXT NOT NULL,
+    size_bytes INTEGER NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    used_at TIMESTAMP,                      -- Dernière analyse lancée avec ce fichier (NULL : jamais utilisé)
+    parse_state TEXT NOT NULL,              -- pending, ready, failed, skipped
+    parse_error TEXT,
+    parsed_rows INTEGER,
+    parse_seconds REAL
+);
+
+CREATE TABLE input_blobs (
+    saved_name TEXT PRIMARY KEY,            -- blobs/<2 caractères>/<sha256><extension>, relatif à INPUTS_DIR
+    sha256 TEXT NOT NULL,
+    size_bytes INTEGER,
+    ref_count INTEGER NOT NULL DEFAULT 0,   -- Exécutions enregistrées et fichiers envoyés à l'avance qui utilisent ce contenu
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    last_used_at TIMESTAMP
+);
+CREATE INDEX idx_input_blobs_sha256 ON input_blobs (sha256);
+
+CREATE TABLE upload_sessions (
+    session_id TEXT PRIMARY KEY,
+    username TEXT NOT NULL,
+    filename TEXT NOT NULL,
+    size_bytes INTEGER NOT NULL,
+    chunk_size INTEGER NOT NULL,
+    chunk_count INTEGER NOT NULL,
+    sha256 TEXT,                            -- SHA-256 annoncé par le client, vérifié à la fin de l'envoi
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP,                   -- Dernier morceau reçu (expiration après UPLOAD_SESSION_TTL_SECONDS)
+    completed_at TIMESTAMP,
+    stored_sha256 TEXT,                     -- Contenu rangé dans le stockage des entrées
+    encoding TEXT,                          -- 'gzip' ou 'zstd' si le fichier est envoyé compressé (décompressé à la fin)
+    stored_size_bytes INTEGER               -- Taille du contenu rangé (décompressé)
+);
+
+CREATE TABLE upload_chunks (
+    session_id TEXT NOT NULL,
+    chunk_index INTEGER NOT NULL,
+    sha256 TEXT NOT NULL,
+    size_bytes INTEGER NOT NULL,
+    received_at TIMESTAMP,
+    PRIMARY KEY (session_id, chunk_index)
+);
@@ -2,6 +2,10 @@
 
 from .app import create_app
 from waitress import serve
+from .services.warmup import server_warmup
+from .services.drop_folder_watcher import drop_folder_watcher
+from .services.job_service import EXECUTION_MODE_QUEUE
+from . import config
 import socket
 
 # Crée l'application Flask
@@ -31,6 +35,18 @@ if __name__ == '__main__':
     print(f" -> URL complète pour le client : http://{local_ip}:{port}/api")
     print("===================================================")
     print("Pour arrêter le serveur, appuyez sur CTRL+C.")
+
+    # Préchauffage en arrière-plan (bibliothèques, vérification des scripts, workers) :
+    # /api/health/ready répond 503 jusqu'à ce qu'il soit terminé.
+    # En mode 'queue', les jobs sont exécutés par les processus run_worker.py (qui se préchauffent
+    # eux-mêmes) : le pool ne sert qu'aux exécutions synchrones et démarre à la première.
+    start_workers = config.JOB_EXECUTION_MODE != EXECUTION_MODE_QUEUE
+    if not start_workers:
+        print(" Mode file partagée : lancez les workers avec 'python -m hyper_framework_server.run_worker'.")
+    server_warmup.start(app, start_workers=start_workers)
+
+    # Surveillance des dossiers de dépôt (sans effet si DROP_FOLDERS est vide)
+    drop_folder_watcher.start(app)
     
     # Utilisation de Waitress pour un environnement de production léger
-    serve(app, host=host, port=port)
\ No newline at end of file
+    serve(app, host=host, port=port, threads=config.SERVER_THREADS)
\ No newline at end of file
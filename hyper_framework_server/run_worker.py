@@ -0,0 +1,41 @@
+#---> NOUVEAU FICHIER : hyper_framework_server/run_worker.py
+
+import argparse
+import os
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Worker Hyper-Framework : exécute les jobs de la file du serveur (JOB_EXECUTION_MODE = 'queue').")
+    parser.add_argument('--concurrency', type=int, default=None,
+                        help="Jobs exécutés simultanément (défaut : SCRIPT_WORKER_POOL_SIZE).")
+    parser.add_argument('--worker-id', default=None, help="Identifiant du worker (défaut : machine-pid).")
+    parser.add_argument('--data-dir', default=None,
+                        help="Dossier data du serveur, s'il n'est pas au même emplacement sur cette machine (partage réseau).")
+    return parser.parse_args()
+
+if __name__ == '__main__':
+    args = parse_args()
+    if args.data_dir:
+        # Avant tout import de config : tous les chemins de data/ (base, scripts, entrées, sorties,
+        # journaux, cache) en dérivent, y compris dans les processus du pool qui héritent de l'environnement.
+        os.environ['HYPER_FRAMEWORK_DATA_DIR'] = os.path.abspath(args.data_dir)
+
+    from .app import create_app
+    from .services.queue_worker import QueueWorker
+
+    app = create_app()
+
+    worker = QueueWorker(app, worker_id=args.worker_id, concurrency=args.concurrency)
+    print("===================================================")
+    print("     Démarrage d'un Worker Hyper-Framework")
+    print("===================================================")
+    print(f" Identifiant : {worker.worker_id}")
+    print(f" Jobs simultanés : {worker.concurrency}")
+    print(f" Base de données : {app.config['DB_FILE']}")
+    print(f" Cache : {app.config['CACHE_DIR']}")
+    print("Pour arrêter le worker, appuyez sur CTRL+C.")
+
+    try:
+        worker.run()
+    except KeyboardInterrupt:
+        # run() a déjà rendu les jobs en cours à la file et attendu leur interruption
+        print("Worker arrêté.")
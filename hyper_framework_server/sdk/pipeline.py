@@ -0,0 +1,362 @@
+#---> NOUVEAU FICHIER : hyper_framework_server/sdk/pipeline.py
+
+"""
+API optionnelle de pipeline pour les scripts de contrôle.
+
+Au lieu d'une fonction run(), un script peut déclarer des étapes et leurs dépendances :
+
+    from hyper_framework_server.sdk.pipeline import Pipeline
+
+    pipeline = Pipeline()
+
+    @pipeline.stage()
+    def ad(ad_file):                      # 'ad_file' est une clé d'entrée du contrôle -> chemin du fichier
+        return pd.read_csv(ad_file)
+
+    @pipeline.stage()
+    def crowdstrike(cs_file):
+        return pd.read_csv(cs_file)
+
+    @pipeline.section()
+    def comparaison(ad, crowdstrike):     # 'ad' et 'crowdstrike' sont des étapes -> leurs sorties
+        return {'title': 'Comparaison', 'dataframe': ad.merge(crowdstrike, on='hostname')}
+
+Les paramètres d'une étape sont résolus par leur nom : une autre étape (sa sortie), une clé
+d'entrée (le chemin du fichier), 'input_file_paths' (toutes les entrées) ou 'output_dir_path'.
+Les étapes indépendantes s'exécutent en parallèle. La sortie de chaque étape est mise en cache
+sous une clé calculée à partir de son code, du contenu des fichiers qu'elle lit et des clés de
+ses dépendances : seules les étapes en aval d'une entrée ou d'une étape modifiée sont réexécutées.
+Les résultats du contrôle sont les sorties des sections, dans leur ordre de déclaration.
+Le début et la fin de chaque étape sont signalés automatiquement via sdk.progress,
+et chaque étape est mesurée via sdk.profiling (durée, lignes en entrée et en sortie).
+"""
+
+import ast
+import hashlib
+import inspect
+import os
+import pickle
+import tempfile
+import threading
+import types
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from .. import config
+from ..services.file_utils import file_sha256
+from .profiling import count_rows, profile_stage
+from .progress import progress
+
+# Paramètres d'étape fournis par le moteur plutôt que par une autre étape
+RESERVED_PARAMETERS = ('input_file_paths', 'output_dir_path')
+
+
+class PipelineError(Exception):
+    """Erreur de déclaration d'un pipeline (dépendance inconnue, cycle, nom en double...)."""
+    pass
+
+
+class Stage:
+    """Une étape déclarée : une fonction, ses paramètres et ses options de cache."""
+
+    def __init__(self, name, func, is_section=False, cache=True):
+        self.name = name
+        self.func = func
+        self.is_section = is_section
+        self.parameters = list(inspect.signature(func).parameters)
+        # Une étape qui écrit dans le dossier de sortie a un effet de bord que le cache ne rejouerait pas
+        self.cache = cache and 'output_dir_path' not in self.parameters
+
+
+class StageCache:
+    """
+    Sorties d'étapes sérialisées (pickle) sur disque, un fichier par clé.
+    Au-delà de PIPELINE_CACHE_MAX_BYTES, les fichiers les moins récemment utilisés sont supprimés.
+    Une sortie qui contient des objets d'une classe définie dans le script n'est pas mise en cache :
+    le module du script change de nom à chaque version du fichier, elle ne pourrait plus être relue.
+    """
+
+    def __init__(self, cache_dir=None, max_bytes=None):
+        self.cache_dir = cache_dir or config.PIPELINE_CACHE_DIR
+        self.max_bytes = max_bytes if max_bytes is not None else config.PIPELINE_CACHE_MAX_BYTES
+        self._lock = threading.Lock()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.pkl")
+
+    def get(self, key):
+        """Retourne (True, sortie) si la clé est en cache, sinon (False, None)."""
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                value = pickle.load(f)
+        except FileNotFoundError:
+            return False, None
+        except Exception:
+            # Entrée illisible (fichier tronqué, classe ou module disparu...) : l'étape est réexécutée
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return False, None
+        try:
+            os.utime(path)  # Marque l'entrée comme récemment utilisée
+        except OSError:
+            pass
+        return True, value
+
+    def put(self, key, value, script_module=None):
+        """Enregistre la sortie d'une étape. script_module : nom du module du script qui l'a produite."""
+        try:
+            payload = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception:
+            return  # Sortie non sérialisable : l'étape sera simplement réexécutée
+        if len(payload) > self.max_bytes:
+            return
+        if script_module and script_module.encode('utf-8') in payload:
+            return  # Référence une classe du script (voir la documentation de la classe)
+        os.makedirs(self.cache_dir, exist_ok=True)
+        # Écriture atomique : un autre worker ne lit jamais un fichier partiellement écrit
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(payload)
+        os.replace(tmp_path, self._path(key))
+        self._evict()
+
+    def _evict(self):
+        with self._lock:
+            entries = []
+            for entry in os.scandir(self.cache_dir):
+                if entry.name.endswith('.pkl'):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                    total -= size
+                except OSError:
+                    pass
+
+
+def _iter_code_objects(code):
+    yield code
+    for const in code.co_consts:
+        if isinstance(const, types.CodeType):
+            yield from _iter_code_objects(const)
+
+
+def _module_preamble_digest(script_path):
+    """
+    Hash des instructions de niveau module d'un script hors fonctions (imports, constantes, classes),
+    sans tenir compte des numéros de ligne : modifier une constante invalide toutes les étapes.
+    """
+    digest = hashlib.sha256()
+    try:
+        with open(script_path, 'r', encoding='utf-8') as f:
+            tree = ast.parse(f.read())
+    except (OSError, SyntaxError, ValueError, TypeError):
+        return None
+    for node in tree.body:
+        if not isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            digest.update(ast.dump(node).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def _function_fingerprint(func, digest, seen):
+    """
+    Ajoute au hash le code d'une fonction (sans ses numéros de ligne), puis celui des fonctions
+    du script auxquelles elle fait référence, récursivement.
+    Modifier un utilitaire partagé invalide ainsi toutes les étapes qui l'utilisent.
+    """
+    if func in seen:
+        return
+    seen.add(func)
+    module_globals = func.__globals__
+    for code in _iter_code_objects(func.__code__):
+        digest.update(code.co_code)
+        digest.update(repr(code.co_names).encode('utf-8'))
+        digest.update(repr([c for c in code.co_consts if not isinstance(c, types.CodeType)]).encode('utf-8'))
+        for name in code.co_names:
+            value = module_globals.get(name)
+            if isinstance(value, types.FunctionType) and value.__module__ == func.__module__:
+                _function_fingerprint(value, digest, seen)
+
+
+class Pipeline:
+    """Graphe d'étapes d'un script de contrôle. Voir la documentation du module."""
+
+    def __init__(self, max_workers=None, cache=True):
+        self.max_workers = max_workers
+        self.cache_enabled = cache
+        self._stages = {}
+        self._preamble_digest = None
+
+    def stage(self, name=None, cache=True):
+        """Décorateur déclarant une étape intermédiaire (chargement, enrichissement...)."""
+        return self._register(name, cache, is_section=False)
+
+    def section(self, name=None, cache=True):
+        """Décorateur déclarant une section de résultats : un dict (ou une liste de dicts) par section."""
+        return self._register(name, cache, is_section=True)
+
+    def _register(self, name, cache, is_section):
+        def decorator(func):
+            stage_name = name or func.__name__
+            if stage_name in self._stages:
+                raise PipelineError(f"L'étape '{stage_name}' est déclarée deux fois.")
+            if stage_name in RESERVED_PARAMETERS:
+                raise PipelineError(f"'{stage_name}' est un nom réservé.")
+            if self._preamble_digest is None:
+                # Calculé pendant le chargement du script, donc sur la version du fichier en cours d'exécution
+                self._preamble_digest = _module_preamble_digest(func.__globals__.get('__file__')) or ''
+            self._stages[stage_name] = Stage(stage_name, func, is_section, cache)
+            return func
+        return decorator
+
+    def _dependencies(self, stage, input_file_paths):
+        """Étapes dont dépend une étape. Lève PipelineError pour un paramètre qui ne correspond à rien."""
+        dependencies = []
+        for param in stage.parameters:
+            if param in self._stages:
+                dependencies.append(param)
+            elif param not in input_file_paths and param not in RESERVED_PARAMETERS:
+                raise PipelineError(
+                    f"Le paramètre '{param}' de l'étape '{stage.name}' ne correspond ni à une étape ni à une entrée du contrôle."
+                )
+        return dependencies
+
+    def _topological_order(self, dependencies):
+        order, state = [], {}
+
+        def visit(name, path):
+            if state.get(name) == 'done':
+                return
+            if state.get(name) == 'visiting':
+                raise PipelineError(f"Dépendance circulaire entre les étapes : {' -> '.join(path + [name])}")
+            state[name] = 'visiting'
+            for dependency in dependencies[name]:
+                visit(dependency, path + [name])
+            state[name] = 'done'
+            order.append(name)
+
+        for name in self._stages:
+            visit(name, [])
+        return order
+
+    def run(self, input_file_paths, output_dir_path, stage_cache=None, input_hashes=None):
+        """
+        Exécute le graphe et retourne la liste des résultats des sections.
+        input_hashes ({clé d'entrée: sha256}, calculés par le serveur à la réception) évite de relire les fichiers.
+        """
+        if not any(stage.is_section for stage in self._stages.values()):
+            raise PipelineError("Le pipeline ne déclare aucune section de résultats.")
+        dependencies = {name: self._dependencies(stage, input_file_paths) for name, stage in self._stages.items()}
+        order = self._topological_order(dependencies)
+        if stage_cache is None and self.cache_enabled:
+            stage_cache = StageCache()
+
+        input_hashes = {key: sha256 for key, sha256 in (input_hashes or {}).items() if key in input_file_paths}
+        input_hash_locks = {key: threading.Lock() for key in input_file_paths}
+
+        def input_hash(key):
+            # Un verrou par entrée : les étapes de chargement parallèles hachent leurs fichiers en même temps
+            with input_hash_locks[key]:
+                if key not in input_hashes:
+                    input_hashes[key] = file_sha256(input_file_paths[key])
+                return input_hashes[key]
+
+        outputs, keys = {}, {}
+        completed = []
+        completed_lock = threading.Lock()
+
+        def report(name, message):
+            with completed_lock:
+                fraction = len(completed) / len(order)
+            progress(name, fraction, message)
+
+        def stage_key(stage):
+            digest = hashlib.sha256(f"{self._preamble_digest}:{stage.name}".encode('utf-8'))
+            _function_fingerprint(stage.func, digest, set())
+            for param in stage.parameters:
+                if param in self._stages:
+                    digest.update(f"stage:{param}={keys[param]}".encode('utf-8'))
+                elif param == 'input_file_paths':
+                    for key in sorted(input_file_paths):
+                        digest.update(f"input:{key}={input_hash(key)}".encode('utf-8'))
+                elif param in input_file_paths:
+                    digest.update(f"input:{param}={input_hash(param)}".encode('utf-8'))
+            return digest.hexdigest()
+
+        def run_stage(name):
+            stage = self._stages[name]
+            key = stage_key(stage)
+            keys[name] = key
+            use_cache = stage_cache is not None and stage.cache
+            report(name, "Étape démarrée")
+            rows_in = count_rows([outputs[param] for param in stage.parameters if param in self._stages])
+            with profile_stage(name, rows_in=rows_in) as measure:
+                if use_cache:
+                    found, value = stage_cache.get(key)
+                    if found:
+                        measure.cached = True
+                        measure.rows_out = count_rows(value)
+                        with completed_lock:
+                            completed.append(name)
+                        report(name, "Étape reprise du cache")
+                        return value
+                kwargs = {}
+                for param in stage.parameters:
+                    if param in self._stages:
+                        kwargs[param] = outputs[param]
+                    elif param == 'input_file_paths':
+                        kwargs[param] = dict(input_file_paths)
+                    elif param == 'output_dir_path':
+                        kwargs[param] = output_dir_path
+                    else:
+                        kwargs[param] = input_file_paths[param]
+                value = stage.func(**kwargs)
+                measure.rows_out = count_rows(value)
+            if use_cache:
+                stage_cache.put(key, value, stage.func.__module__)
+            with completed_lock:
+                completed.append(name)
+            report(name, "Étape terminée")
+            return value
+
+        max_workers = self.max_workers or config.PIPELINE_MAX_THREADS
+        pending = list(order)
+        with ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix='pipeline-stage') as executor:
+            running = {}
+            while pending or running:
+                # Lance toutes les étapes dont les dépendances sont terminées
+                for name in list(pending):
+                    if all(dependency in outputs for dependency in dependencies[name]):
+                        pending.remove(name)
+                        running[executor.submit(run_stage, name)] = name
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    try:
+                        outputs[name] = future.result()
+                    except Exception:
+                        # Les étapes déjà lancées se terminent, aucune nouvelle n'est démarrée
+                        for other in running:
+                            other.cancel()
+                        raise
+
+        results = []
+        for name, stage in self._stages.items():
+            if stage.is_section:
+                output = outputs[name]
+                results.extend(output if isinstance(output, list) else [output])
+        return results
+
+
+def find_pipeline(module):
+    """Retourne le Pipeline déclaré au niveau module d'un script, ou None."""
+    pipelines = [value for value in vars(module).values() if isinstance(value, Pipeline)]
+    if len(pipelines) > 1:
+        raise PipelineError("Un script ne peut déclarer qu'un seul Pipeline.")
+    return pipelines[0] if pipelines else None
@@ -0,0 +1,89 @@
+#---> NOUVEAU FICHIER : hyper_framework_server/sdk/profiling.py
+
+"""
+Mesure du temps passé dans les étapes d'un script de contrôle.
+
+    from hyper_framework_server.sdk.profiling import profile_stage
+
+    with profile_stage("Fusion AD / CrowdStrike", rows_in=len(ad)) as stage:
+        merged = ad.merge(crowdstrike, on='hostname')
+        stage.rows_out = len(merged)
+
+Les mesures sont renvoyées au serveur avec les résultats et enregistrées avec l'exécution
+(voir GET /api/analysis-runs/<id>/profile). Les étapes d'un Pipeline sont mesurées automatiquement.
+Hors d'un worker, profile_stage() mesure quand même mais rien n'est collecté.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+
+_collector = None
+_collector_lock = threading.Lock()
+
+
+class StageProfile:
+    """Mesure d'une étape : durée, lignes en entrée et en sortie (renseignées par le script si connues)."""
+
+    def __init__(self, name, rows_in=None):
+        self.name = name
+        self.rows_in = rows_in
+        self.rows_out = None
+        self.cached = False
+        self.seconds = None
+
+    def to_dict(self):
+        return {
+            'stage': self.name,
+            'seconds': self.seconds,
+            'rows_in': self.rows_in,
+            'rows_out': self.rows_out,
+            'cached': self.cached,
+        }
+
+
+def start_collection():
+    """Commence à collecter les mesures d'une exécution. Réservé au moteur."""
+    global _collector
+    with _collector_lock:
+        _collector = []
+
+
+def stop_collection():
+    """Arrête la collecte et retourne les mesures de l'exécution (liste de dicts). Réservé au moteur."""
+    global _collector
+    with _collector_lock:
+        stages, _collector = _collector or [], None
+    return [stage.to_dict() for stage in stages]
+
+
+def count_rows(value):
+    """Nombre de lignes d'une sortie d'étape : DataFrame, section de résultats ou liste de sections. None si inconnu."""
+    if isinstance(value, list):
+        counts = [count_rows(item) for item in value]
+        known = [count for count in counts if count is not None]
+        return sum(known) if known else None
+    if isinstance(value, dict):
+        if 'dataframe' in value:
+            return count_rows(value['dataframe'])
+        if isinstance(value.get('items'), list):
+            return len(value['items'])
+        return None
+    # DataFrame ou Series (sans importer pandas ici)
+    if hasattr(value, 'shape') and hasattr(value, '__len__'):
+        return len(value)
+    return None
+
+
+@contextmanager
+def profile_stage(name, rows_in=None):
+    """Mesure la durée du bloc. L'objet retourné permet de renseigner rows_in et rows_out."""
+    stage = StageProfile(name, rows_in)
+    started = time.perf_counter()
+    try:
+        yield stage
+    finally:
+        stage.seconds = round(time.perf_counter() - started, 4)
+        with _collector_lock:
+            if _collector is not None:
+                _collector.append(stage)
@@ -0,0 +1,51 @@
+#---> NOUVEAU FICHIER : hyper_framework_server/sdk/progress.py
+
+"""
+Signalement de l'avancement d'un script de contrôle.
+
+    from hyper_framework_server.sdk.progress import progress
+
+    progress("Chargement AD", 0.1, "Lecture du fichier")
+    ...
+    progress("Comparaison", 0.6, "Croisement AD / CrowdStrike")
+
+Dans un worker, chaque appel est transmis au serveur, qui le relaie au client avec ses propres
+horodatages. Hors d'un worker (script lancé à la main), l'appel n'a aucun effet.
+"""
+
+import threading
+import time
+
+_reporter = None
+_reporter_lock = threading.Lock()
+
+
+def set_reporter(reporter):
+    """Installe (ou retire, avec None) la fonction qui reçoit les événements. Réservé au moteur."""
+    global _reporter
+    with _reporter_lock:
+        _reporter = reporter
+
+
+def progress(stage, fraction=None, message=None):
+    """
+    Signale l'étape en cours et l'avancement global de l'exécution : fraction est comprise
+    entre 0 et 1 (None si inconnue). La durée d'une étape va de son premier à son dernier
+    événement. Utilisable depuis plusieurs threads (étapes d'un Pipeline exécutées en parallèle).
+    """
+    if fraction is not None:
+        fraction = min(1.0, max(0.0, float(fraction)))
+    event = {
+        'stage': str(stage),
+        'fraction': fraction,
+        'message': message,
+        'timestamp': time.time(),
+    }
+    with _reporter_lock:
+        if _reporter is None:
+            return
+        try:
+            _reporter(event)
+        except Exception:
+            # L'avancement ne doit jamais faire échouer l'analyse
+            pass
@@ -0,0 +1,173 @@
+#---> NOUVEAU FICHIER : hyper_framework_server/sdk/tables.py
+
+"""
+Chargement des fichiers d'entrée tabulaires (CSV, TXT, Excel) par les scripts de contrôle.
+
+    from hyper_framework_server.sdk.tables import load_table
+
+    ad = load_table(input_file_paths['ad_users'], sep=';', header=None, names=AD_HEADERS)
+
+Les options sont celles de pandas.read_csv (ou read_excel). Sans encoding ni sep, l'encodage et le
+séparateur sont détectés. Quand le fichier a été envoyé dès sa sélection dans le client, le serveur
+l'a déjà lu avec les options déclarées pour l'entrée ("read_options" dans __hyper_inputs__) et en a
+gardé une version Parquet : load_table appelé avec les mêmes options lit directement cette version.
+Sinon, le fichier est simplement lu.
+"""
+
+import codecs
+import csv
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+
+import pandas as pd
+import pyarrow.parquet as pq
+
+from .. import config
+from ..services.file_utils import file_sha256
+
+TEXT_EXTENSIONS = ('.csv', '.txt', '.tsv')
+EXCEL_EXTENSIONS = ('.xlsx', '.xlsm', '.xls')
+
+# Séparateurs reconnus par la détection automatique
+CANDIDATE_SEPARATORS = ',;\t|'
+# Octets lus pour détecter l'encodage et le séparateur
+DETECTION_SAMPLE_BYTES = 1024 * 1024
+
+_hash_memo = {}     # (chemin, taille, date de modification) -> sha256
+_hash_memo_lock = threading.Lock()
+_eviction_lock = threading.Lock()
+
+
+def is_tabular(path):
+    return path.lower().endswith(TEXT_EXTENSIONS + EXCEL_EXTENSIONS)
+
+
+def detect_encoding(path):
+    """Encodage d'un fichier texte : marque d'ordre des octets si présente, sinon chardet sur le début du fichier."""
+    with open(path, 'rb') as f:
+        sample = f.read(DETECTION_SAMPLE_BYTES)
+    for bom, encoding in ((codecs.BOM_UTF8, 'utf-8-sig'), (codecs.BOM_UTF16_LE, 'utf-16'), (codecs.BOM_UTF16_BE, 'utf-16')):
+        if sample.startswith(bom):
+            return encoding
+    try:
+        sample.decode('utf-8')
+        return 'utf-8'
+    except UnicodeDecodeError as e:
+        if len(sample) == DETECTION_SAMPLE_BYTES and e.start >= len(sample) - 4:
+            return 'utf-8'  # Caractère multi-octets coupé par la fin de l'échantillon
+    import chardet
+    return chardet.detect(sample)['encoding'] or 'latin-1'
+
+
+def detect_separator(path, encoding):
+    """Séparateur de colonnes d'un fichier texte (virgule par défaut si la détection échoue)."""
+    with open(path, 'r', encoding=encoding, errors='replace', newline='') as f:
+        sample = f.read(64 * 1024)
+    try:
+        return csv.Sniffer().sniff(sample, delimiters=CANDIDATE_SEPARATORS).delimiter
+    except csv.Error:
+        return ','
+
+
+def parse_table(path, **options):
+    """Lit un fichier tabulaire en DataFrame, en détectant l'encodage et le séparateur s'ils ne sont pas fournis."""
+    if path.lower().endswith(EXCEL_EXTENSIONS):
+        return pd.read_excel(path, **options)
+    options = dict(options)
+    if not options.get('encoding'):
+        options['encoding'] = detect_encoding(path)
+    if not options.get('sep') and not options.get('delimiter'):
+        options['sep'] = detect_separator(path, options['encoding'])
+    options.setdefault('low_memory', False)
+    return pd.read_csv(path, **options)
+
+
+def options_digest(options):
+    return hashlib.sha256(json.dumps(options or {}, sort_keys=True, default=str).encode('utf-8')).hexdigest()[:16]
+
+
+def parsed_table_path(content_sha256, options=None, parsed_dir=None):
+    """Emplacement de la version Parquet d'un contenu de fichier lu avec ces options."""
+    return os.path.join(parsed_dir or config.PARSED_INPUTS_DIR, f"{content_sha256}_{options_digest(options)}.parquet")
+
+
+def preparse_table(source_path, content_sha256, options=None, parsed_dir=None):
+    """
+    Lit un fichier d'entrée et en écrit la version Parquet (appelé par le serveur dès l'envoi du fichier).
+    Retourne {'rows', 'columns', 'seconds'}. Lève une exception si le fichier ne peut pas être lu ou converti.
+    """
+    started = time.perf_counter()
+    parsed_dir = parsed_dir or config.PARSED_INPUTS_DIR
+    target = parsed_table_path(content_sha256, options, parsed_dir)
+    if os.path.exists(target):
+        # Même contenu déjà préparé (fichier envoyé à nouveau)
+        metadata = pq.read_metadata(target)
+        return {'rows': metadata.num_rows, 'columns': metadata.num_columns, 'seconds': round(time.perf_counter() - started, 3)}
+
+    dataframe = parse_table(source_path, **(options or {}))
+    if not all(isinstance(column, str) for column in dataframe.columns):
+        raise ValueError("Les noms de colonnes doivent être du texte (fournir 'names' dans read_options).")
+    os.makedirs(parsed_dir, exist_ok=True)
+    # Écriture atomique : un worker ne lit jamais un fichier partiellement écrit
+    fd, tmp_path = tempfile.mkstemp(dir=parsed_dir, suffix='.tmp')
+    os.close(fd)
+    try:
+        dataframe.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, target)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    _evict_parsed_tables(parsed_dir)
+    return {'rows': len(dataframe), 'columns': len(dataframe.columns), 'seconds': round(time.perf_counter() - started, 3)}
+
+
+def _evict_parsed_tables(parsed_dir):
+    """Au-delà de PARSED_INPUTS_MAX_BYTES, supprime les versions Parquet les moins récemment utilisées."""
+    with _eviction_lock:
+        entries = []
+        for entry in os.scandir(parsed_dir):
+            if entry.name.endswith('.parquet'):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= config.PARSED_INPUTS_MAX_BYTES:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+
+
+def _content_sha256(path):
+    stat = os.stat(path)
+    memo_key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+    with _hash_memo_lock:
+        digest = _hash_memo.get(memo_key)
+    if digest is None:
+        digest = file_sha256(path)
+        with _hash_memo_lock:
+            _hash_memo[memo_key] = digest
+    return digest
+
+
+def load_table(path, **options):
+    """
+    Retourne le contenu d'un fichier d'entrée sous forme de DataFrame (options de pandas.read_csv ou read_excel).
+    La version Parquet préparée par le serveur est utilisée si elle existe pour ce contenu et ces options.
+    """
+    parsed_path = parsed_table_path(_content_sha256(path), options)
+    if os.path.exists(parsed_path):
+        try:
+            dataframe = pd.read_parquet(parsed_path)
+            os.utime(parsed_path)  # Marque la version comme récemment utilisée
+            return dataframe
+        except OSError:
+            pass  # Supprimée entre-temps par l'éviction : lecture du fichier d'origine
+    return parse_table(path, **options)
@@ -0,0 +1,453 @@
+#---> NOUVEAU FICHIER : hyper_framework_server/services/analysis_service.py
+
+import json
+import os
+import shutil
+import tempfile
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+
+import pandas as pd
+from flask import current_app
+from werkzeug.utils import secure_filename
+
+from ..database.database import get_db
+from .exceptions import InvalidInputError, LeaseLost, MissingInputError
+from .file_utils import file_sha256
+from .input_sampling import sample_input_file
+from .input_store import IngestedFile, input_store
+from .result_cache import result_cache
+from .result_store import get_spill_directory
+from .run_outputs import run_outputs
+from .run_scheduler import RunTicket, run_scheduler
+from .run_stats import predict_peak_memory
+from .script_execution_engine import read_script_limits
+from .worker_pool import worker_pool
+
+
+class RunProfile:
+    """
+    Décomposition du temps d'une exécution : étapes côté serveur (sauvegarde des fichiers,
+    attente du planificateur, conversion des DataFrames, sérialisation JSON, insertion en base,
+    journalisation...) et mesures faites dans le worker (chargement du script, étapes du script).
+    """
+
+    def __init__(self):
+        self.server = {}
+        self.worker = {}
+        self.rows_out = None
+
+    @contextmanager
+    def measure(self, step):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.server[step] = round(self.server.get(step, 0.0) + time.perf_counter() - started, 4)
+
+    def to_dict(self):
+        return {
+            'server': dict(self.server),
+            'worker': dict(self.worker),
+            'rows_out': self.rows_out,
+            'total_seconds': round(sum(self.server.values()), 4),
+        }
+
+
+def save_run_profile(run_id, profile):
+    """Met à jour le profil d'une exécution déjà enregistrée (pour y inclure les étapes postérieures, comme la journalisation)."""
+    if not run_id or profile is None:
+        return
+    try:
+        db = get_db()
+        db.execute("UPDATE analysis_runs SET profile_json = ? WHERE id = ?", (json.dumps(profile.to_dict()), run_id))
+        db.commit()
+    except Exception as e:
+        print(f"Erreur lors de la sauvegarde du profil d'exécution: {e}")
+
+
+def save_uploaded_file(file, key, inputs_dir):
+    """Sauvegarde un fichier envoyé pour une entrée (stockage par contenu). Retourne (chemin sauvegardé, entrée files_info)."""
+    try:
+        saved_path, stored = input_store.put_upload(file, inputs_dir)
+    except ValueError as e:
+        raise InvalidInputError(key, str(e))
+    return saved_path, dict(key=key, original_name=file.filename, **stored)
+
+
+def input_hashes_from(files_info):
+    """{clé d'entrée: sha256} des fichiers de files_info dont le hash est connu (clé du cache des résultats)."""
+    return {info['key']: info['sha256'] for info in files_info if info.get('sha256')}
+
+
+def resolve_input_reference(key, reference, inputs_dir):
+    """
+    Fichier désigné par son contenu au lieu d'être envoyé ({'sha256', 'filename'}, voir /api/uploads/lookup).
+    Retourne (chemin, entrée files_info). Lève InvalidInputError si la référence est invalide ou le contenu inconnu.
+    """
+    if not isinstance(reference, dict) or not reference.get('filename'):
+        raise InvalidInputError(key, "Référence de fichier invalide.")
+    found = input_store.get(reference.get('sha256'), reference['filename'], inputs_dir)
+    if found is None:
+        raise InvalidInputError(key, "Fichier inconnu du serveur : il doit être envoyé.")
+    saved_path, stored = found
+    return saved_path, dict(key=key, original_name=reference['filename'], **stored)
+
+
+def save_uploaded_inputs(files, input_definitions, inputs_dir, staged_inputs=None, input_refs=None):
+    """
+    Sauvegarde les fichiers envoyés pour chaque entrée déclarée par le contrôle.
+    staged_inputs ({clé: fichier déjà envoyé, voir input_staging.resolve}) fournit les entrées
+    envoyées dès leur sélection, qui ne sont pas dans la requête ; input_refs ({clé: {'sha256', 'filename'}})
+    celles dont le serveur a déjà le contenu.
+    Retourne (input_file_paths, files_info). Lève MissingInputError si un fichier manque
+    et InvalidInputError si une référence ne désigne aucun contenu connu.
+    Les fichiers sont rangés par contenu (input_store) : un fichier déjà reçu n'est pas stocké une seconde fois.
+    """
+    staged_inputs = staged_inputs or {}
+    input_refs = input_refs or {}
+    input_file_paths = {}
+    files_info = []
+
+    for input_def in input_definitions:
+        key = input_def['key']
+        if key in files:
+            saved_path, info = save_uploaded_file(files[key], key, inputs_dir)
+        elif key in staged_inputs:
+            staged = staged_inputs[key]
+            saved_path = staged['path']
+            info = {'key': key, 'original_name': staged['original_name'], 'saved_name': staged['saved_name'],
+                    'sha256': staged['sha256'], 'size_bytes': staged['size_bytes']}
+        elif key in input_refs:
+            saved_path, info = resolve_input_reference(key, input_refs[key], inputs_dir)
+        else:
+            raise MissingInputError(key)
+        input_file_paths[key] = saved_path
+        files_info.append(info)
+
+    return input_file_paths, files_info
+
+
+def read_uploaded_inputs(files, input_definitions, temp_dir):
+    """
+    Fichiers envoyés pour une exécution à blanc, qui ne sont pas rangés dans le stockage des entrées.
+    Un fichier reçu directement sur disque (IngestedFile) est lu en place, sans copie ; un fichier reçu
+    autrement est écrit une fois dans temp_dir. Retourne {clé: (chemin, nom d'origine)}.
+    Lève MissingInputError si un fichier manque et InvalidInputError s'il n'a pas pu être décompressé.
+    """
+    input_files = {}
+    for input_def in input_definitions:
+        key = input_def['key']
+        if key not in files:
+            raise MissingInputError(key)
+        file = files[key]
+        if isinstance(file.stream, IngestedFile):
+            try:
+                file.stream.verify()
+            except ValueError as e:
+                raise InvalidInputError(key, str(e))
+            file.stream.flush()
+            path = file.stream.path
+        else:
+            path = os.path.join(temp_dir, secure_filename(key))
+            file.save(path)
+        input_files[key] = (path, file.filename or key)
+    return input_files
+
+
+def archive_input_file(source_path, key, inputs_dir):
+    """
+    Copie un fichier déposé hors du client (dossier de dépôt) dans le stockage des entrées, comme un envoi.
+    Retourne (chemin sauvegardé, entrée files_info).
+    """
+    saved_path, stored = input_store.put_file(source_path, inputs_dir)
+    return saved_path, dict(key=key, original_name=os.path.basename(source_path), **stored)
+
+
+def save_shared_inputs(files, inputs_dir):
+    """
+    Sauvegarde une seule fois des fichiers destinés à plusieurs contrôles (campagne).
+    Retourne {nom du champ: {'path', 'original_name', 'saved_name', 'sha256', 'size_bytes'}}.
+    """
+    saved = {}
+    for field, file in files.items():
+        try:
+            saved_path, stored = input_store.put_upload(file, inputs_dir)
+        except ValueError as e:
+            raise InvalidInputError(field, str(e))
+        saved[field] = dict(path=saved_path, original_name=file.filename, **stored)
+    return saved
+
+
+def resolve_archived_inputs(files_info, input_definitions, inputs_dir):
+    """
+    Retrouve dans inputs_dir les fichiers enregistrés pour une exécution passée (files_info.saved_name),
+    pour chaque entrée déclarée actuellement par le contrôle. Lève MissingInputError si l'un manque
+    (par exemple supprimé par la collecte après INPUT_RUN_RETENTION_DAYS).
+    """
+    saved_names = {info['key']: info.get('saved_name') for info in files_info}
+    input_file_paths = {}
+    for input_def in input_definitions:
+        key = input_def['key']
+        saved_name = saved_names.get(key)
+        saved_path = os.path.join(inputs_dir, saved_name) if saved_name else None
+        if not saved_path or not os.path.isfile(saved_path):
+            raise MissingInputError(key)
+        input_file_paths[key] = saved_path
+    return input_file_paths
+
+
+def create_run_directory(outputs_dir):
+    """
+    Crée le dossier de travail/sortie propre à une exécution : OUTPUTS_DIR/runs/<run_uid>.
+    Deux exécutions simultanées ne peuvent donc plus écraser leurs fichiers respectifs.
+    """
+    run_uid = f"{datetime.now().strftime('%Y%m%d-%H%M%S')}_{uuid.uuid4().hex[:8]}"
+    run_dir = os.path.join(outputs_dir, 'runs', run_uid)
+    os.makedirs(run_dir)
+    return run_uid, run_dir
+
+
+def get_run_directory(outputs_dir, run_uid):
+    return os.path.join(outputs_dir, 'runs', run_uid)
+
+
+def build_artifact_manifest(run_dir, started_at):
+    """
+    Liste les fichiers produits dans le dossier d'une exécution.
+    started_at est l'horodatage (time.time()) du début de l'exécution.
+    """
+    manifest = []
+    for root, _, filenames in os.walk(run_dir):
+        for filename in sorted(filenames):
+            path = os.path.join(root, filename)
+            stat = os.stat(path)
+            # Date de création du fichier : st_ctime sous Windows, st_birthtime si disponible ailleurs
+            created_at = stat.st_ctime if os.name == 'nt' else getattr(stat, 'st_birthtime', None)
+            manifest.append({
+                'name': os.path.relpath(path, run_dir).replace(os.sep, '/'),
+                'size': stat.st_size,
+                'sha256': file_sha256(path),
+                'written_after_seconds': round(max(0.0, stat.st_mtime - started_at), 3),
+                'write_seconds': round(max(0.0, stat.st_mtime - created_at), 3) if created_at else None,
+            })
+    return manifest
+
+
+def serialize_results(results_with_dfs, run_uid=None):
+    """
+    Convertit les DataFrames des sections de résultats en listes d'enregistrements JSON.
+    Une section écrite sur disque par le worker (total_rows) ne contient que sa première page :
+    elle reçoit un results_handle pour lire les suivantes (GET /api/results/<run_uid>/sections/<index>).
+    """
+    serialized_results = []
+    for index, result in enumerate(results_with_dfs):
+        if 'dataframe' in result and isinstance(result['dataframe'], pd.DataFrame):
+            result['items'] = result['dataframe'].to_dict('records')
+            del result['dataframe']
+        if 'total_rows' in result and run_uid:
+            result['results_handle'] = {'run_uid': run_uid, 'section': index, 'page_size': len(result['items'])}
+        serialized_results.append(result)
+    return serialized_results
+
+
+def execute_control_script(control_id, script_path, input_file_paths, outputs_dir, ticket,
+                           params=None, cancel_event=None, on_start=None, use_cache=True, on_progress=None,
+                           profile=None, input_hashes=None, spill_results=True, run_directory=None):
+    """
+    Retourne les résultats sérialisés d'un contrôle pour ces entrées et paramètres.
+    Le cache des résultats est consulté d'abord : un succès ne passe ni par le planificateur ni par un worker.
+    Sinon, le script est exécuté dans un worker (après obtention d'une place auprès du planificateur,
+    qui tient compte de sa mémoire prévue, voir ticket.memory_estimate), dans un dossier de sortie
+    qui lui est propre, et le résultat est mis en cache. Lève MemoryBudgetExceeded si la mémoire
+    prévue dépasse à elle seule MEMORY_BUDGET_MB.
+    on_start() est appelé quand l'exécution démarre réellement, on_progress(événement) à chaque
+    appel du script à sdk.progress.progress(). Les durées sont ajoutées à profile (RunProfile) s'il est fourni.
+    input_hashes ({clé d'entrée: sha256}) évite de relire des fichiers dont le hash est déjà connu.
+    Avec spill_results, les sections volumineuses sont conservées sur disque et paginées (voir result_store).
+    run_directory ((run_uid, dossier), voir create_run_directory) remplace le dossier créé au démarrage.
+    Retourne un dict : results, run_uid, artifacts, cache_hit et resources (mesures de consommation :
+    pic mémoire, CPU utilisateur/système, durée, octets en entrée, version du script ; les mesures
+    d'exécution valent None pour un résultat repris du cache).
+    """
+    profile = profile or RunProfile()
+    resources = {
+        'script_sha256': file_sha256(script_path),
+        'input_bytes': sum(os.path.getsize(path) for path in input_file_paths.values()),
+        'peak_rss_mb': None,
+        'cpu_user_seconds': None,
+        'cpu_system_seconds': None,
+        'duration_seconds': None,
+    }
+    with profile.measure('cache_lookup'):
+        cache_key = result_cache.compute_key(script_path, input_file_paths, params, input_hashes) if use_cache else None
+        cached = result_cache.lookup(cache_key) if cache_key else None
+    if cached:
+        return {**cached, 'cache_hit': True, 'resources': resources}
+
+    if ticket.memory_estimate is None:
+        ticket.memory_estimate = predict_peak_memory(get_db(), control_id, resources['input_bytes'],
+                                                     read_script_limits(script_path).get('max_rss_mb'))
+    waiting = time.perf_counter()
+    with run_scheduler.slot(ticket, cancel_event):
+        profile.server['scheduler_wait'] = round(time.perf_counter() - waiting, 4)
+        if on_start:
+            on_start()
+        run_uid, run_dir = run_directory or create_run_directory(outputs_dir)
+        started_at = time.time()
+        with profile.measure('worker_execute'):
+            spill_dir = get_spill_directory(outputs_dir, run_uid) if spill_results else None
+            results_with_dfs = worker_pool.execute(script_path, input_file_paths, run_dir, cancel_event=cancel_event,
+                                                   on_progress=on_progress, telemetry=profile.worker, spill_dir=spill_dir,
+                                                   input_hashes=input_hashes)
+        resources['duration_seconds'] = profile.server['worker_execute']
+        for key in ('peak_rss_mb', 'cpu_user_seconds', 'cpu_system_seconds'):
+            resources[key] = profile.worker.get(key)
+
+    with profile.measure('dataframe_to_records'):
+        serialized_results = serialize_results(results_with_dfs, run_uid)
+    profile.rows_out = sum(result.get('total_rows', len(result.get('items') or [])) for result in serialized_results)
+    with profile.measure('artifact_manifest'):
+        artifacts = build_artifact_manifest(run_dir, started_at)
+    if cache_key:
+        try:
+            with profile.measure('result_cache_store'):
+                result_cache.store(cache_key, control_id, serialized_results, run_uid, artifacts)
+        except Exception as e:
+            print(f"Erreur lors de la mise en cache des résultats: {e}")
+    return {'results': serialized_results, 'run_uid': run_uid, 'artifacts': artifacts, 'cache_hit': False,
+            'resources': resources}
+
+
+def run_control_analysis(control_id, control_name, script_path, input_file_paths, files_info,
+                         username, week_label, outputs_dir, ticket=None, cancel_event=None, on_start=None,
+                         on_progress=None, profile=None, campaign_id=None, input_hashes=None, source_run_id=None,
+                         holds_lease=None, use_cache=True):
+    """
+    Exécute un contrôle (ou reprend son résultat en cache) et enregistre l'exécution
+    (résultats, fichiers d'entrée, manifeste des fichiers produits, profil des durées) dans analysis_runs.
+    campaign_id rattache l'exécution à une campagne (plusieurs contrôles lancés ensemble sur les mêmes fichiers),
+    source_run_id à l'exécution passée dont elle recalcule les résultats (backfill).
+    use_cache=False exécute toujours le script (un backfill recalcule, il ne reprend pas un résultat en cache).
+    holds_lease(db), pour un job de job_queue, vérifie dans la transaction d'enregistrement que le worker a
+    toujours le job : sinon LeaseLost est levée et rien n'est enregistré (le job est repris par un autre worker).
+    Retourne (serialized_results, run_info) où run_info contient run_id, run_uid, artifacts et cache_hit.
+    run_id vaut None si l'historique n'a pas pu être sauvegardé.
+    """
+    if ticket is None:
+        ticket = RunTicket(username, control_id)
+    profile = profile or RunProfile()
+    outcome = execute_control_script(
+        control_id, script_path, input_file_paths, outputs_dir, ticket,
+        params={'week_label': week_label}, cancel_event=cancel_event, on_start=on_start,
+        use_cache=use_cache, on_progress=on_progress, profile=profile, input_hashes=input_hashes
+    )
+    serialized_results = outcome['results']
+
+    # Sauvegarder l'historique de l'analyse dans la base de données
+    run_id = None
+    try:
+        with profile.measure('json_serialization'):
+            results_json = json.dumps(serialized_results)
+        resources = outcome['resources']
+        with profile.measure('db_insert'):
+            db = get_db()
+            if holds_lease is not None:
+                db.execute("BEGIN IMMEDIATE")   # Le bail ne peut pas être repris entre la vérification et l'insertion
+                if not holds_lease(db):
+                    db.rollback()
+                    raise LeaseLost("Le job a été confié à un autre worker : cette exécution n'est pas enregistrée.")
+            cursor = db.execute(
+                """INSERT INTO analysis_runs
+                   (control_id, control_name, week_label, username, results_json, files_info, run_uid, artifacts_json, profile_json,
+                    cache_hit, script_sha256, peak_rss_mb, cpu_user_seconds, cpu_system_seconds, duration_seconds,
+                    input_bytes, results_bytes, campaign_id, source_run_id)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                (control_id, control_name, week_label, username,
+                 results_json, json.dumps(files_info), outcome['run_uid'], json.dumps(outcome['artifacts']),
+                 json.dumps(profile.to_dict()),
+                 int(outcome['cache_hit']), resources['script_sha256'], resources['peak_rss_mb'],
+                 resources['cpu_user_seconds'], resources['cpu_system_seconds'], resources['duration_seconds'],
+                 resources['input_bytes'], len(results_json.encode('utf-8')), campaign_id, source_run_id)
+            )
+            # L'exécution garde ses fichiers d'entrée (backfill) : une référence par contenu
+            input_store.add_references(db, files_info)
+            db.commit()
+        run_id = cursor.lastrowid
+    except LeaseLost:
+        raise
+    except Exception as e:
+        print(f"Erreur lors de la sauvegarde de l'historique: {e}")
+        # On continue même si la sauvegarde échoue
+    input_store.collect_garbage_if_due(get_db(), current_app.config['INPUTS_DIR'])
+    run_outputs.collect_garbage_if_due(get_db(), outputs_dir)
+
+    return serialized_results, {
+        'run_id': run_id,
+        'run_uid': outcome['run_uid'],
+        'artifacts': outcome['artifacts'],
+        'cache_hit': outcome['cache_hit'],
+    }
+
+
+def extrapolate_timings(worker_telemetry, samples):
+    """
+    Estime les durées sur les fichiers complets à partir d'une exécution sur échantillon, en supposant
+    un coût proportionnel au nombre d'enregistrements (le chargement du script ne dépend pas des données).
+    Facteur d'échelle : enregistrements totaux / enregistrements conservés, tous fichiers confondus.
+    Retourne None si aucun fichier n'a pu être échantillonné.
+    """
+    rows_kept = sum(sample['rows_kept'] or 0 for sample in samples.values())
+    rows_total = sum(sample['rows_total'] or 0 for sample in samples.values())
+    if not rows_kept:
+        return None
+    scale = rows_total / rows_kept
+    load_seconds = worker_telemetry.get('script_load_seconds') or 0.0
+    run_seconds = worker_telemetry.get('script_run_seconds') or 0.0
+    return {
+        'scale_factor': round(scale, 3),
+        'estimated': any(sample['rows_total_estimated'] for sample in samples.values()),
+        'sample_seconds': round(load_seconds + run_seconds, 4),
+        'full_seconds': round(load_seconds + run_seconds * scale, 4),
+        'stages': [
+            {'stage': stage['stage'], 'sample_seconds': stage['seconds'],
+             'full_seconds': None if stage['cached'] or stage['seconds'] is None else round(stage['seconds'] * scale, 4)}
+            for stage in worker_telemetry.get('stages') or []
+        ],
+    }
+
+
+def run_dry_analysis(control_id, script_path, input_files, outputs_dir, ticket, max_rows, method, header_rows=1):
+    """
+    Exécute un contrôle sur une copie réduite de ses fichiers d'entrée (voir sample_input_file),
+    pour tester un script sans attendre une exécution complète. Ni le cache des résultats ni
+    analysis_runs ne sont utilisés, et les fichiers produits par le script sont supprimés.
+    input_files : {clé: (chemin, nom d'origine)} (voir read_uploaded_inputs) ; l'échantillon garde le nom d'origine.
+    Retourne un dict : results, samples (par entrée), resources et extrapolation (durée estimée sur les fichiers complets).
+    """
+    sample_dir = tempfile.mkdtemp(prefix='hyper_dry_run_')
+    # Dossier d'exécution créé ici pour être supprimé même si le script échoue, est annulé ou dépasse ses limites
+    run_uid, run_dir = create_run_directory(outputs_dir)
+    profile = RunProfile()
+    try:
+        sampled_paths, samples = {}, {}
+        with profile.measure('input_sampling'):
+            for key, (path, filename) in input_files.items():
+                sampled_paths[key] = os.path.join(sample_dir, f"{secure_filename(key)}_{secure_filename(filename)}")
+                samples[key] = sample_input_file(path, sampled_paths[key], max_rows, method, header_rows)
+        outcome = execute_control_script(control_id, script_path, sampled_paths, outputs_dir, ticket,
+                                         use_cache=False, profile=profile, spill_results=False,
+                                         run_directory=(run_uid, run_dir))
+    finally:
+        shutil.rmtree(sample_dir, ignore_errors=True)
+        shutil.rmtree(run_dir, ignore_errors=True)
+
+    return {
+        'results': outcome['results'],
+        'samples': samples,
+        'resources': outcome['resources'],
+        'profile': profile.to_dict(),
+        'extrapolation': extrapolate_timings(profile.worker, samples),
+    }
@@ -0,0 +1,201 @@
+#---> NOUVEAU FICHIER : hyper_framework_server/services/campaign_service.py
+
+import json
+import os
+import threading
+import uuid
+from datetime import datetime
+
+from .. import config
+from .exceptions import MissingInputError
+from .job_service import job_manager, JOB_DONE, JOB_FAILED, JOB_CANCELLED, FINISHED_STATES
+from .analysis_service import input_hashes_from, resolve_archived_inputs
+from .run_scheduler import PRIORITY_INTERACTIVE, PRIORITY_BATCH
+
+
+def resolve_campaign_inputs(controls, mapping, shared_inputs):
+    """
+    Associe les fichiers partagés aux clés d'entrée (__hyper_inputs__) de chaque contrôle.
+    mapping : {id du contrôle (str): {clé d'entrée: nom du champ de fichier}}. Une clé absente du
+    mapping est associée au fichier envoyé sous le même nom, s'il existe.
+    Retourne {id du contrôle: (input_file_paths, files_info, input_hashes)}.
+    Lève MissingInputError (clé '<contrôle>/<clé>') si une entrée ne peut être associée à aucun fichier.
+    """
+    resolved = {}
+    for control in controls:
+        control_mapping = mapping.get(str(control['id']), {})
+        input_file_paths, files_info, input_hashes = {}, [], {}
+        for input_def in json.loads(control['input_definitions']):
+            key = input_def['key']
+            field = control_mapping.get(key, key)
+            if field not in shared_inputs:
+                raise MissingInputError(f"{control['name']}/{key}")
+            shared = shared_inputs[field]
+            input_file_paths[key] = shared['path']
+            input_hashes[key] = shared['sha256']
+            files_info.append({'key': key, 'original_name': shared['original_name'], 'saved_name': shared['saved_name'],
+                               'sha256': shared['sha256'], 'size_bytes': shared['size_bytes']})
+        resolved[control['id']] = (input_file_paths, files_info, input_hashes)
+    return resolved
+
+
+class JobGroup:
+    """Ensemble de jobs d'analyse soumis ensemble et suivis comme un tout."""
+
+    def __init__(self, username, priority=PRIORITY_INTERACTIVE):
+        self.id = uuid.uuid4().hex
+        self.username = username
+        self.priority = priority
+        self.submitted_at = datetime.now()
+        self.jobs = []
+
+    @property
+    def is_finished(self):
+        return all(job.is_finished for job in self.jobs)
+
+    @property
+    def finished_at(self):
+        if not self.is_finished:
+            return None
+        return max(job.finished_at for job in self.jobs) if self.jobs else self.submitted_at
+
+    @property
+    def state(self):
+        states = [job.state for job in self.jobs]
+        if any(state not in FINISHED_STATES for state in states):
+            return 'running'
+        if all(state == JOB_DONE for state in states):
+            return 'done'
+        if all(state in (JOB_FAILED, JOB_CANCELLED) for state in states):
+            return 'failed'
+        return 'partial'
+
+    def to_dict(self):
+        jobs = [job.to_dict(include_results=False) for job in self.jobs]
+        return {
+            'username': self.username,
+            'priority': self.priority,
+            'submitted_at': self.submitted_at.isoformat(),
+            'state': self.state,
+            'counts': {state: sum(1 for job in jobs if job['state'] == state) for state in {job['state'] for job in jobs}},
+            'jobs': jobs,
+        }
+
+
+class Campaign(JobGroup):
+    """Plusieurs contrôles lancés ensemble pour une semaine, sur un même jeu de fichiers envoyé une seule fois."""
+
+    def __init__(self, username, week_label, priority=PRIORITY_INTERACTIVE):
+        super().__init__(username, priority)
+        self.week_label = week_label
+
+    def to_dict(self):
+        return {'campaign_id': self.id, 'week_label': self.week_label, **super().to_dict()}
+
+
+class Backfill(JobGroup):
+    """Réexécution d'un contrôle sur les fichiers archivés de semaines passées."""
+
+    def __init__(self, username, control_id, control_name, priority=PRIORITY_BATCH):
+        super().__init__(username, priority)
+        self.control_id = control_id
+        self.control_name = control_name
+        self.skipped = []       # Semaines non relancées : {'week_label', 'source_run_id', 'reason'}
+        self.input_bytes_by_job = {}
+
+    def throughput(self):
+        """Débit du backfill : exécutions terminées et volume traité depuis la soumission."""
+        done = [job for job in self.jobs if job.state == JOB_DONE]
+        end = self.finished_at or datetime.now()
+        elapsed = max((end - self.submitted_at).total_seconds(), 1e-6)
+        done_bytes = sum(self.input_bytes_by_job.get(job.id, 0) for job in done)
+        return {
+            'completed_runs': len(done),
+            'elapsed_seconds': round(elapsed, 3),
+            'runs_per_minute': round(len(done) * 60 / elapsed, 2),
+            'input_megabytes': round(done_bytes / (1024 * 1024), 3),
+            'megabytes_per_second': round(done_bytes / (1024 * 1024) / elapsed, 3),
+        }
+
+    def to_dict(self):
+        return {
+            'backfill_id': self.id,
+            'control_id': self.control_id,
+            'control_name': self.control_name,
+            **super().to_dict(),
+            'skipped': self.skipped,
+            'throughput': self.throughput(),
+        }
+
+
+class CampaignManager:
+    """
+    Registre en mémoire des campagnes et des backfills ; chaque exécution qu'ils contiennent
+    est un job d'analyse.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._campaigns = {}
+
+    def submit(self, app, controls, resolved_inputs, username, week_label, priority=PRIORITY_INTERACTIVE):
+        """Soumet un job par contrôle. Les jobs s'exécutent en parallèle dans les limites du planificateur."""
+        campaign = Campaign(username, week_label, priority)
+        for control in controls:
+            input_file_paths, files_info, input_hashes = resolved_inputs[control['id']]
+            script_path = os.path.join(app.config['SCRIPTS_DIR'], control['script_filename'])
+            campaign.jobs.append(job_manager.submit(
+                app, control['id'], control['name'], script_path, input_file_paths, files_info,
+                username, week_label, priority, campaign_id=campaign.id, input_hashes=input_hashes
+            ))
+        self._register(campaign)
+        return campaign
+
+    def submit_backfill(self, app, control, source_runs, username, priority=PRIORITY_BATCH):
+        """
+        Relance un contrôle sur les fichiers archivés de chaque exécution de source_runs
+        (une par semaine), avec la priorité 'batch' par défaut pour ne pas gêner les analyses interactives.
+        Le script est toujours réexécuté : le cache des résultats n'est pas consulté (voir JobManager.execute_job).
+        Les semaines dont les fichiers ne sont plus disponibles sont signalées dans skipped.
+        """
+        backfill = Backfill(username, control['id'], control['name'], priority)
+        script_path = os.path.join(app.config['SCRIPTS_DIR'], control['script_filename'])
+        input_definitions = json.loads(control['input_definitions'])
+        for run in source_runs:
+            files_info = json.loads(run['files_info']) if run['files_info'] else []
+            try:
+                input_file_paths = resolve_archived_inputs(files_info, input_definitions, app.config['INPUTS_DIR'])
+            except MissingInputError as e:
+                backfill.skipped.append({'week_label': run['week_label'], 'source_run_id': run['id'], 'reason': str(e)})
+                continue
+            job = job_manager.submit(
+                app, control['id'], control['name'], script_path, input_file_paths, files_info,
+                username, run['week_label'], priority, input_hashes=input_hashes_from(files_info), source_run_id=run['id']
+            )
+            backfill.input_bytes_by_job[job.id] = sum(os.path.getsize(path) for path in input_file_paths.values())
+            backfill.jobs.append(job)
+        self._register(backfill)
+        return backfill
+
+    def _register(self, group):
+        with self._lock:
+            self._prune_finished_campaigns()
+            self._campaigns[group.id] = group
+
+    def _prune_finished_campaigns(self):
+        """Oublie les campagnes terminées depuis plus de JOB_RETENTION_SECONDS (leurs exécutions restent en base)."""
+        now = datetime.now()
+        expired = [
+            campaign_id for campaign_id, campaign in self._campaigns.items()
+            if campaign.is_finished and (now - campaign.finished_at).total_seconds() > config.JOB_RETENTION_SECONDS
+        ]
+        for campaign_id in expired:
+            del self._campaigns[campaign_id]
+
+    def get(self, campaign_id, group_type=Campaign):
+        with self._lock:
+            group = self._campaigns.get(campaign_id)
+        return group if isinstance(group, group_type) else None
+
+
+campaign_manager = CampaignManager()
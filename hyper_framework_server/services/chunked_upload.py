@@ -0,0 +1,222 @@
+#---> NOUVEAU FICHIER : hyper_framework_server/services/chunked_upload.py
+
+import hashlib
+import math
+import os
+import uuid
+from datetime import datetime, timedelta
+
+from werkzeug.exceptions import RequestEntityTooLarge
+
+from .. import config
+from ..database.database import get_db
+from .compression import supported_encodings
+from .exceptions import UploadSessionError
+from .file_utils import file_sha256
+from .input_store import input_store, is_sha256
+
+SESSIONS_DIRNAME = 'uploads'
+
+
+def _read_at_most(stream, size):
+    """Lit jusqu'à size octets (un flux réseau peut en rendre moins à chaque lecture)."""
+    parts, remaining = [], size
+    while remaining > 0:
+        part = stream.read(remaining)
+        if not part:
+            break
+        parts.append(part)
+        remaining -= len(part)
+    return b''.join(parts)
+
+
+class ChunkedUploads:
+    """
+    Envoi d'un gros fichier par morceaux numérotés, reprenable après une coupure réseau.
+    Le client ouvre une session (nom, taille, SHA-256 attendu), envoie chaque morceau avec son SHA-256
+    (dans n'importe quel ordre, en parallèle), demande la liste des morceaux manquants après une erreur,
+    puis termine la session. Chaque morceau est écrit directement à sa place dans un fichier de la taille
+    finale (INPUTS_DIR/uploads) : aucune concaténation n'est nécessaire. À la fin, le contenu est vérifié
+    puis rangé dans le stockage des entrées (input_store), où le client le désigne par son hash.
+    Un fichier envoyé compressé (encoding 'gzip' ou 'zstd') est décompressé en flux à la fin : la taille
+    et les morceaux portent sur le fichier compressé, le SHA-256 annoncé sur le contenu d'origine.
+    Une session inactive depuis UPLOAD_SESSION_TTL_SECONDS est abandonnée.
+    """
+
+    def _sessions_dir(self, inputs_dir):
+        return os.path.join(inputs_dir, SESSIONS_DIRNAME)
+
+    def _data_path(self, inputs_dir, session_id):
+        return os.path.join(self._sessions_dir(inputs_dir), f"{session_id}.data")
+
+    def create(self, inputs_dir, username, filename, size_bytes, chunk_size=None, sha256=None, encoding=None):
+        """Ouvre une session d'envoi. Lève UploadSessionError si les paramètres sont invalides."""
+        chunk_size = chunk_size or config.UPLOAD_CHUNK_SIZE
+        if not filename:
+            raise UploadSessionError("Nom de fichier manquant.")
+        if not isinstance(size_bytes, int) or size_bytes <= 0:
+            raise UploadSessionError("La taille du fichier doit être un entier positif.")
+        if config.UPLOAD_MAX_FILE_BYTES and size_bytes > config.UPLOAD_MAX_FILE_BYTES:
+            raise UploadSessionError(f"Fichier trop volumineux (limite : {config.UPLOAD_MAX_FILE_BYTES // (1024 * 1024)} Mo par fichier).")
+        if not isinstance(chunk_size, int) or not config.UPLOAD_CHUNK_MIN_SIZE <= chunk_size <= config.UPLOAD_CHUNK_MAX_SIZE:
+            raise UploadSessionError(f"La taille des morceaux doit être comprise entre {config.UPLOAD_CHUNK_MIN_SIZE} "
+                                     f"et {config.UPLOAD_CHUNK_MAX_SIZE} octets.")
+        if sha256 is not None and not is_sha256(sha256):
+            raise UploadSessionError("SHA-256 attendu invalide.")
+        if encoding is not None and encoding not in supported_encodings():
+            raise UploadSessionError(f"Compression '{encoding}' non prise en charge par le serveur.")
+        self.purge_expired(inputs_dir)
+
+        session_id = uuid.uuid4().hex
+        os.makedirs(self._sessions_dir(inputs_dir), exist_ok=True)
+        # Fichier de la taille finale : chaque morceau est écrit directement à sa position
+        with open(self._data_path(inputs_dir, session_id), 'wb') as data:
+            data.truncate(size_bytes)
+        now = datetime.now()
+        db = get_db()
+        db.execute(
+            """INSERT INTO upload_sessions (session_id, username, filename, size_bytes, chunk_size, chunk_count,
+                                            sha256, encoding, created_at, updated_at)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+            (session_id, username, filename, size_bytes, chunk_size, math.ceil(size_bytes / chunk_size), sha256, encoding,
+             now, now)
+        )
+        db.commit()
+        return self.get(session_id)
+
+    def get(self, session_id):
+        row = get_db().execute("SELECT * FROM upload_sessions WHERE session_id = ?", (session_id,)).fetchone()
+        return dict(row) if row else None
+
+    def missing_chunks(self, session):
+        received = {row['chunk_index'] for row in get_db().execute(
+            "SELECT chunk_index FROM upload_chunks WHERE session_id = ?", (session['session_id'],))}
+        return [index for index in range(session['chunk_count']) if index not in received]
+
+    def describe(self, session):
+        """Champs publics de la session, avec la liste des morceaux encore attendus."""
+        public = {key: session[key] for key in ('session_id', 'filename', 'size_bytes', 'chunk_size', 'chunk_count', 'sha256',
+                                                'encoding')}
+        public['completed'] = session['completed_at'] is not None
+        public['missing'] = [] if public['completed'] else self.missing_chunks(session)
+        return public
+
+    def _chunk_length(self, session, index):
+        return min(session['chunk_size'], session['size_bytes'] - index * session['chunk_size'])
+
+    def write_chunk(self, inputs_dir, session, index, stream, expected_sha256):
+        """
+        Écrit le morceau index lu depuis stream, après vérification de sa taille et de son SHA-256.
+        Un morceau déjà reçu n'est pas réécrit (renvoi après une réponse perdue). Lève UploadSessionError sinon.
+        """
+        if session['completed_at'] is not None:
+            raise UploadSessionError("Cet envoi est déjà terminé.")
+        if not 0 <= index < session['chunk_count']:
+            raise UploadSessionError(f"Morceau {index} hors de la session ({session['chunk_count']} morceaux).")
+        if not is_sha256(expected_sha256):
+            raise UploadSessionError("SHA-256 du morceau manquant ou invalide.")
+        db = get_db()
+        already = db.execute("SELECT sha256 FROM upload_chunks WHERE session_id = ? AND chunk_index = ?",
+                             (session['session_id'], index)).fetchone()
+        if already and already['sha256'] == expected_sha256:
+            return
+
+        expected_length = self._chunk_length(session, index)
+        # Le morceau est lu en entier avant d'être écrit : un envoi interrompu ou altéré ne touche pas au fichier
+        data = _read_at_most(stream, expected_length + 1)
+        if len(data) != expected_length:
+            raise UploadSessionError(f"Morceau {index} : {len(data)} octets reçus, {expected_length} attendus.")
+        if hashlib.sha256(data).hexdigest() != expected_sha256:
+            raise UploadSessionError(f"Morceau {index} altéré pendant l'envoi (SHA-256 différent).")
+        try:
+            with open(self._data_path(inputs_dir, session['session_id']), 'r+b') as target:
+                target.seek(index * session['chunk_size'])
+                target.write(data)
+        except FileNotFoundError:
+            raise UploadSessionError("Session d'envoi expirée : recommencez l'envoi.")
+        now = datetime.now()
+        db.execute(
+            "INSERT OR REPLACE INTO upload_chunks (session_id, chunk_index, sha256, size_bytes, received_at) VALUES (?, ?, ?, ?, ?)",
+            (session['session_id'], index, expected_sha256, expected_length, now)
+        )
+        db.execute("UPDATE upload_sessions SET updated_at = ? WHERE session_id = ?", (now, session['session_id']))
+        db.commit()
+
+    def complete(self, inputs_dir, session):
+        """
+        Vérifie que tous les morceaux sont arrivés et que le fichier a le SHA-256 annoncé, puis le range dans
+        le stockage des entrées. Retourne {'sha256', 'size_bytes', 'filename'} (même réponse si déjà terminé).
+        """
+        if session['completed_at'] is None:
+            missing = self.missing_chunks(session)
+            if missing:
+                raise UploadSessionError(f"{len(missing)} morceau(x) manquant(s).", missing=missing)
+            data_path = self._data_path(inputs_dir, session['session_id'])
+            db = get_db()
+            if session['encoding']:
+                decompressed = self._decompress(inputs_dir, data_path, session['encoding'])
+                stored_path, sha256 = decompressed.path, decompressed.sha256
+            else:
+                decompressed, stored_path, sha256 = None, data_path, file_sha256(data_path)
+            if session['sha256'] and sha256 != session['sha256']:
+                if decompressed:
+                    decompressed.close()
+                # Tous les morceaux sont à renvoyer : on ne sait pas lequel est en cause
+                db.execute("DELETE FROM upload_chunks WHERE session_id = ?", (session['session_id'],))
+                db.commit()
+                raise UploadSessionError("Le fichier reçu ne correspond pas au SHA-256 annoncé.",
+                                         missing=list(range(session['chunk_count'])))
+            if decompressed:
+                decompressed.keep()
+                os.remove(data_path)
+            _, stored = input_store.adopt(stored_path, session['filename'], inputs_dir, sha256)
+            db.execute(
+                """UPDATE upload_sessions SET completed_at = ?, updated_at = ?, stored_sha256 = ?, stored_size_bytes = ?
+                   WHERE session_id = ?""",
+                (datetime.now(), datetime.now(), sha256, stored['size_bytes'], session['session_id'])
+            )
+            db.execute("DELETE FROM upload_chunks WHERE session_id = ?", (session['session_id'],))
+            db.commit()
+            session = self.get(session['session_id'])
+        return {'sha256': session['stored_sha256'], 'size_bytes': session['stored_size_bytes'] or session['size_bytes'],
+                'filename': session['filename']}
+
+    def _decompress(self, inputs_dir, data_path, encoding):
+        """
+        Décompresse le fichier reçu dans un fichier .part du stockage (IngestedFile : haché et borné par
+        UPLOAD_MAX_FILE_BYTES pendant l'écriture). Lève UploadSessionError si le fichier est invalide.
+        """
+        decompressed = input_store.open_ingest(inputs_dir, config.UPLOAD_MAX_FILE_BYTES, encoding)
+        try:
+            with open(data_path, 'rb') as data:
+                for block in iter(lambda: data.read(1024 * 1024), b''):
+                    decompressed.write(block)
+            decompressed.verify()
+        except (ValueError, RequestEntityTooLarge) as e:
+            decompressed.close()
+            raise UploadSessionError(getattr(e, 'description', None) or str(e))
+        except BaseException:
+            decompressed.close()
+            raise
+        return decompressed
+
+    def abort(self, inputs_dir, session):
+        db = get_db()
+        db.execute("DELETE FROM upload_chunks WHERE session_id = ?", (session['session_id'],))
+        db.execute("DELETE FROM upload_sessions WHERE session_id = ?", (session['session_id'],))
+        db.commit()
+        try:
+            os.remove(self._data_path(inputs_dir, session['session_id']))
+        except OSError:
+            pass
+
+    def purge_expired(self, inputs_dir):
+        """Abandonne les sessions sans activité depuis UPLOAD_SESSION_TTL_SECONDS."""
+        limit = datetime.now() - timedelta(seconds=config.UPLOAD_SESSION_TTL_SECONDS)
+        rows = get_db().execute("SELECT * FROM upload_sessions WHERE updated_at < ?", (limit,)).fetchall()
+        for row in rows:
+            self.abort(inputs_dir, dict(row))
+        return len(rows)
+
+
+chunked_uploads = ChunkedUploads()
@@ -0,0 +1,71 @@
+#---> NOUVEAU FICHIER : hyper_framework_server/services/compression.py
+
+import zlib
+
+try:
+    import zstandard
+except ImportError:
+    # Sans zstandard, seuls les envois compressés en gzip sont acceptés
+    zstandard = None
+
+ENCODING_GZIP = 'gzip'
+ENCODING_ZSTD = 'zstd'
+
+# Type de contenu d'une partie multipart compressée par le client (le nom du fichier reste celui d'origine)
+CONTENT_TYPE_ENCODINGS = {
+    'application/gzip': ENCODING_GZIP,
+    'application/x-gzip': ENCODING_GZIP,
+    'application/zstd': ENCODING_ZSTD,
+}
+# Fichiers déjà compressés par nature : un type gzip/zstd sur ces noms ne demande pas de décompression
+COMPRESSED_EXTENSIONS = ('.gz', '.gzip', '.zst', '.zstd')
+
+# Octets produits au plus par appel au décompresseur (borne la mémoire face à un fichier très compressible)
+_OUTPUT_BLOCK_BYTES = 1024 * 1024
+
+
+def supported_encodings():
+    return [ENCODING_GZIP] + ([ENCODING_ZSTD] if zstandard is not None else [])
+
+
+def upload_encoding(content_type, filename):
+    """Compression d'un fichier envoyé d'après le type de sa partie multipart, ou None s'il est envoyé tel quel."""
+    encoding = CONTENT_TYPE_ENCODINGS.get((content_type or '').split(';')[0].strip().lower())
+    if encoding is None or (filename or '').lower().endswith(COMPRESSED_EXTENSIONS):
+        return None
+    return encoding
+
+
+class StreamDecompressor:
+    """Décompression au fil de l'eau : feed() rend les octets décompressés, check_complete() vérifie la fin du flux."""
+
+    def __init__(self, encoding):
+        if encoding == ENCODING_GZIP:
+            self._decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        elif encoding == ENCODING_ZSTD and zstandard is not None:
+            self._decompressor = zstandard.ZstdDecompressor().decompressobj()
+        else:
+            raise ValueError(f"Compression non prise en charge : {encoding}")
+        self.encoding = encoding
+
+    def feed(self, data):
+        try:
+            yield from self._feed(data)
+        except (zlib.error, getattr(zstandard, 'ZstdError', zlib.error)) as e:
+            raise ValueError(f"Fichier compressé invalide : {e}")
+
+    def _feed(self, data):
+        if self.encoding == ENCODING_GZIP:
+            output = self._decompressor.decompress(data, _OUTPUT_BLOCK_BYTES)
+            while output:
+                yield output
+                output = self._decompressor.decompress(self._decompressor.unconsumed_tail, _OUTPUT_BLOCK_BYTES)
+        else:
+            output = self._decompressor.decompress(data)
+            if output:
+                yield output
+
+    def check_complete(self):
+        if not self._decompressor.eof:
+            raise ValueError("Fichier compressé incomplet.")
+
@@ -0,0 +1,143 @@
+#---> NOUVEAU FICHIER : hyper_framework_server/services/drop_folder_watcher.py
+
+import fnmatch
+import hashlib
+import json
+import os
+import threading
+import time
+from datetime import datetime
+
+from .. import config
+from ..database.database import get_db
+from .analysis_service import archive_input_file, input_hashes_from
+from .job_service import job_manager
+from .logging_service import logging_service
+from .run_scheduler import PRIORITY_BATCH
+
+
+def in_off_peak_window(now, hours):
+    """Vrai si l'heure de now est dans la plage (début, fin), qui peut passer minuit. None : toujours vrai."""
+    if not hours:
+        return True
+    start, end = hours
+    if start <= end:
+        return start <= now.hour < end
+    return now.hour >= start or now.hour < end
+
+
+class DropFolderWatcher:
+    """
+    Surveille les dossiers de DROP_FOLDERS et lance les contrôles configurés quand leurs fichiers sont arrivés.
+    Un fichier n'est utilisé qu'une fois complet : taille et date de modification inchangées depuis
+    DROP_FILE_STABLE_SECONDS. Quand chaque entrée d'un contrôle a un fichier complet, le contrôle est
+    lancé pendant la plage DROP_FOLDER_OFF_PEAK_HOURS, en priorité 'batch', sous l'utilisateur
+    DROP_FOLDER_USERNAME. Un même jeu de fichiers n'est traité qu'une fois (table drop_folder_files).
+    """
+
+    def __init__(self):
+        self._thread = None
+        self._stop_event = threading.Event()
+        self._observed = {}     # chemin -> (taille, mtime, instant depuis lequel ils n'ont pas changé)
+
+    def start(self, app):
+        if not config.DROP_FOLDERS or (self._thread and self._thread.is_alive()):
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._loop, args=(app,), daemon=True, name="drop-folder-watcher")
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def _loop(self, app):
+        while not self._stop_event.is_set():
+            try:
+                with app.app_context():
+                    self.scan(app)
+            except Exception as e:
+                print(f"Erreur lors de la surveillance des dossiers de dépôt: {e}")
+            self._stop_event.wait(config.DROP_FOLDER_POLL_SECONDS)
+
+    def _stable_files(self, folder):
+        """Fichiers du dossier dont la taille et la date n'ont pas changé depuis DROP_FILE_STABLE_SECONDS."""
+        now = time.monotonic()
+        stable = {}
+        try:
+            entries = [entry for entry in os.scandir(folder) if entry.is_file()]
+        except OSError as e:
+            print(f"Dossier de dépôt inaccessible '{folder}': {e}")
+            return stable
+        for entry in entries:
+            stat = entry.stat()
+            previous = self._observed.get(entry.path)
+            if previous and previous[:2] == (stat.st_size, stat.st_mtime):
+                unchanged_since = previous[2]
+            else:
+                unchanged_since = now
+            self._observed[entry.path] = (stat.st_size, stat.st_mtime, unchanged_since)
+            if now - unchanged_since >= config.DROP_FILE_STABLE_SECONDS:
+                stable[entry.name] = (entry.path, stat.st_size, stat.st_mtime)
+        return stable
+
+    def _match_inputs(self, patterns, stable_files):
+        """Pour chaque entrée, le fichier complet le plus récent correspondant à son motif. None s'il en manque un."""
+        matched = {}
+        for key, pattern in patterns.items():
+            candidates = [info for name, info in stable_files.items() if fnmatch.fnmatch(name.lower(), pattern.lower())]
+            if not candidates:
+                return None
+            matched[key] = max(candidates, key=lambda info: info[2])
+        return matched
+
+    def scan(self, app):
+        """Un passage sur tous les dossiers configurés."""
+        db = get_db()
+        off_peak = in_off_peak_window(datetime.now(), config.DROP_FOLDER_OFF_PEAK_HOURS)
+        for folder_config in config.DROP_FOLDERS:
+            stable_files = self._stable_files(folder_config['path'])
+            for script_filename, patterns in folder_config.get('controls', {}).items():
+                matched = self._match_inputs(patterns, stable_files)
+                if not matched:
+                    continue
+                control = db.execute(
+                    "SELECT id, name, script_filename, input_definitions FROM controls WHERE script_filename = ?", (script_filename,)
+                ).fetchone()
+                if not control:
+                    print(f"Dossier de dépôt : contrôle '{script_filename}' introuvable.")
+                    continue
+                files = [{'key': key, 'path': path, 'size': size, 'mtime': mtime} for key, (path, size, mtime) in sorted(matched.items())]
+                signature = hashlib.sha256(json.dumps({'control_id': control['id'], 'files': files}, sort_keys=True).encode('utf-8')).hexdigest()
+                if db.execute("SELECT 1 FROM drop_folder_files WHERE signature = ?", (signature,)).fetchone():
+                    continue
+                if not off_peak:
+                    continue  # Fichiers prêts : le contrôle sera lancé à l'ouverture de la plage creuse
+                self._submit(app, db, control, files, signature)
+
+    def _submit(self, app, db, control, files, signature):
+        # Les fichiers sont copiés dans le stockage des entrées : le partage peut être vidé, l'exécution reste rejouable (backfill)
+        input_file_paths, files_info = {}, []
+        for file in files:
+            saved_path, info = archive_input_file(file['path'], file['key'], app.config['INPUTS_DIR'])
+            input_file_paths[file['key']] = saved_path
+            files_info.append(info)
+
+        # Semaine ISO du fichier le plus récent, au format utilisé par le client ("S22")
+        week_label = f"S{datetime.fromtimestamp(max(file['mtime'] for file in files)).isocalendar()[1]}"
+        script_path = os.path.join(app.config['SCRIPTS_DIR'], control['script_filename'])
+        job = job_manager.submit(
+            app, control['id'], control['name'], script_path, input_file_paths, files_info,
+            config.DROP_FOLDER_USERNAME, week_label, PRIORITY_BATCH, input_hashes=input_hashes_from(files_info)
+        )
+        db.execute(
+            "INSERT INTO drop_folder_files (signature, control_id, files_json, job_id) VALUES (?, ?, ?, ?)",
+            (signature, control['id'], json.dumps(files), job.id)
+        )
+        db.commit()
+        logging_service.log_action(config.DROP_FOLDER_USERNAME, 'DROP_FOLDER_RUN', 'SUCCESS', {
+            'control_id': control['id'], 'control_name': control['name'], 'job_id': job.id,
+            'week_label': week_label, 'files': [os.path.basename(file['path']) for file in files],
+        })
+
+
+drop_folder_watcher = DropFolderWatcher()
@@ -0,0 +1,55 @@
+class ScriptExecutionError(Exception): pass
+class ScriptCancelled(ScriptExecutionError): pass
+
+class LeaseLost(ScriptCancelled):
+    """Levée quand un worker n'a plus le bail de son job (remis en file après un battement manqué) : rien n'est enregistré."""
+
+class MissingInputError(ValueError):
+    def __init__(self, key):
+        self.key = key
+        super().__init__(f"Fichier manquant: {key}")
+
+class InvalidInputError(ValueError):
+    """Fichier d'entrée refusé (format inattendu, fichier vide, référence inconnue...)."""
+    def __init__(self, key, reason):
+        self.key = key
+        super().__init__(f"Fichier refusé pour '{key}': {reason}")
+
+class ScriptLimitExceeded(ScriptExecutionError):
+    """Levée quand une exécution dépasse une de ses limites (temps, CPU ou mémoire) et a été arrêtée."""
+
+    MESSAGES = {
+        'timeout': "Temps d'exécution maximal dépassé ({observed:.1f}s > {threshold}s)",
+        'cpu_seconds': "Temps CPU maximal dépassé ({observed:.0f}s > {threshold}s)",
+        'max_rss_mb': "Mémoire maximale dépassée ({observed:.0f} Mo > {threshold} Mo)",
+    }
+
+    def __init__(self, limit, observed, threshold):
+        self.limit = limit
+        self.observed = observed
+        self.threshold = threshold
+        message = self.MESSAGES.get(limit, "Limite '{limit}' dépassée").format(limit=limit, observed=observed, threshold=threshold)
+        super().__init__(f"{message}. L'exécution du script a été interrompue.")
+
+    def to_log_details(self):
+        return {'limit': self.limit, 'observed': round(self.observed, 1), 'threshold': self.threshold}
+
+class MemoryBudgetExceeded(ScriptExecutionError):
+    """Levée quand la mémoire prévue d'une exécution dépasse à elle seule MEMORY_BUDGET_MB : elle n'est pas lancée."""
+
+    def __init__(self, predicted_mb, budget_mb):
+        self.predicted_mb = predicted_mb
+        self.budget_mb = budget_mb
+        super().__init__(
+            f"Exécution refusée : elle nécessiterait environ {predicted_mb:.0f} Mo de mémoire, "
+            f"au-delà du budget du serveur ({budget_mb} Mo). Réduisez la taille des fichiers d'entrée."
+        )
+
+    def to_log_details(self):
+        return {'limit': 'memory_budget_mb', 'predicted_mb': round(self.predicted_mb, 1), 'budget_mb': self.budget_mb}
+
+class UploadSessionError(ValueError):
+    """Envoi par morceaux refusé (morceau altéré ou de mauvaise taille, fichier incomplet...). missing : morceaux manquants."""
+    def __init__(self, message, missing=None):
+        self.missing = missing
+        super().__init__(message)
@@ -0,0 +1,11 @@
+#---> NOUVEAU FICHIER : hyper_framework_server/services/file_utils.py
+
+import hashlib
+
+def file_sha256(path, chunk_size=1024 * 1024):
+    """Calcule le SHA-256 d'un fichier par blocs, sans le charger entièrement en mémoire."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
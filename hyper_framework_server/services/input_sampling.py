@@ -0,0 +1,156 @@
+#---> NOUVEAU FICHIER : hyper_framework_server/services/input_sampling.py
+
+import codecs
+import io
+import os
+import random
+import shutil
+
+SAMPLE_HEAD = 'head'
+SAMPLE_RESERVOIR = 'sample'
+SAMPLE_METHODS = (SAMPLE_HEAD, SAMPLE_RESERVOIR)
+
+TEXT_EXTENSIONS = {'.csv', '.txt', '.tsv', '.log'}
+EXCEL_EXTENSIONS = {'.xlsx', '.xlsm'}
+
+
+def _iter_records(lines, quote):
+    """
+    Regroupe les lignes en enregistrements : une ligne dont les guillemets ne sont pas refermés
+    (champ CSV sur plusieurs lignes) continue sur la suivante.
+    """
+    record, open_quotes = None, False
+    for line in lines:
+        record = line if record is None else record + line
+        if line.count(quote) % 2:
+            open_quotes = not open_quotes
+        if not open_quotes:
+            yield record
+            record = None
+    if record is not None:
+        yield record
+
+
+def _select(records, max_rows, method, seed):
+    """
+    Retourne (enregistrements retenus dans l'ordre du fichier, nombre total d'enregistrements ou None).
+    'head' s'arrête après max_rows : le total n'est pas connu. 'sample' lit tout le fichier une fois
+    et tire max_rows enregistrements au hasard (échantillonnage par réservoir).
+    """
+    if method == SAMPLE_HEAD:
+        kept = []
+        for record in records:
+            if len(kept) >= max_rows:
+                return kept, None
+            kept.append(record)
+        return kept, len(kept)
+
+    rng = random.Random(seed)
+    reservoir, total = [], 0
+    for index, record in enumerate(records):
+        total += 1
+        if len(reservoir) < max_rows:
+            reservoir.append((index, record))
+        else:
+            slot = rng.randrange(total)
+            if slot < max_rows:
+                reservoir[slot] = (index, record)
+    return [record for _, record in sorted(reservoir, key=lambda item: item[0])], total
+
+
+def _sample_text_file(source_path, dest_path, max_rows, method, header_rows, seed):
+    with open(source_path, 'rb') as f:
+        bom = f.read(4)
+    # Les exports UTF-16 sont lus comme du texte ; les autres octet par octet (l'encodage reste celui du fichier)
+    encoding = 'utf-16' if bom.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)) else None
+    with open(source_path, 'rb') as raw, open(dest_path, 'wb') as out_raw:
+        source = io.TextIOWrapper(raw, encoding=encoding, newline='') if encoding else raw
+        out = io.TextIOWrapper(out_raw, encoding=encoding, newline='') if encoding else out_raw
+        records = _iter_records(source, '"' if encoding else b'"')
+        for _ in range(header_rows):
+            header = next(records, None)
+            if header is not None:
+                out.write(header)
+        kept, total = _select(records, max_rows, method, seed)
+        for record in kept:
+            out.write(record)
+        out.flush()
+        # Octets lus jusqu'au dernier enregistrement retenu, pour estimer le total d'un échantillon 'head'
+        bytes_read = raw.tell() if not encoding else None
+    return kept, total, bytes_read
+
+
+def _sample_excel_file(source_path, dest_path, max_rows, method, header_rows, seed):
+    from openpyxl import Workbook, load_workbook
+
+    # Ouvert par un descripteur : openpyxl refuse un chemin sans extension Excel (fichier reçu .part)
+    handle = open(source_path, 'rb')
+    source = load_workbook(handle, read_only=True, data_only=True)
+    target = Workbook(write_only=True)
+    kept_rows, total_rows = 0, 0
+    try:
+        for sheet in source.worksheets:
+            rows = sheet.iter_rows(values_only=True)
+            out = target.create_sheet(sheet.title)
+            for _ in range(header_rows):
+                header = next(rows, None)
+                if header is not None:
+                    out.append(header)
+            kept, total = _select(rows, max_rows, method, seed)
+            for row in kept:
+                out.append(row)
+            kept_rows += len(kept)
+            if total is None and sheet.max_row:
+                # Dimension déclarée par la feuille : disponible sans la lire en entier
+                total = max(sheet.max_row - header_rows, len(kept))
+            total_rows = None if total is None or total_rows is None else total_rows + total
+    finally:
+        source.close()
+        handle.close()
+    target.save(dest_path)
+    return kept_rows, total_rows
+
+
+def sample_input_file(source_path, dest_path, max_rows, method=SAMPLE_HEAD, header_rows=1, seed=0):
+    """
+    Écrit dans dest_path une copie réduite de source_path : les header_rows premières lignes, puis
+    max_rows enregistrements ('head' : les premiers ; 'sample' : tirés au hasard, dans l'ordre du fichier).
+    Le fichier est lu en flux, enregistrement par enregistrement, sans être chargé ni analysé en entier.
+    Fichiers texte (CSV...) et Excel (.xlsx) ; les autres formats sont copiés tels quels. Le format est
+    déduit de l'extension de dest_path (nom d'origine du fichier), source_path pouvant être un fichier reçu .part.
+    Retourne {'format', 'rows_kept', 'rows_total', 'rows_total_estimated', 'bytes_total', 'bytes_kept'}.
+    """
+    if method not in SAMPLE_METHODS:
+        raise ValueError(f"Méthode d'échantillonnage inconnue : {method}")
+    extension = os.path.splitext(dest_path)[1].lower()
+    bytes_total = os.path.getsize(source_path)
+    estimated = False
+
+    if extension in TEXT_EXTENSIONS:
+        kept, rows_total, bytes_read = _sample_text_file(source_path, dest_path, max_rows, method, header_rows, seed)
+        rows_kept = len(kept)
+        if rows_total is None:
+            # Échantillon 'head' : total estimé d'après la taille moyenne des lignes lues
+            estimated = True
+            bytes_read = bytes_read or os.path.getsize(dest_path)
+            rows_total = round(rows_kept * bytes_total / bytes_read) if bytes_read else rows_kept
+        file_format = 'text'
+    elif extension in EXCEL_EXTENSIONS:
+        rows_kept, rows_total = _sample_excel_file(source_path, dest_path, max_rows, method, header_rows, seed)
+        if rows_total is None:
+            estimated = True
+            rows_total = rows_kept
+        file_format = 'excel'
+    else:
+        shutil.copyfile(source_path, dest_path)
+        rows_kept = rows_total = None
+        file_format = 'copied'
+
+    return {
+        'format': file_format,
+        'rows_kept': rows_kept,
+        'rows_total': rows_total,
+        'rows_total_estimated': estimated,
+        'bytes_total': bytes_total,
+        'bytes_kept': os.path.getsize(dest_path),
+    }
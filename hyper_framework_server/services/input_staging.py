@@ -0,0 +1,176 @@
+#---> NOUVEAU FICHIER : hyper_framework_server/services/input_staging.py
+
+import atexit
+import multiprocessing
+import os
+import threading
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+
+from .. import config
+from ..database.database import get_db
+from ..sdk.tables import is_tabular, preparse_table
+from .analysis_service import resolve_input_reference, save_uploaded_file
+from .exceptions import InvalidInputError
+from .input_store import input_store, is_blob
+
+PARSE_PENDING = 'pending'
+PARSE_READY = 'ready'
+PARSE_FAILED = 'failed'
+PARSE_SKIPPED = 'skipped'     # Format non tabulaire : le fichier est seulement archivé
+
+
+def check_input_format(filename, input_def):
+    """Lève InvalidInputError si l'extension du fichier ne correspond pas au format déclaré pour l'entrée."""
+    if not filename:
+        raise InvalidInputError(input_def['key'], "Nom de fichier vide.")
+    expected_format = input_def.get('format')
+    if expected_format and not filename.lower().endswith(f".{expected_format.lower()}"):
+        raise InvalidInputError(input_def['key'], f"Le format attendu est .{expected_format}")
+
+
+class InputStaging:
+    """
+    Fichiers d'entrée envoyés dès leur sélection dans le client, avant le lancement de l'analyse.
+    Chaque fichier est vérifié, rangé dans le stockage des entrées (comme un envoi classique) et enregistré
+    dans staged_inputs, qui garde une référence sur son contenu ; un processus dédié le lit aussitôt avec
+    les options de l'entrée ("read_options") et en garde une version Parquet pour sdk.tables.load_table. Le lancement de l'analyse référence
+    ensuite le fichier par son identifiant (upload_id) au lieu de l'envoyer à nouveau.
+    Un fichier est oublié STAGED_INPUT_TTL_SECONDS après son envoi ou sa dernière utilisation.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._executor = None
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                # Processus séparé : la lecture d'un gros fichier ne ralentit pas les threads de Waitress
+                self._executor = ProcessPoolExecutor(max_workers=max(1, config.INPUT_PREPARSE_WORKERS),
+                                                     mp_context=multiprocessing.get_context('spawn'))
+            return self._executor
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def stage(self, app, file, control_id, input_def, username, reference=None):
+        """
+        Enregistre le fichier envoyé pour une entrée du contrôle et lance sa lecture. Retourne la ligne staged_inputs.
+        Avec reference ({'sha256', 'filename'}) au lieu de file, le contenu déjà stocké par le serveur est repris
+        (InvalidInputError s'il est inconnu).
+        """
+        key = input_def['key']
+        check_input_format(reference['filename'] if reference is not None else file.filename, input_def)
+        inputs_dir = app.config['INPUTS_DIR']
+        self.purge_expired(inputs_dir)
+
+        if reference is not None:
+            saved_path, info = resolve_input_reference(key, reference, inputs_dir)
+        else:
+            saved_path, info = save_uploaded_file(file, key, inputs_dir)
+        if info['size_bytes'] == 0:
+            raise InvalidInputError(key, "Le fichier est vide.")
+        sha256, size_bytes = info['sha256'], info['size_bytes']
+
+        upload_id = uuid.uuid4().hex
+        parse_state = PARSE_PENDING if is_tabular(saved_path) else PARSE_SKIPPED
+        db = get_db()
+        db.execute(
+            """INSERT INTO staged_inputs (upload_id, control_id, input_key, username, original_name, saved_name,
+                                          sha256, size_bytes, created_at, parse_state)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+            (upload_id, control_id, key, username, info['original_name'], info['saved_name'], sha256, size_bytes,
+             datetime.now(), parse_state)
+        )
+        input_store.add_references(db, [info])
+        db.commit()
+
+        if parse_state == PARSE_PENDING:
+            future = self._get_executor().submit(preparse_table, saved_path, sha256, input_def.get('read_options') or {},
+                                                  config.PARSED_INPUTS_DIR)
+            future.add_done_callback(lambda f: self._record_parse(app, upload_id, f))
+        return self.get(upload_id)
+
+    def _record_parse(self, app, upload_id, future):
+        try:
+            outcome = future.result()
+            values = (PARSE_READY, None, outcome['rows'], outcome['seconds'])
+        except Exception as e:
+            values = (PARSE_FAILED, f"{type(e).__name__}: {e}", None, None)
+        try:
+            with app.app_context():
+                db = get_db()
+                db.execute(
+                    "UPDATE staged_inputs SET parse_state = ?, parse_error = ?, parsed_rows = ?, parse_seconds = ? WHERE upload_id = ?",
+                    values + (upload_id,)
+                )
+                db.commit()
+        except Exception as e:
+            print(f"Erreur lors de l'enregistrement de la lecture anticipée de '{upload_id}': {e}")
+
+    def get(self, upload_id):
+        row = get_db().execute("SELECT * FROM staged_inputs WHERE upload_id = ?", (upload_id,)).fetchone()
+        return dict(row) if row else None
+
+    def resolve(self, staged_ids, control_id, username, inputs_dir):
+        """
+        Fichiers envoyés à l'avance référencés au lancement d'une analyse ({clé d'entrée: upload_id}).
+        Retourne {clé: {'path', 'original_name', 'saved_name', 'sha256', 'size_bytes'}} et marque les fichiers comme utilisés.
+        Lève InvalidInputError si un identifiant est inconnu, appartient à un autre utilisateur ou à une autre entrée.
+        """
+        resolved = {}
+        if not staged_ids:
+            return resolved
+        db = get_db()
+        for key, upload_id in staged_ids.items():
+            row = db.execute("SELECT * FROM staged_inputs WHERE upload_id = ?", (upload_id,)).fetchone()
+            if not row or row['username'] != username or row['control_id'] != control_id or row['input_key'] != key:
+                raise InvalidInputError(key, "Fichier envoyé à l'avance introuvable : sélectionnez-le à nouveau.")
+            saved_path = os.path.join(inputs_dir, row['saved_name'])
+            if not os.path.isfile(saved_path):
+                raise InvalidInputError(key, "Fichier envoyé à l'avance introuvable : sélectionnez-le à nouveau.")
+            resolved[key] = {
+                'path': saved_path,
+                'original_name': row['original_name'],
+                'saved_name': row['saved_name'],
+                'sha256': row['sha256'],
+                'size_bytes': row['size_bytes'],
+            }
+            db.execute("UPDATE staged_inputs SET used_at = ? WHERE upload_id = ?", (datetime.now(), upload_id))
+        db.commit()
+        return resolved
+
+    def purge_expired(self, inputs_dir):
+        """
+        Oublie les fichiers envoyés à l'avance dont la dernière utilisation (ou l'envoi) remonte à plus de
+        STAGED_INPUT_TTL_SECONDS. Leur référence est rendue : le contenu est supprimé par la collecte
+        du stockage s'il ne sert à aucune exécution enregistrée.
+        """
+        db = get_db()
+        limit = datetime.now() - timedelta(seconds=config.STAGED_INPUT_TTL_SECONDS)
+        rows = db.execute(
+            "SELECT upload_id, saved_name, used_at FROM staged_inputs WHERE COALESCE(used_at, created_at) < ?", (limit,)
+        ).fetchall()
+        for row in rows:
+            if is_blob(row['saved_name']):
+                input_store.release_references(db, [dict(row)])
+            elif row['used_at'] is None:
+                # Fichier enregistré avant le stockage par contenu et jamais utilisé
+                try:
+                    os.remove(os.path.join(inputs_dir, row['saved_name']))
+                except OSError:
+                    pass
+            db.execute("DELETE FROM staged_inputs WHERE upload_id = ?", (row['upload_id'],))
+        if rows:
+            db.commit()
+        input_store.collect_garbage_if_due(db, inputs_dir)
+        return len(rows)
+
+
+input_staging = InputStaging()
+atexit.register(input_staging.shutdown)
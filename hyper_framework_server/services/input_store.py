@@ -0,0 +1,361 @@
+#---> NOUVEAU FICHIER : hyper_framework_server/services/input_store.py
+
+import hashlib
+import json
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+from werkzeug.exceptions import RequestEntityTooLarge
+from werkzeug.utils import secure_filename
+
+from .. import config
+from .compression import StreamDecompressor
+from .file_utils import file_sha256
+
+BLOBS_DIRNAME = 'blobs'
+PARTIAL_SUFFIX = '.part'
+
+_SHA256_PATTERN = re.compile(r'^[0-9a-f]{64}$')
+
+
+def _blob_name(sha256, filename):
+    """Nom relatif (à INPUTS_DIR) du fichier d'un contenu. L'extension d'origine est gardée : les scripts et pandas s'en servent."""
+    extension = os.path.splitext(secure_filename(filename or ''))[1].lower()
+    return f"{BLOBS_DIRNAME}/{sha256[:2]}/{sha256}{extension}"
+
+
+def is_sha256(value):
+    """True si value est un SHA-256 hexadécimal (minuscules) : seule forme acceptée pour désigner un contenu."""
+    return isinstance(value, str) and bool(_SHA256_PATTERN.match(value))
+
+
+def is_blob(saved_name):
+    """True si saved_name désigne un fichier du stockage par contenu (False pour les fichiers enregistrés avant)."""
+    return bool(saved_name) and saved_name.startswith(f"{BLOBS_DIRNAME}/")
+
+
+class IngestedFile:
+    """
+    Destination d'un fichier d'une requête multipart (voir upload_ingest) : les octets reçus sont écrits
+    directement dans le stockage (fichier .part), hachés et comptés au fil de l'eau. put_upload le range
+    ensuite par un simple renommage. Un fichier envoyé compressé (encoding) est décompressé à la volée :
+    le hash, la taille et la limite portent sur le contenu décompressé. Au-delà de max_bytes, la lecture
+    de la requête est interrompue (413). Le fichier .part est supprimé à la fermeture s'il n'a pas été rangé.
+    """
+
+    def __init__(self, path, max_bytes=None, encoding=None):
+        self.path = path
+        self.size_bytes = 0
+        self._file = open(path, 'w+b')
+        self._digest = hashlib.sha256()
+        self._max_bytes = max_bytes
+        self._kept = False
+        self._decompressor = StreamDecompressor(encoding) if encoding else None
+        self._error = None
+
+    def write(self, data):
+        if self._decompressor is None:
+            self._append(data)
+        elif self._error is None:
+            # Après une erreur, la suite de la partie est ignorée : verify() la signale
+            try:
+                for block in self._decompressor.feed(data):
+                    self._append(block)
+            except ValueError as e:
+                self._error = str(e)
+        return len(data)
+
+    def verify(self):
+        """Lève ValueError si le fichier reçu compressé est invalide ou incomplet."""
+        if self._error:
+            raise ValueError(self._error)
+        if self._decompressor is not None:
+            self._decompressor.check_complete()
+
+    def _append(self, data):
+        self.size_bytes += len(data)
+        if self._max_bytes and self.size_bytes > self._max_bytes:
+            raise RequestEntityTooLarge(f"Fichier trop volumineux (limite : {self._max_bytes // (1024 * 1024)} Mo par fichier).")
+        self._digest.update(data)
+        self._file.write(data)
+
+    @property
+    def sha256(self):
+        return self._digest.hexdigest()
+
+    def keep(self):
+        """Ferme le fichier reçu sans le supprimer, pour le ranger dans le stockage. Retourne son chemin."""
+        self._file.flush()
+        self._file.close()      # Un fichier ouvert ne peut pas être renommé sous Windows
+        self._kept = True
+        return self.path
+
+    def close(self):
+        self._file.close()
+        if not self._kept:
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
+
+    def __getattr__(self, name):
+        return getattr(self._file, name)
+
+
+class InputStore:
+    """
+    Fichiers d'entrée rangés par contenu : INPUTS_DIR/blobs/<2 premiers caractères>/<sha256><extension>.
+    Un même fichier envoyé plusieurs fois (chaque semaine, pour plusieurs contrôles...) n'est stocké qu'une fois,
+    et son SHA-256, calculé pendant l'écriture, est noté dans files_info.
+    La table input_blobs compte les références à chaque contenu : une exécution enregistrée dans analysis_runs
+    et un fichier envoyé à l'avance (staged_inputs) en posent une. La collecte supprime les contenus sans
+    référence depuis INPUT_BLOB_GRACE_SECONDS ; si INPUT_RUN_RETENTION_DAYS est défini, les exécutions plus
+    anciennes rendent d'abord leurs références (leurs fichiers ne peuvent alors plus être rejoués en backfill).
+    Les fichiers enregistrés avant le stockage par contenu restent à la racine d'INPUTS_DIR et ne sont pas collectés.
+    """
+
+    def __init__(self):
+        # Empêche la collecte de supprimer un contenu pendant qu'un envoi identique le réutilise
+        self._lock = threading.Lock()
+        self._last_collection = 0.0
+
+    def _blobs_dir(self, inputs_dir):
+        return os.path.join(inputs_dir, BLOBS_DIRNAME)
+
+    def put_stream(self, stream, filename, inputs_dir):
+        """
+        Enregistre un contenu lu depuis un flux binaire. Retourne (chemin, {'saved_name', 'sha256', 'size_bytes'}).
+        Si le contenu est déjà stocké, le fichier existant est réutilisé.
+        """
+        blobs_dir = self._blobs_dir(inputs_dir)
+        os.makedirs(blobs_dir, exist_ok=True)
+        digest = hashlib.sha256()
+        fd, partial_path = tempfile.mkstemp(dir=blobs_dir, suffix=PARTIAL_SUFFIX)
+        try:
+            with os.fdopen(fd, 'wb') as partial:
+                for chunk in iter(lambda: stream.read(1024 * 1024), b''):
+                    digest.update(chunk)
+                    partial.write(chunk)
+            return self.adopt(partial_path, filename, inputs_dir, digest.hexdigest())
+        except BaseException:
+            if os.path.exists(partial_path):
+                os.remove(partial_path)
+            raise
+
+    def adopt(self, path, filename, inputs_dir, sha256=None):
+        """
+        Range dans le stockage un fichier déjà écrit sur le même disque (il est déplacé, pas copié ; supprimé
+        si le contenu est déjà stocké). Retourne (chemin, {'saved_name', 'sha256', 'size_bytes'}).
+        """
+        sha256 = sha256 or file_sha256(path)
+        size_bytes = os.path.getsize(path)
+        saved_name = _blob_name(sha256, filename)
+        saved_path = os.path.join(inputs_dir, saved_name)
+        with self._lock:
+            if os.path.exists(saved_path):
+                os.remove(path)
+                os.utime(saved_path)    # Dernière utilisation : repousse la collecte
+            else:
+                os.makedirs(os.path.dirname(saved_path), exist_ok=True)
+                os.replace(path, saved_path)
+        return saved_path, {'saved_name': saved_name, 'sha256': sha256, 'size_bytes': size_bytes}
+
+    def open_ingest(self, inputs_dir, max_bytes=None, encoding=None):
+        """Fichier .part du stockage dans lequel une requête entrante écrit directement un fichier envoyé."""
+        blobs_dir = self._blobs_dir(inputs_dir)
+        os.makedirs(blobs_dir, exist_ok=True)
+        fd, partial_path = tempfile.mkstemp(dir=blobs_dir, suffix=PARTIAL_SUFFIX)
+        os.close(fd)
+        return IngestedFile(partial_path, max_bytes, encoding)
+
+    def put_upload(self, file, inputs_dir):
+        """
+        Range un fichier envoyé (FileStorage). S'il a été reçu directement dans le stockage (IngestedFile),
+        il est simplement renommé avec le hash calculé pendant la réception ; sinon il est copié (put_stream).
+        Lève ValueError si le fichier a été envoyé compressé et n'a pas pu être décompressé.
+        """
+        stream = file.stream
+        if isinstance(stream, IngestedFile):
+            stream.verify()
+        if isinstance(stream, IngestedFile) and os.path.dirname(stream.path) == self._blobs_dir(inputs_dir):
+            return self.adopt(stream.keep(), file.filename, inputs_dir, stream.sha256)
+        return self.put_stream(stream, file.filename, inputs_dir)
+
+    def put_file(self, source_path, inputs_dir, filename=None):
+        """Copie un fichier existant dans le stockage (voir put_stream)."""
+        with open(source_path, 'rb') as source:
+            return self.put_stream(source, filename or os.path.basename(source_path), inputs_dir)
+
+    def find(self, sha256, inputs_dir):
+        """Chemin d'un fichier stocké avec ce contenu (quelle que soit son extension), ou None."""
+        if not is_sha256(sha256):
+            return None
+        try:
+            entries = os.scandir(os.path.join(self._blobs_dir(inputs_dir), sha256[:2]))
+        except FileNotFoundError:
+            return None
+        with entries:
+            for entry in entries:
+                if entry.name.startswith(sha256) and not entry.name.endswith(PARTIAL_SUFFIX):
+                    return entry.path
+        return None
+
+    def known_hashes(self, hashes, inputs_dir):
+        """
+        Parmi hashes, ceux dont le contenu est déjà stocké. Leur date d'utilisation est rafraîchie, pour que
+        la collecte ne les supprime pas entre cette question du client et le lancement de l'analyse.
+        """
+        known = []
+        with self._lock:
+            for sha256 in dict.fromkeys(h for h in hashes if is_sha256(h)):
+                path = self.find(sha256, inputs_dir)
+                if path:
+                    os.utime(path)
+                    known.append(sha256)
+        return known
+
+    def get(self, sha256, filename, inputs_dir):
+        """
+        Fichier déjà stocké désigné par son contenu, sous l'extension de filename (créée par lien ou copie
+        si le contenu n'est stocké que sous une autre). Retourne (chemin, {'saved_name', 'sha256', 'size_bytes'})
+        ou None si le contenu est inconnu.
+        """
+        if not is_sha256(sha256):
+            return None
+        saved_name = _blob_name(sha256, filename)
+        saved_path = os.path.join(inputs_dir, saved_name)
+        with self._lock:
+            if os.path.exists(saved_path):
+                os.utime(saved_path)
+            else:
+                source_path = self.find(sha256, inputs_dir)
+                if source_path is None:
+                    return None
+                try:
+                    os.link(source_path, saved_path)
+                except OSError:
+                    shutil.copyfile(source_path, saved_path)
+        return saved_path, {'saved_name': saved_name, 'sha256': sha256, 'size_bytes': os.path.getsize(saved_path)}
+
+    def add_references(self, db, files_info):
+        """Pose une référence sur chaque contenu de files_info. Ne valide pas la transaction."""
+        now = datetime.now()
+        for info in files_info:
+            if not is_blob(info.get('saved_name')) or not info.get('sha256'):
+                continue
+            db.execute(
+                """INSERT INTO input_blobs (saved_name, sha256, size_bytes, ref_count, created_at, last_used_at)
+                   VALUES (?, ?, ?, 1, ?, ?)
+                   ON CONFLICT(saved_name) DO UPDATE SET ref_count = ref_count + 1, last_used_at = excluded.last_used_at""",
+                (info['saved_name'], info['sha256'], info.get('size_bytes'), now, now)
+            )
+
+    def release_references(self, db, files_info):
+        """Retire une référence à chaque contenu de files_info. Ne valide pas la transaction."""
+        now = datetime.now()
+        for info in files_info:
+            if is_blob(info.get('saved_name')):
+                db.execute(
+                    "UPDATE input_blobs SET ref_count = MAX(ref_count - 1, 0), last_used_at = ? WHERE saved_name = ?",
+                    (now, info['saved_name'])
+                )
+
+    def _release_expired_runs(self, db):
+        """Règle de conservation : les exécutions plus anciennes que INPUT_RUN_RETENTION_DAYS rendent leurs références."""
+        if not config.INPUT_RUN_RETENTION_DAYS:
+            return 0
+        # executed_at est rempli par CURRENT_TIMESTAMP (UTC) : la limite est calculée sur la même horloge
+        limit = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(days=config.INPUT_RUN_RETENTION_DAYS)
+        rows = db.execute(
+            "SELECT id, files_info FROM analysis_runs WHERE COALESCE(inputs_released, 0) = 0 AND executed_at < ?", (limit,)
+        ).fetchall()
+        for row in rows:
+            self.release_references(db, json.loads(row['files_info']) if row['files_info'] else [])
+            db.execute("UPDATE analysis_runs SET inputs_released = 1 WHERE id = ?", (row['id'],))
+        return len(rows)
+
+    def collect_garbage(self, db, inputs_dir):
+        """
+        Supprime les contenus sans référence qui n'ont pas servi depuis INPUT_BLOB_GRACE_SECONDS
+        (ainsi que les écritures interrompues). Retourne {'released_runs', 'deleted', 'freed_bytes'}.
+        """
+        released_runs = self._release_expired_runs(db)
+        db.commit()
+        referenced = {row['saved_name']: row for row in db.execute("SELECT saved_name, ref_count, last_used_at FROM input_blobs")}
+        limit = time.time() - config.INPUT_BLOB_GRACE_SECONDS
+        deleted, freed_bytes = [], 0
+        blobs_dir = self._blobs_dir(inputs_dir)
+        with self._lock:
+            for root, _, filenames in os.walk(blobs_dir):
+                for filename in filenames:
+                    path = os.path.join(root, filename)
+                    saved_name = os.path.relpath(path, inputs_dir).replace(os.sep, '/')
+                    row = referenced.get(saved_name)
+                    if row is not None and row['ref_count'] > 0:
+                        continue
+                    try:
+                        stat = os.stat(path)
+                        last_used = max(stat.st_mtime, row['last_used_at'].timestamp() if row is not None and row['last_used_at'] else 0)
+                        if last_used > limit:
+                            continue
+                        os.remove(path)
+                    except OSError:
+                        continue
+                    freed_bytes += stat.st_size
+                    if not filename.endswith(PARTIAL_SUFFIX):
+                        deleted.append(saved_name)
+        # Lignes sans fichier (contenu supprimé à la main) ou dont le fichier vient d'être supprimé
+        missing = [(name,) for name, row in referenced.items()
+                   if row['ref_count'] == 0 and not os.path.exists(os.path.join(inputs_dir, name))]
+        if missing:
+            db.executemany("DELETE FROM input_blobs WHERE saved_name = ? AND ref_count = 0", missing)
+        db.commit()
+        self._last_collection = time.time()
+        return {'released_runs': released_runs, 'deleted': len(deleted), 'freed_bytes': freed_bytes}
+
+    def collect_garbage_if_due(self, db, inputs_dir):
+        """Collecte au plus une fois par INPUT_GC_INTERVAL_SECONDS (appelée après les envois et les exécutions)."""
+        if time.time() - self._last_collection < config.INPUT_GC_INTERVAL_SECONDS:
+            return None
+        try:
+            return self.collect_garbage(db, inputs_dir)
+        except Exception as e:
+            self._last_collection = time.time()
+            print(f"Erreur lors de la collecte des fichiers d'entrée: {e}")
+            return None
+
+    def stats(self, db, inputs_dir):
+        """Occupation du stockage : contenus (référencés ou non) et fichiers enregistrés avant le stockage par contenu."""
+        blobs, blob_bytes = 0, 0
+        for root, _, filenames in os.walk(self._blobs_dir(inputs_dir)):
+            for filename in filenames:
+                if not filename.endswith(PARTIAL_SUFFIX):
+                    blobs += 1
+                    blob_bytes += os.path.getsize(os.path.join(root, filename))
+        legacy_files, legacy_bytes = 0, 0
+        if os.path.isdir(inputs_dir):
+            for entry in os.scandir(inputs_dir):
+                if entry.is_file():
+                    legacy_files += 1
+                    legacy_bytes += entry.stat().st_size
+        row = db.execute(
+            "SELECT COUNT(*) AS referenced, COALESCE(SUM(ref_count), 0) AS refs FROM input_blobs WHERE ref_count > 0"
+        ).fetchone()
+        return {
+            'blobs': blobs,
+            'blob_bytes': blob_bytes,
+            'referenced_blobs': row['referenced'],
+            'references': row['refs'],
+            'legacy_files': legacy_files,
+            'legacy_bytes': legacy_bytes,
+            'grace_seconds': config.INPUT_BLOB_GRACE_SECONDS,
+            'run_retention_days': config.INPUT_RUN_RETENTION_DAYS,
+        }
+
+
+input_store = InputStore()
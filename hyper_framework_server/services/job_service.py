@@ -0,0 +1,564 @@
+#---> NOUVEAU FICHIER : hyper_framework_server/services/job_service.py
+
+import json
+import os
+import threading
+import time
+import traceback
+import uuid
+from datetime import datetime
+
+from flask import current_app
+
+from .. import config
+from ..database.database import get_db
+from .analysis_service import run_control_analysis, RunProfile, save_run_profile
+from .exceptions import MemoryBudgetExceeded, ScriptCancelled, ScriptLimitExceeded
+from .logging_service import logging_service
+from .run_scheduler import RunTicket, run_scheduler, PRIORITY_INTERACTIVE, PRIORITY_RANKS
+
+JOB_QUEUED = 'queued'
+JOB_RUNNING = 'running'
+JOB_DONE = 'done'
+JOB_FAILED = 'failed'
+JOB_CANCELLED = 'cancelled'
+
+FINISHED_STATES = {JOB_DONE, JOB_FAILED, JOB_CANCELLED}
+
+EXECUTION_MODE_QUEUE = 'queue'
+
+
+class AnalysisJob:
+    """Une exécution de contrôle soumise de manière asynchrone."""
+
+    def __init__(self, control_id, control_name, script_path, input_file_paths, files_info, username, week_label,
+                 priority=PRIORITY_INTERACTIVE, profile=None, campaign_id=None, input_hashes=None, source_run_id=None,
+                 job_id=None, submitted_at=None):
+        self.id = job_id or uuid.uuid4().hex
+        self.control_id = control_id
+        self.control_name = control_name
+        self.script_path = script_path
+        self.input_file_paths = input_file_paths
+        self.files_info = files_info
+        self.username = username
+        self.week_label = week_label
+        self.state = JOB_QUEUED
+        self.submitted_at = submitted_at or datetime.now()
+        self.started_at = None
+        self.finished_at = None
+        self.results = None
+        self.run_id = None
+        self.run_uid = None
+        self.artifacts = []
+        self.cache_hit = False
+        self.error = None
+        self.cancel_event = threading.Event()
+        self.ticket = RunTicket(username, control_id, priority)
+        self.profile = profile or RunProfile()
+        self.campaign_id = campaign_id
+        self.input_hashes = input_hashes
+        self.source_run_id = source_run_id
+        self.events = []
+        self.progress = None
+        self.stage_timings = {}     # étape -> (secondes au premier événement, secondes au dernier)
+        self._events_condition = threading.Condition()
+        # Exécution par un processus run_worker.py (JOB_EXECUTION_MODE = 'queue')
+        self.queued_remotely = False
+        self.remote_queue_position = None
+        self.events_synced = 0      # Dernier événement échangé avec la table job_events
+        self.worker_id = None       # Worker run_worker.py qui a réservé le job (et en détient le bail)
+        self.add_event('state', message=JOB_QUEUED)
+
+    @property
+    def is_finished(self):
+        return self.state in FINISHED_STATES
+
+    def add_event(self, event_type, stage=None, fraction=None, message=None, elapsed_seconds=None):
+        """
+        Ajoute un événement ('state' ou 'progress') au journal du job, horodaté par le serveur
+        en secondes depuis la soumission (ou elapsed_seconds pour un événement relayé par un worker distant),
+        et réveille les flux qui l'attendent.
+        """
+        with self._events_condition:
+            elapsed = elapsed_seconds if elapsed_seconds is not None else round((datetime.now() - self.submitted_at).total_seconds(), 3)
+            event = {
+                'id': len(self.events) + 1,
+                'type': event_type,
+                'stage': stage,
+                'fraction': fraction,
+                'message': message,
+                'elapsed_seconds': elapsed,
+            }
+            self.events.append(event)
+            if event_type == 'progress':
+                self.progress = event
+                if stage:
+                    first_seen = self.stage_timings.get(stage, (elapsed, elapsed))[0]
+                    self.stage_timings[stage] = (first_seen, elapsed)
+            self._events_condition.notify_all()
+            return event
+
+    def add_progress(self, event):
+        """Relaie un événement émis par le script (sdk.progress) depuis le worker."""
+        self.add_event('progress', event.get('stage'), event.get('fraction'), event.get('message'))
+
+    def wait_for_events(self, after_id, timeout):
+        """Retourne les événements d'identifiant > after_id, en attendant au plus timeout secondes s'il n'y en a pas."""
+        with self._events_condition:
+            if len(self.events) <= after_id and not self.is_finished:
+                self._events_condition.wait(timeout)
+            return self.events[after_id:]
+
+    def stages_to_dict(self):
+        with self._events_condition:
+            return [
+                {'stage': stage, 'started_seconds': first, 'duration_seconds': round(last - first, 3)}
+                for stage, (first, last) in self.stage_timings.items()
+            ]
+
+    def _queue_position(self):
+        if self.state != JOB_QUEUED:
+            return None
+        if self.queued_remotely:
+            return self.remote_queue_position
+        return run_scheduler.queue_position(self.ticket)
+
+    def _admission(self):
+        """Prévision mémoire de l'exécution et, tant qu'elle attend, raison de l'attente (planificateur local)."""
+        if self.ticket.memory_estimate is None:
+            return None
+        waiting_reason = run_scheduler.waiting_reason(self.ticket) if self.state == JOB_QUEUED else None
+        return {**self.ticket.memory_estimate, 'waiting_reason': waiting_reason}
+
+    def _seconds_between(self, start, end):
+        if not start:
+            return None
+        return round(((end or datetime.now()) - start).total_seconds(), 3)
+
+    def to_dict(self, include_results=True):
+        data = {
+            'job_id': self.id,
+            'control_id': self.control_id,
+            'control_name': self.control_name,
+            'username': self.username,
+            'week_label': self.week_label,
+            'campaign_id': self.campaign_id,
+            'source_run_id': self.source_run_id,
+            'state': self.state,
+            'priority': self.ticket.priority,
+            'queue_position': self._queue_position(),
+            'admission': self._admission(),
+            'submitted_at': self.submitted_at.isoformat(),
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+            'queued_seconds': self._seconds_between(self.submitted_at, self.started_at or self.finished_at),
+            'running_seconds': self._seconds_between(self.started_at, self.finished_at),
+            'run_id': self.run_id,
+            'run_uid': self.run_uid,
+            'artifacts': self.artifacts,
+            'cache_hit': self.cache_hit,
+            'error': self.error,
+            'progress': self.progress,
+            'stages': self.stages_to_dict(),
+        }
+        if include_results and self.state == JOB_DONE:
+            data['results'] = self.results
+        return data
+
+
+def _path_relative_to(path, base_dir):
+    """Chemin relatif à base_dir s'il s'y trouve, chemin absolu sinon."""
+    relative = os.path.relpath(os.path.abspath(path), os.path.abspath(base_dir))
+    return os.path.abspath(path) if relative.startswith(os.pardir) else relative.replace(os.sep, '/')
+
+
+class JobQueue:
+    """
+    File des jobs partagée par le serveur et les processus run_worker.py, stockée dans la base
+    (tables job_queue et job_events). Utilisée quand JOB_EXECUTION_MODE vaut 'queue'.
+    Les chemins des scripts et des fichiers d'entrée sont enregistrés relativement à SCRIPTS_DIR et
+    INPUTS_DIR : chaque worker les résout avec sa propre configuration du dossier data.
+    Un worker prolonge régulièrement le bail de ses jobs ; un job dont le bail a expiré (worker arrêté
+    brutalement) est remis en file, au plus JOB_QUEUE_MAX_ATTEMPTS fois.
+    """
+
+    # Prochain job admissible : mêmes plafonds et même ordre que le planificateur local
+    # (interactif d'abord, puis l'utilisateur qui a le moins d'exécutions en cours, puis le plus ancien)
+    _CLAIM_SQL = """
+        SELECT q.*,
+               (SELECT COUNT(*) FROM job_queue r WHERE r.state = 'running' AND r.username = q.username) AS user_running
+        FROM job_queue q
+        WHERE q.state = 'queued'
+          AND (SELECT COUNT(*) FROM job_queue r WHERE r.state = 'running' AND r.username = q.username) < ?
+          AND (SELECT COUNT(*) FROM job_queue r WHERE r.state = 'running' AND r.control_id = q.control_id) < ?
+        ORDER BY q.priority_rank, user_running, q.seq
+        LIMIT 1
+    """
+
+    def enqueue(self, job, scripts_dir, inputs_dir):
+        db = get_db()
+        db.execute(
+            """INSERT INTO job_queue
+               (job_id, control_id, control_name, script_filename, inputs_json, files_info, input_hashes_json,
+                username, week_label, priority, priority_rank, campaign_id, source_run_id, profile_json, state, submitted_at)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+            (job.id, job.control_id, job.control_name, _path_relative_to(job.script_path, scripts_dir),
+             json.dumps({key: _path_relative_to(path, inputs_dir) for key, path in job.input_file_paths.items()}),
+             json.dumps(job.files_info), json.dumps(job.input_hashes) if job.input_hashes else None,
+             job.username, job.week_label, job.ticket.priority, PRIORITY_RANKS[job.ticket.priority],
+             job.campaign_id, job.source_run_id, json.dumps(job.profile.server), JOB_QUEUED, job.submitted_at.isoformat())
+        )
+        db.commit()
+
+    def job_from_row(self, row, scripts_dir, inputs_dir):
+        """Reconstruit un AnalysisJob à partir de sa ligne de job_queue."""
+        profile = RunProfile()
+        profile.server.update(json.loads(row['profile_json'] or '{}'))
+        job = AnalysisJob(
+            row['control_id'], row['control_name'], os.path.join(scripts_dir, row['script_filename']),
+            {key: os.path.join(inputs_dir, path) for key, path in json.loads(row['inputs_json']).items()},
+            json.loads(row['files_info'] or '[]'), row['username'], row['week_label'], row['priority'], profile,
+            row['campaign_id'], json.loads(row['input_hashes_json']) if row['input_hashes_json'] else None,
+            row['source_run_id'], job_id=row['job_id'], submitted_at=datetime.fromisoformat(row['submitted_at'])
+        )
+        job.queued_remotely = True
+        return job
+
+    def get_row(self, job_id):
+        return get_db().execute("SELECT * FROM job_queue WHERE job_id = ?", (job_id,)).fetchone()
+
+    def claim(self, worker_id):
+        """Attribue au worker le prochain job admissible et le passe à l'état 'running'. Retourne sa ligne, ou None."""
+        db = get_db()
+        db.execute("BEGIN IMMEDIATE")   # Un seul worker à la fois choisit un job
+        try:
+            row = db.execute(self._CLAIM_SQL, (config.RUN_MAX_PER_USER, config.RUN_MAX_PER_CONTROL)).fetchone()
+            if row:
+                db.execute(
+                    """UPDATE job_queue SET state = ?, worker_id = ?, attempts = attempts + 1, started_at = ?,
+                              lease_expires_at = ? WHERE seq = ?""",
+                    (JOB_RUNNING, worker_id, datetime.now().isoformat(), time.time() + config.JOB_QUEUE_LEASE_SECONDS, row['seq'])
+                )
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        return row
+
+    def heartbeat(self, worker_id, jobs):
+        """
+        Prolonge le bail des jobs du worker et enregistre leurs nouveaux événements d'avancement.
+        Retourne les identifiants des jobs dont l'annulation a été demandée.
+        """
+        db = get_db()
+        lease = time.time() + config.JOB_QUEUE_LEASE_SECONDS
+        cancelled = set()
+        for job in jobs:
+            self._flush_progress_events(db, job)
+            db.execute("UPDATE job_queue SET lease_expires_at = ? WHERE job_id = ? AND worker_id = ?", (lease, job.id, worker_id))
+            row = db.execute("SELECT cancel_requested FROM job_queue WHERE job_id = ?", (job.id,)).fetchone()
+            if row and row['cancel_requested']:
+                cancelled.add(job.id)
+        db.commit()
+        return cancelled
+
+    def _flush_progress_events(self, db, job):
+        events = [event for event in list(job.events) if event['type'] == 'progress' and event['id'] > job.events_synced]
+        for event in events:
+            db.execute(
+                "INSERT INTO job_events (job_id, type, stage, fraction, message, elapsed_seconds) VALUES (?, ?, ?, ?, ?, ?)",
+                (job.id, event['type'], event['stage'], event['fraction'], event['message'], event['elapsed_seconds'])
+            )
+        if events:
+            job.events_synced = events[-1]['id']
+
+    def holds_lease(self, db, job_id, worker_id):
+        """Vrai si le worker a toujours le job (bail en cours) : sinon le job a pu être remis en file et confié à un autre."""
+        row = db.execute(
+            "SELECT 1 FROM job_queue WHERE job_id = ? AND worker_id = ? AND state = ? AND lease_expires_at >= ?",
+            (job_id, worker_id, JOB_RUNNING, time.time())
+        ).fetchone()
+        return row is not None
+
+    def complete(self, worker_id, job):
+        """Enregistre l'issue d'un job exécuté par le worker (ses résultats sont dans analysis_runs)."""
+        db = get_db()
+        self._flush_progress_events(db, job)
+        db.execute(
+            """UPDATE job_queue SET state = ?, error = ?, finished_at = ?, run_id = ?, run_uid = ?, artifacts_json = ?,
+                      cache_hit = ?, lease_expires_at = NULL
+               WHERE job_id = ? AND worker_id = ?""",
+            (job.state, job.error, (job.finished_at or datetime.now()).isoformat(), job.run_id, job.run_uid,
+             json.dumps(job.artifacts), int(job.cache_hit), job.id, worker_id)
+        )
+        db.commit()
+
+    def release(self, worker_id, job_ids):
+        """
+        Remet aussitôt en file les jobs d'un worker qui s'arrête, sans compter la tentative interrompue.
+        Le worker perd le job : son exécution en cours n'est pas enregistrée (holds_lease, complete).
+        """
+        if not job_ids:
+            return
+        db = get_db()
+        placeholders = ', '.join('?' * len(job_ids))
+        db.execute(
+            f"""UPDATE job_queue SET state = ?, worker_id = NULL, started_at = NULL, lease_expires_at = NULL,
+                       attempts = MAX(attempts - 1, 0)
+                WHERE job_id IN ({placeholders}) AND worker_id = ? AND state = ? AND cancel_requested = 0""",
+            (JOB_QUEUED, *job_ids, worker_id, JOB_RUNNING)
+        )
+        db.commit()
+
+    def request_cancel(self, job_id):
+        """Demande l'annulation : immédiate si le job attend encore, transmise à son worker sinon."""
+        db = get_db()
+        db.execute("UPDATE job_queue SET cancel_requested = 1 WHERE job_id = ?", (job_id,))
+        db.execute(
+            "UPDATE job_queue SET state = ?, error = ?, finished_at = ? WHERE job_id = ? AND state = ?",
+            (JOB_CANCELLED, "Exécution annulée avant son démarrage.", datetime.now().isoformat(), job_id, JOB_QUEUED)
+        )
+        db.commit()
+
+    def requeue_expired(self):
+        """Remet en file les jobs dont le worker ne prolonge plus le bail (ou les abandonne après JOB_QUEUE_MAX_ATTEMPTS)."""
+        db = get_db()
+        now = time.time()
+        db.execute(
+            """UPDATE job_queue SET state = ?, error = ?, finished_at = ?
+               WHERE state = ? AND lease_expires_at < ? AND attempts >= ?""",
+            (JOB_FAILED, "Le worker chargé de l'exécution ne répond plus.", datetime.now().isoformat(),
+             JOB_RUNNING, now, config.JOB_QUEUE_MAX_ATTEMPTS)
+        )
+        db.execute(
+            """UPDATE job_queue SET state = ?, worker_id = NULL, started_at = NULL, lease_expires_at = NULL
+               WHERE state = ? AND lease_expires_at < ? AND cancel_requested = 0""",
+            (JOB_QUEUED, JOB_RUNNING, now)
+        )
+        db.execute(
+            """UPDATE job_queue SET state = ?, finished_at = ?
+               WHERE state = ? AND lease_expires_at < ?""",
+            (JOB_CANCELLED, datetime.now().isoformat(), JOB_RUNNING, now)
+        )
+        db.commit()
+
+    def fetch_updates(self, job_id, after_event_id):
+        """Ligne du job et événements d'avancement d'identifiant > after_event_id."""
+        db = get_db()
+        row = self.get_row(job_id)
+        events = db.execute("SELECT * FROM job_events WHERE job_id = ? AND id > ? ORDER BY id", (job_id, after_event_id)).fetchall()
+        return row, events
+
+    def position(self, row):
+        """Position (à partir de 1) d'un job en attente, selon la priorité puis l'ordre d'arrivée."""
+        return get_db().execute(
+            """SELECT COUNT(*) FROM job_queue WHERE state = ?
+               AND (priority_rank < ? OR (priority_rank = ? AND seq <= ?))""",
+            (JOB_QUEUED, row['priority_rank'], row['priority_rank'], row['seq'])
+        ).fetchone()[0]
+
+    def snapshot(self):
+        db = get_db()
+        columns = "job_id, control_id, username, priority, worker_id, submitted_at, started_at, attempts"
+        return {
+            'mode': EXECUTION_MODE_QUEUE,
+            'limits': {
+                'max_per_user': config.RUN_MAX_PER_USER,
+                'max_per_control': config.RUN_MAX_PER_CONTROL,
+            },
+            'running': [dict(row) for row in db.execute(f"SELECT {columns} FROM job_queue WHERE state = ? ORDER BY started_at", (JOB_RUNNING,))],
+            'waiting': [
+                dict(row, position=i + 1) for i, row in enumerate(db.execute(
+                    f"SELECT {columns} FROM job_queue WHERE state = ? ORDER BY priority_rank, seq", (JOB_QUEUED,)
+                ))
+            ],
+        }
+
+    def prune(self):
+        """Supprime les jobs terminés depuis plus de JOB_RETENTION_SECONDS (leurs exécutions restent dans analysis_runs)."""
+        db = get_db()
+        cutoff = datetime.fromtimestamp(time.time() - config.JOB_RETENTION_SECONDS).isoformat()
+        placeholders = ', '.join('?' for _ in FINISHED_STATES)
+        expired = f"SELECT job_id FROM job_queue WHERE state IN ({placeholders}) AND finished_at < ?"
+        db.execute(f"DELETE FROM job_events WHERE job_id IN ({expired})", (*FINISHED_STATES, cutoff))
+        db.execute(f"DELETE FROM job_queue WHERE job_id IN ({expired})", (*FINISHED_STATES, cutoff))
+        db.commit()
+
+
+class JobManager:
+    """
+    Registre en mémoire des jobs d'analyse. Chaque job s'exécute dans son propre thread,
+    qui délègue le script au pool de workers : la requête HTTP de soumission rend la main immédiatement.
+    En mode 'queue' (JOB_EXECUTION_MODE), les jobs sont placés dans job_queue et exécutés par les
+    processus run_worker.py ; un thread de suivi reporte leur état et leur avancement sur les jobs en mémoire.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._jobs = {}
+        self._queue_sync_thread = None
+
+    def submit(self, app, control_id, control_name, script_path, input_file_paths, files_info, username, week_label,
+               priority=PRIORITY_INTERACTIVE, profile=None, campaign_id=None, input_hashes=None, source_run_id=None):
+        job = AnalysisJob(control_id, control_name, script_path, input_file_paths, files_info, username, week_label,
+                          priority, profile, campaign_id, input_hashes, source_run_id)
+        if config.JOB_EXECUTION_MODE == EXECUTION_MODE_QUEUE:
+            job.queued_remotely = True
+            job_queue.enqueue(job, app.config['SCRIPTS_DIR'], app.config['INPUTS_DIR'])
+            job.remote_queue_position = job_queue.position(job_queue.get_row(job.id))
+            self._register(job)
+            self._ensure_queue_sync(app)
+            return job
+        self._register(job)
+        thread = threading.Thread(target=self.execute_job, args=(app, job), daemon=True, name=f"job-{job.id[:8]}")
+        thread.start()
+        return job
+
+    def _register(self, job):
+        with self._lock:
+            self._prune_finished_jobs()
+            self._jobs[job.id] = job
+
+    def get(self, job_id):
+        """
+        Retourne le job, ou None s'il est inconnu. En mode 'queue', un job absent de la mémoire
+        (soumis avant un redémarrage du serveur) est rechargé depuis job_queue : appeler dans un contexte d'application.
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job or config.JOB_EXECUTION_MODE != EXECUTION_MODE_QUEUE:
+            return job
+        row = job_queue.get_row(job_id)
+        if not row:
+            return None
+        app = current_app._get_current_object()
+        job = job_queue.job_from_row(row, app.config['SCRIPTS_DIR'], app.config['INPUTS_DIR'])
+        self._apply_queue_updates(job, row, [])
+        with self._lock:
+            job = self._jobs.setdefault(job_id, job)
+        self._ensure_queue_sync(app)
+        return job
+
+    def cancel(self, job_id):
+        """Demande l'annulation d'un job. Retourne le job, ou None s'il est inconnu."""
+        job = self.get(job_id)
+        if job and not job.is_finished:
+            if job.queued_remotely:
+                job_queue.request_cancel(job.id)
+            job.cancel_event.set()
+            run_scheduler.wake_up()
+        return job
+
+    def _ensure_queue_sync(self, app):
+        with self._lock:
+            if self._queue_sync_thread and self._queue_sync_thread.is_alive():
+                return
+            self._queue_sync_thread = threading.Thread(target=self._sync_queued_jobs, args=(app,), daemon=True, name="job-queue-sync")
+            self._queue_sync_thread.start()
+
+    def _sync_queued_jobs(self, app):
+        """Reporte périodiquement sur les jobs en mémoire l'état et les événements enregistrés par les workers."""
+        while True:
+            time.sleep(config.JOB_QUEUE_POLL_SECONDS)
+            try:
+                with app.app_context():
+                    job_queue.requeue_expired()
+                    with self._lock:
+                        jobs = [job for job in self._jobs.values() if job.queued_remotely and not job.is_finished]
+                    for job in jobs:
+                        row, events = job_queue.fetch_updates(job.id, job.events_synced)
+                        if row:
+                            self._apply_queue_updates(job, row, events)
+                    job_queue.prune()
+            except Exception as e:
+                print(f"Erreur lors du suivi de la file des jobs: {e}")
+
+    def _apply_queue_updates(self, job, row, events):
+        for event in events:
+            job.add_event('progress', event['stage'], event['fraction'], event['message'], elapsed_seconds=event['elapsed_seconds'])
+            job.events_synced = event['id']
+        job.remote_queue_position = job_queue.position(row) if row['state'] == JOB_QUEUED else None
+        if row['state'] == JOB_RUNNING and job.state == JOB_QUEUED:
+            job.state = JOB_RUNNING
+            job.started_at = datetime.fromisoformat(row['started_at'])
+            job.add_event('state', message=JOB_RUNNING)
+        elif row['state'] == JOB_QUEUED and job.state == JOB_RUNNING:
+            # Worker disparu : le job a été remis en file
+            job.state, job.started_at = JOB_QUEUED, None
+            job.add_event('state', message=JOB_QUEUED)
+        elif row['state'] in FINISHED_STATES:
+            job.started_at = datetime.fromisoformat(row['started_at']) if row['started_at'] else job.started_at
+            job.run_id, job.run_uid = row['run_id'], row['run_uid']
+            job.artifacts = json.loads(row['artifacts_json'] or '[]')
+            job.cache_hit = bool(row['cache_hit'])
+            state, error = row['state'], row['error']
+            if state == JOB_DONE:
+                run = get_db().execute("SELECT results_json FROM analysis_runs WHERE id = ?", (job.run_id,)).fetchone()
+                if run:
+                    job.results = json.loads(run['results_json'])
+                else:
+                    state, error = JOB_FAILED, "Résultats introuvables dans l'historique des analyses."
+            self._finish(job, state, error, datetime.fromisoformat(row['finished_at']) if row['finished_at'] else None)
+
+    def _prune_finished_jobs(self):
+        """Oublie les jobs terminés depuis plus de JOB_RETENTION_SECONDS."""
+        now = datetime.now()
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job.is_finished and (now - job.finished_at).total_seconds() > config.JOB_RETENTION_SECONDS
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    def _finish(self, job, state, error=None, finished_at=None):
+        # L'état est modifié en dernier : un job vu terminé (_prune_finished_jobs) a toujours sa date de fin
+        job.error = error
+        job.finished_at = finished_at or datetime.now()
+        job.state = state
+        job.add_event('state', message=state)
+
+    def execute_job(self, app, job):
+        """Exécute le job dans le thread appelant (thread dédié du serveur, ou processus run_worker.py)."""
+        log_details = {'control_id': job.control_id, 'control_name': job.control_name, 'job_id': job.id}
+        if job.campaign_id:
+            log_details['campaign_id'] = job.campaign_id
+        if job.source_run_id:
+            log_details['source_run_id'] = job.source_run_id
+        with app.app_context():
+            try:
+                def mark_running():
+                    job.state = JOB_RUNNING
+                    job.started_at = datetime.now()
+                    job.add_event('state', message=JOB_RUNNING)
+
+                # Le planificateur (plafonds global, utilisateur et contrôle) est sollicité sauf si le résultat est en cache
+                job.results, run_info = run_control_analysis(
+                    job.control_id, job.control_name, job.script_path, job.input_file_paths, job.files_info,
+                    job.username, job.week_label, app.config['OUTPUTS_DIR'],
+                    ticket=job.ticket, cancel_event=job.cancel_event, on_start=mark_running,
+                    on_progress=job.add_progress, profile=job.profile,
+                    campaign_id=job.campaign_id, input_hashes=job.input_hashes, source_run_id=job.source_run_id,
+                    holds_lease=(lambda db: job_queue.holds_lease(db, job.id, job.worker_id)) if job.worker_id else None,
+                    # Un backfill (source_run_id) recalcule l'exécution passée : jamais de reprise du cache des résultats
+                    use_cache=job.source_run_id is None
+                )
+                job.run_id, job.run_uid, job.artifacts = run_info['run_id'], run_info['run_uid'], run_info['artifacts']
+                job.cache_hit = run_info['cache_hit']
+                with job.profile.measure('logging'):
+                    logging_service.log_action(job.username, 'ANALYSIS_EXECUTE', 'SUCCESS', {**log_details, 'week_label': job.week_label, 'cache_hit': job.cache_hit})
+                save_run_profile(job.run_id, job.profile)
+                self._finish(job, JOB_DONE)
+            except ScriptCancelled as e:
+                self._finish(job, JOB_CANCELLED, str(e))
+                logging_service.log_action(job.username, 'ANALYSIS_EXECUTE', 'CANCELLED', log_details)
+            except (ScriptLimitExceeded, MemoryBudgetExceeded) as e:
+                self._finish(job, JOB_FAILED, str(e))
+                logging_service.log_action(job.username, 'ANALYSIS_EXECUTE', 'FAILURE', {**log_details, 'error': str(e), **e.to_log_details()})
+            except Exception as e:
+                traceback.print_exc()
+                self._finish(job, JOB_FAILED, f"Erreur serveur: {e}")
+                logging_service.log_action(job.username, 'ANALYSIS_EXECUTE', 'FAILURE', {**log_details, 'error': str(e)})
+
+
+job_queue = JobQueue()
+job_manager = JobManager()
@@ -0,0 +1,120 @@
+#---> NOUVEAU FICHIER : hyper_framework_server/services/queue_worker.py
+
+import os
+import socket
+import threading
+import time
+import traceback
+import uuid
+
+from .. import config
+from .job_service import job_manager, job_queue
+from .warmup import server_warmup
+
+
+class QueueWorker:
+    """
+    Processus d'exécution des jobs de job_queue (lancé par run_worker.py).
+    Il réserve jusqu'à concurrency jobs à la fois, les exécute avec le pool de workers local, et
+    enregistre les résultats dans la base et le dossier data partagés avec le serveur. Un thread
+    prolonge le bail des jobs en cours, transmet leur avancement et relaie les demandes d'annulation.
+    """
+
+    def __init__(self, app, worker_id=None, concurrency=None):
+        self.app = app
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:4]}"
+        self.concurrency = max(1, int(concurrency or config.SCRIPT_WORKER_POOL_SIZE))
+        self._lock = threading.Lock()
+        self._active = {}           # job_id -> AnalysisJob
+        self._threads = {}          # job_id -> thread d'exécution
+        self._stop_event = threading.Event()
+
+    def run(self):
+        """
+        Boucle principale : bloque jusqu'à stop() (ou CTRL+C). Les workers sont préchauffés avant la première
+        réservation. À l'arrêt, les jobs en cours sont rendus à la file puis interrompus (voir _shutdown).
+        """
+        try:
+            self._claim_loop()
+        finally:
+            self._stop_event.set()
+            self._shutdown()
+
+    def _claim_loop(self):
+        server_warmup.run(self.app)
+        threading.Thread(target=self._heartbeat_loop, daemon=True, name="queue-heartbeat").start()
+        while not self._stop_event.is_set():
+            claimed = False
+            with self._lock:
+                has_capacity = len(self._active) < self.concurrency
+            if has_capacity:
+                try:
+                    with self.app.app_context():
+                        job_queue.requeue_expired()
+                        row = job_queue.claim(self.worker_id)
+                        job = job_queue.job_from_row(row, self.app.config['SCRIPTS_DIR'], self.app.config['INPUTS_DIR']) if row else None
+                except Exception as e:
+                    print(f"Erreur lors de la réservation d'un job: {e}")
+                    job = None
+                if job:
+                    job.worker_id = self.worker_id
+                    claimed = True
+                    thread = threading.Thread(target=self._execute, args=(job,), daemon=True, name=f"job-{job.id[:8]}")
+                    with self._lock:
+                        self._active[job.id] = job
+                        self._threads[job.id] = thread
+                    thread.start()
+            # Une place libre et un job obtenu : on tente aussitôt d'en réserver un autre
+            if not claimed:
+                self._stop_event.wait(config.JOB_QUEUE_POLL_SECONDS)
+
+    def stop(self):
+        self._stop_event.set()
+
+    def _shutdown(self):
+        """
+        Rend les jobs en cours à la file (un autre worker les reprend sans attendre l'expiration du bail,
+        et sans que la tentative compte), puis les interrompt et attend la fin de leurs threads,
+        au plus JOB_QUEUE_STOP_TIMEOUT_SECONDS.
+        """
+        with self._lock:
+            jobs = list(self._active.values())
+            threads = list(self._threads.values())
+        try:
+            with self.app.app_context():
+                job_queue.release(self.worker_id, [job.id for job in jobs])
+        except Exception as e:
+            print(f"Erreur lors de la remise en file des jobs en cours: {e}")
+        for job in jobs:
+            job.cancel_event.set()
+        deadline = time.monotonic() + config.JOB_QUEUE_STOP_TIMEOUT_SECONDS
+        for thread in threads:
+            thread.join(max(0.0, deadline - time.monotonic()))
+
+    def _execute(self, job):
+        try:
+            job_manager.execute_job(self.app, job)
+            with self.app.app_context():
+                job_queue.complete(self.worker_id, job)
+        except Exception:
+            traceback.print_exc()
+        finally:
+            with self._lock:
+                self._active.pop(job.id, None)
+                self._threads.pop(job.id, None)
+
+    def _heartbeat_loop(self):
+        interval = max(config.JOB_QUEUE_POLL_SECONDS, 0.1)
+        while not self._stop_event.wait(interval):
+            with self._lock:
+                jobs = [job for job in self._active.values() if not job.is_finished]
+            if not jobs:
+                continue
+            try:
+                with self.app.app_context():
+                    cancelled = job_queue.heartbeat(self.worker_id, jobs)
+                for job in jobs:
+                    if job.id in cancelled:
+                        job.cancel_event.set()
+            except Exception as e:
+                print(f"Erreur lors de la mise à jour des jobs en cours: {e}")
@@ -0,0 +1,110 @@
+#---> NOUVEAU FICHIER : hyper_framework_server/services/result_cache.py
+
+import hashlib
+import json
+from datetime import datetime
+
+from .. import config
+from ..database.database import get_db
+from .file_utils import file_sha256
+
+
+class ResultCache:
+    """
+    Mémoïsation des résultats d'analyse, stockée dans la table result_cache.
+    La clé combine le hash du script, le hash de chaque fichier d'entrée et les paramètres
+    (week_label...). Un succès renvoie les résultats sérialisés sans rien exécuter.
+    L'éviction retire les entrées les moins récemment utilisées au-delà de
+    RESULT_CACHE_MAX_ENTRIES entrées ou RESULT_CACHE_MAX_BYTES octets.
+    """
+
+    def compute_key(self, script_path, input_file_paths, params=None, input_hashes=None):
+        """input_hashes permet de fournir des hash déjà connus ({clé d'entrée: sha256}) pour éviter de relire les fichiers."""
+        input_hashes = dict(input_hashes or {})
+        for key, path in input_file_paths.items():
+            if key not in input_hashes:
+                input_hashes[key] = file_sha256(path)
+        key_material = {
+            'script': file_sha256(script_path),
+            'inputs': input_hashes,
+            'params': params or {},
+        }
+        return hashlib.sha256(json.dumps(key_material, sort_keys=True).encode('utf-8')).hexdigest()
+
+    def lookup(self, cache_key):
+        """Retourne l'entrée en cache (results, run_uid, artifacts) ou None."""
+        if not config.RESULT_CACHE_ENABLED:
+            return None
+        db = get_db()
+        row = db.execute("SELECT results_json, run_uid, artifacts_json FROM result_cache WHERE cache_key = ?", (cache_key,)).fetchone()
+        if not row:
+            return None
+        db.execute("UPDATE result_cache SET last_used_at = ?, hit_count = hit_count + 1 WHERE cache_key = ?", (datetime.now(), cache_key))
+        db.commit()
+        return {
+            'results': json.loads(row['results_json']),
+            'run_uid': row['run_uid'],
+            'artifacts': json.loads(row['artifacts_json']) if row['artifacts_json'] else [],
+        }
+
+    def store(self, cache_key, control_id, results, run_uid, artifacts):
+        if not config.RESULT_CACHE_ENABLED:
+            return
+        results_json = json.dumps(results)
+        if len(results_json) > config.RESULT_CACHE_MAX_BYTES:
+            return
+        db = get_db()
+        now = datetime.now()
+        db.execute(
+            """INSERT OR REPLACE INTO result_cache
+               (cache_key, control_id, results_json, size_bytes, run_uid, artifacts_json, created_at, last_used_at, hit_count)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?, 0)""",
+            (cache_key, control_id, results_json, len(results_json), run_uid, json.dumps(artifacts), now, now)
+        )
+        self._evict(db)
+        db.commit()
+
+    def _evict(self, db):
+        """Supprime les entrées les moins récemment utilisées jusqu'à respecter les deux plafonds."""
+        rows = db.execute("SELECT cache_key, size_bytes FROM result_cache ORDER BY last_used_at DESC").fetchall()
+        kept_entries, kept_bytes, to_delete = 0, 0, []
+        for row in rows:
+            if kept_entries < config.RESULT_CACHE_MAX_ENTRIES and kept_bytes + row['size_bytes'] <= config.RESULT_CACHE_MAX_BYTES:
+                kept_entries += 1
+                kept_bytes += row['size_bytes']
+            else:
+                to_delete.append((row['cache_key'],))
+        if to_delete:
+            db.executemany("DELETE FROM result_cache WHERE cache_key = ?", to_delete)
+
+    def stats(self):
+        db = get_db()
+        totals = db.execute("SELECT COUNT(*) AS entries, COALESCE(SUM(size_bytes), 0) AS size_bytes, COALESCE(SUM(hit_count), 0) AS hits FROM result_cache").fetchone()
+        entries = db.execute(
+            """SELECT rc.cache_key, rc.control_id, c.name AS control_name, rc.size_bytes, rc.run_uid,
+                      rc.created_at, rc.last_used_at, rc.hit_count
+               FROM result_cache rc LEFT JOIN controls c ON c.id = rc.control_id
+               ORDER BY rc.last_used_at DESC"""
+        ).fetchall()
+        return {
+            'enabled': config.RESULT_CACHE_ENABLED,
+            'max_entries': config.RESULT_CACHE_MAX_ENTRIES,
+            'max_bytes': config.RESULT_CACHE_MAX_BYTES,
+            'entries_count': totals['entries'],
+            'size_bytes': totals['size_bytes'],
+            'hits': totals['hits'],
+            'entries': [dict(row) for row in entries],
+        }
+
+    def purge(self, control_id=None):
+        """Vide le cache (entièrement, ou seulement pour un contrôle). Retourne le nombre d'entrées supprimées."""
+        db = get_db()
+        if control_id is None:
+            cursor = db.execute("DELETE FROM result_cache")
+        else:
+            cursor = db.execute("DELETE FROM result_cache WHERE control_id = ?", (control_id,))
+        db.commit()
+        return cursor.rowcount
+
+
+result_cache = ResultCache()
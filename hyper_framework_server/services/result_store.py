@@ -0,0 +1,77 @@
+#---> NOUVEAU FICHIER : hyper_framework_server/services/result_store.py
+
+import os
+
+import pandas as pd
+import pyarrow.parquet as pq
+
+from .. import config
+
+
+def get_spill_directory(outputs_dir, run_uid):
+    """Dossier des sections de résultats volumineuses d'une exécution : OUTPUTS_DIR/results/<run_uid>."""
+    return os.path.join(outputs_dir, 'results', run_uid)
+
+
+def _section_path(spill_dir, section_index):
+    return os.path.join(spill_dir, f"section_{int(section_index)}.parquet")
+
+
+def spill_large_sections(results, spill_dir):
+    """
+    Écrit dans spill_dir (Parquet) les sections dont le DataFrame dépasse RESULT_SPILL_ROW_THRESHOLD lignes.
+    Seule la première page (RESULT_PAGE_SIZE lignes) reste dans la section, accompagnée de
+    'total_rows' : les autres pages sont lues à la demande (read_section_page). Appelé dans le worker,
+    pour que le DataFrame complet ne soit ni transmis au serveur ni converti en dictionnaires.
+    """
+    if not spill_dir or not isinstance(results, list):
+        return results
+    for index, section in enumerate(results):
+        dataframe = section.get('dataframe') if isinstance(section, dict) else None
+        if not isinstance(dataframe, pd.DataFrame) or len(dataframe) <= config.RESULT_SPILL_ROW_THRESHOLD:
+            continue
+        os.makedirs(spill_dir, exist_ok=True)
+        # Un groupe de lignes par page : lire une page ne décode que les groupes concernés
+        dataframe.to_parquet(_section_path(spill_dir, index), index=False, row_group_size=config.RESULT_PAGE_SIZE)
+        section['total_rows'] = len(dataframe)
+        section['dataframe'] = dataframe.head(config.RESULT_PAGE_SIZE)
+    return results
+
+
+def read_section_page(spill_dir, section_index, offset, limit):
+    """Retourne (enregistrements des lignes [offset, offset + limit), nombre total de lignes) d'une section écrite sur disque."""
+    parquet_file = pq.ParquetFile(_section_path(spill_dir, section_index))
+    total_rows = parquet_file.metadata.num_rows
+    end = min(offset + limit, total_rows)
+    if offset >= end:
+        return [], total_rows
+
+    row_groups, first_row, position = [], None, 0
+    for group in range(parquet_file.num_row_groups):
+        group_rows = parquet_file.metadata.row_group(group).num_rows
+        if position + group_rows > offset and position < end:
+            row_groups.append(group)
+            first_row = position if first_row is None else first_row
+        position += group_rows
+    table = parquet_file.read_row_groups(row_groups).slice(offset - first_row, end - offset)
+    return table.to_pandas().to_dict('records'), total_rows
+
+
+def section_exists(spill_dir, section_index):
+    return os.path.isfile(_section_path(spill_dir, section_index))
+
+
+def load_all_items(results, outputs_dir):
+    """
+    Copie des résultats sérialisés où chaque section paginée contient toutes ses lignes
+    (pour les traitements qui ont besoin de la section entière, comme la génération de rapport).
+    """
+    complete = []
+    for section in results:
+        handle = section.get('results_handle')
+        if handle:
+            spill_dir = get_spill_directory(outputs_dir, handle['run_uid'])
+            items, _ = read_section_page(spill_dir, handle['section'], 0, section['total_rows'])
+            section = {**section, 'items': items}
+        complete.append(section)
+    return complete
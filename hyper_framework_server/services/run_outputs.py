@@ -0,0 +1,111 @@
+#---> NOUVEAU FICHIER : hyper_framework_server/services/run_outputs.py
+
+import os
+import shutil
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+from .. import config
+
+# Sous-dossiers d'OUTPUTS_DIR qui contiennent un dossier par exécution (run_uid)
+RUN_ROOTS = ('runs', 'results')
+
+
+def _directory_bytes(path):
+    total = 0
+    for root, _, filenames in os.walk(path):
+        for filename in filenames:
+            try:
+                total += os.path.getsize(os.path.join(root, filename))
+            except OSError:
+                pass
+    return total
+
+
+class RunOutputs:
+    """
+    Dossiers propres à chaque exécution : OUTPUTS_DIR/runs/<run_uid> (fichiers produits par le script)
+    et OUTPUTS_DIR/results/<run_uid> (sections volumineuses, voir result_store).
+    La collecte supprime ceux des exécutions enregistrées dans analysis_runs depuis plus de
+    RUN_OUTPUTS_RETENTION_DAYS, et ceux d'exécutions jamais enregistrées (échec, annulation, historique
+    non sauvegardé) après RUN_OUTPUTS_ORPHAN_GRACE_SECONDS. Un run_uid encore référencé par le cache
+    des résultats est toujours conservé : un succès du cache renvoie les fichiers et les pages de l'exécution d'origine.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._last_collection = 0.0
+
+    def _directories(self, outputs_dir):
+        """{run_uid: [dossiers]} présents sur le disque."""
+        directories = {}
+        for root_name in RUN_ROOTS:
+            root = os.path.join(outputs_dir, root_name)
+            if not os.path.isdir(root):
+                continue
+            for entry in os.scandir(root):
+                if entry.is_dir():
+                    directories.setdefault(entry.name, []).append(entry.path)
+        return directories
+
+    def _kept_run_uids(self, db):
+        """run_uid à conserver : référencés par le cache des résultats ou par une exécution récente."""
+        kept = {row['run_uid'] for row in db.execute("SELECT run_uid FROM result_cache WHERE run_uid IS NOT NULL")}
+        if config.RUN_OUTPUTS_RETENTION_DAYS:
+            # executed_at est rempli par CURRENT_TIMESTAMP (UTC) : la limite est calculée sur la même horloge
+            limit = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(days=config.RUN_OUTPUTS_RETENTION_DAYS)
+            rows = db.execute("SELECT DISTINCT run_uid FROM analysis_runs WHERE run_uid IS NOT NULL AND executed_at >= ?", (limit,))
+        else:
+            rows = db.execute("SELECT DISTINCT run_uid FROM analysis_runs WHERE run_uid IS NOT NULL")
+        kept.update(row['run_uid'] for row in rows)
+        return kept
+
+    def collect_garbage(self, db, outputs_dir):
+        """Supprime les dossiers d'exécution qui ne sont plus à conserver. Retourne {'deleted', 'freed_bytes'}."""
+        with self._lock:
+            self._last_collection = time.time()
+            directories = self._directories(outputs_dir)
+            kept = self._kept_run_uids(db)
+            recorded = {row['run_uid'] for row in db.execute("SELECT DISTINCT run_uid FROM analysis_runs WHERE run_uid IS NOT NULL")}
+            orphan_limit = time.time() - config.RUN_OUTPUTS_ORPHAN_GRACE_SECONDS
+            deleted, freed_bytes = [], 0
+            for run_uid, paths in directories.items():
+                if run_uid in kept:
+                    continue
+                # Exécution jamais enregistrée : elle est peut-être encore en cours, on attend le délai de grâce
+                if run_uid not in recorded and any(os.path.getmtime(path) >= orphan_limit for path in paths):
+                    continue
+                for path in paths:
+                    size = _directory_bytes(path)
+                    shutil.rmtree(path, ignore_errors=True)
+                    if not os.path.exists(path):
+                        freed_bytes += size
+                deleted.append(run_uid)
+        return {'deleted': len(deleted), 'freed_bytes': freed_bytes}
+
+    def collect_garbage_if_due(self, db, outputs_dir):
+        """Collecte au plus une fois par RUN_OUTPUTS_GC_INTERVAL_SECONDS (appelée après les exécutions)."""
+        if time.time() - self._last_collection < config.RUN_OUTPUTS_GC_INTERVAL_SECONDS:
+            return None
+        try:
+            return self.collect_garbage(db, outputs_dir)
+        except Exception as e:
+            self._last_collection = time.time()
+            print(f"Erreur lors de la collecte des dossiers d'exécution: {e}")
+            return None
+
+    def stats(self, db, outputs_dir):
+        """Occupation des dossiers d'exécution, dont ceux conservés pour le cache des résultats."""
+        directories = self._directories(outputs_dir)
+        cached = {row['run_uid'] for row in db.execute("SELECT run_uid FROM result_cache WHERE run_uid IS NOT NULL")}
+        return {
+            'runs': len(directories),
+            'bytes': sum(_directory_bytes(path) for paths in directories.values() for path in paths),
+            'cached_runs': len(cached & set(directories)),
+            'retention_days': config.RUN_OUTPUTS_RETENTION_DAYS,
+            'orphan_grace_seconds': config.RUN_OUTPUTS_ORPHAN_GRACE_SECONDS,
+        }
+
+
+run_outputs = RunOutputs()
@@ -0,0 +1,187 @@
+#---> NOUVEAU FICHIER : hyper_framework_server/services/run_scheduler.py
+
+import itertools
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+
+from .. import config
+from .exceptions import MemoryBudgetExceeded, ScriptCancelled
+
+PRIORITY_INTERACTIVE = 'interactive'
+PRIORITY_BATCH = 'batch'
+
+# Plus la valeur est petite, plus la classe est prioritaire
+PRIORITY_RANKS = {PRIORITY_INTERACTIVE: 0, PRIORITY_BATCH: 1}
+
+
+class RunTicket:
+    """Demande d'exécution d'un contrôle en attente (ou en cours) dans le planificateur."""
+
+    def __init__(self, username, control_id, priority=PRIORITY_INTERACTIVE):
+        if priority not in PRIORITY_RANKS:
+            raise ValueError(f"Priorité inconnue : {priority}")
+        self.username = username
+        self.control_id = control_id
+        self.priority = priority
+        self.sequence = None
+        self.enqueued_at = None
+        self.started_at = None
+        self.memory_estimate = None     # Prévision mémoire (voir run_stats.predict_peak_memory)
+
+    @property
+    def memory_mb(self):
+        return (self.memory_estimate or {}).get('predicted_mb') or 0.0
+
+    def to_dict(self):
+        return {
+            'username': self.username,
+            'control_id': self.control_id,
+            'priority': self.priority,
+            'enqueued_at': self.enqueued_at.isoformat() if self.enqueued_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'memory_mb': self.memory_mb or None,
+        }
+
+
+class RunScheduler:
+    """
+    Planificateur placé devant le moteur d'exécution.
+    Il applique un plafond global d'exécutions simultanées, un plafond par utilisateur et un plafond
+    par contrôle. Parmi les demandes en attente, il sert d'abord les exécutions interactives, puis
+    l'utilisateur qui a le moins d'exécutions en cours (partage équitable), puis la plus ancienne.
+    Si MEMORY_BUDGET_MB est défini, la mémoire prévue des exécutions en cours et de la demande ne doit
+    pas le dépasser (une demande est toujours admise si rien ne tourne). Une demande bloquée par la
+    mémoire n'est pas doublée par les suivantes, pour qu'une grosse exécution finisse par passer.
+    """
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._waiting = []
+        self._running = []
+        self._sequence = itertools.count()
+
+    def _count_running(self, attribute, value):
+        return sum(1 for ticket in self._running if getattr(ticket, attribute) == value)
+
+    def _reserved_memory_mb(self):
+        return sum(ticket.memory_mb for ticket in self._running)
+
+    def _blocking_memory(self, ticket):
+        budget = config.MEMORY_BUDGET_MB
+        return bool(budget) and bool(self._running) and self._reserved_memory_mb() + ticket.memory_mb > budget
+
+    def _cap_reason(self, ticket):
+        """Plafond (global, par utilisateur ou par contrôle) qui empêche le ticket de démarrer maintenant, ou None."""
+        if len(self._running) >= config.RUN_MAX_CONCURRENT:
+            return f"Plafond global atteint ({len(self._running)}/{config.RUN_MAX_CONCURRENT} exécutions en cours)."
+        if self._count_running('username', ticket.username) >= config.RUN_MAX_PER_USER:
+            return f"Plafond par utilisateur atteint ({config.RUN_MAX_PER_USER} exécutions en cours)."
+        if self._count_running('control_id', ticket.control_id) >= config.RUN_MAX_PER_CONTROL:
+            return f"Plafond par contrôle atteint ({config.RUN_MAX_PER_CONTROL} exécutions en cours)."
+        return None
+
+    def _waiting_reason(self, ticket):
+        """Raison pour laquelle le ticket ne peut pas démarrer maintenant, ou None."""
+        cap_reason = self._cap_reason(ticket)
+        if cap_reason:
+            return cap_reason
+        if self._blocking_memory(ticket):
+            return (f"Mémoire insuffisante : {ticket.memory_mb:.0f} Mo prévus, {self._reserved_memory_mb():.0f} Mo "
+                    f"déjà réservés sur un budget de {config.MEMORY_BUDGET_MB} Mo.")
+        return None
+
+    def _ordered_waiting(self):
+        return sorted(self._waiting, key=lambda t: (
+            PRIORITY_RANKS[t.priority],
+            self._count_running('username', t.username),
+            t.sequence,
+        ))
+
+    def _next_admissible(self):
+        for ticket in self._ordered_waiting():
+            if self._cap_reason(ticket) is not None:
+                continue    # Bloqué par un plafond : les suivants peuvent le doubler
+            if not self._blocking_memory(ticket):
+                return ticket
+            # Bloqué par la seule mémoire : les suivants attendent qu'il passe
+            return None
+        return None
+
+    def acquire(self, ticket, cancel_event=None):
+        """
+        Bloque jusqu'à ce que le ticket obtienne une place. Lève ScriptCancelled en cas d'annulation,
+        et MemoryBudgetExceeded si sa mémoire prévue dépasse à elle seule MEMORY_BUDGET_MB.
+        """
+        budget = config.MEMORY_BUDGET_MB
+        if budget and ticket.memory_mb > budget:
+            raise MemoryBudgetExceeded(ticket.memory_mb, budget)
+        with self._condition:
+            ticket.sequence = next(self._sequence)
+            ticket.enqueued_at = datetime.now()
+            self._waiting.append(ticket)
+            try:
+                while self._next_admissible() is not ticket:
+                    if cancel_event is not None and cancel_event.is_set():
+                        raise ScriptCancelled("Le job a été annulé avant son démarrage.")
+                    self._condition.wait()
+            finally:
+                self._waiting.remove(ticket)
+                # Un départ de la file peut débloquer un autre ticket
+                self._condition.notify_all()
+            ticket.started_at = datetime.now()
+            self._running.append(ticket)
+
+    def release(self, ticket):
+        with self._condition:
+            if ticket in self._running:
+                self._running.remove(ticket)
+            self._condition.notify_all()
+
+    def wake_up(self):
+        """Réveille les tickets en attente (par exemple après une demande d'annulation)."""
+        with self._condition:
+            self._condition.notify_all()
+
+    @contextmanager
+    def slot(self, ticket, cancel_event=None):
+        self.acquire(ticket, cancel_event)
+        try:
+            yield ticket
+        finally:
+            self.release(ticket)
+
+    def queue_position(self, ticket):
+        """Position (à partir de 1) du ticket dans la file d'attente, ou None s'il n'attend pas."""
+        with self._condition:
+            ordered = self._ordered_waiting()
+            return ordered.index(ticket) + 1 if ticket in ordered else None
+
+    def waiting_reason(self, ticket):
+        """Raison de l'attente d'un ticket de la file (plafond atteint, mémoire insuffisante...), ou None."""
+        with self._condition:
+            if ticket not in self._waiting:
+                return None
+            reason = self._waiting_reason(ticket)
+            if reason is None:
+                # Admissible en soi, mais derrière une demande bloquée par la mémoire
+                reason = "En attente derrière une exécution qui attend de la mémoire."
+            return reason
+
+    def snapshot(self):
+        with self._condition:
+            return {
+                'limits': {
+                    'max_concurrent': config.RUN_MAX_CONCURRENT,
+                    'max_per_user': config.RUN_MAX_PER_USER,
+                    'max_per_control': config.RUN_MAX_PER_CONTROL,
+                    'memory_budget_mb': config.MEMORY_BUDGET_MB,
+                },
+                'reserved_memory_mb': round(self._reserved_memory_mb(), 1),
+                'running': [t.to_dict() for t in self._running],
+                'waiting': [dict(t.to_dict(), position=i + 1, reason=self._waiting_reason(t))
+                            for i, t in enumerate(self._ordered_waiting())],
+            }
+
+
+run_scheduler = RunScheduler()
@@ -0,0 +1,107 @@
+#---> NOUVEAU FICHIER : hyper_framework_server/services/run_stats.py
+
+import math
+
+from .. import config
+
+# Mesures agrégées par contrôle (colonnes de analysis_runs)
+RUN_METRICS = ('peak_rss_mb', 'cpu_user_seconds', 'cpu_system_seconds', 'duration_seconds', 'input_bytes', 'results_bytes')
+
+
+def percentile(values, fraction):
+    """Percentile par interpolation linéaire (fraction entre 0 et 1). None si la liste est vide."""
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    position = (len(ordered) - 1) * fraction
+    lower, upper = math.floor(position), math.ceil(position)
+    if lower == upper:
+        return ordered[lower]
+    return round(ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower), 3)
+
+
+def summarize_runs(rows):
+    """p50, p95 et maximum de chaque mesure sur un ensemble d'exécutions (les valeurs NULL sont ignorées)."""
+    summary = {'runs': len(rows)}
+    for metric in RUN_METRICS:
+        values = [row[metric] for row in rows if row[metric] is not None]
+        summary[metric] = {
+            'count': len(values),
+            'p50': percentile(values, 0.50),
+            'p95': percentile(values, 0.95),
+            'max': max(values) if values else None,
+        }
+    return summary
+
+
+def get_control_run_stats(db, control_id, limit=200):
+    """
+    Statistiques de consommation des dernières exécutions d'un contrôle : globales et par version
+    du script (pour repérer une régression après une modification). Les résultats repris du cache
+    sont exclus, puisqu'ils n'ont rien exécuté.
+    """
+    rows = db.execute(
+        f"""SELECT executed_at, script_sha256, {', '.join(RUN_METRICS)}
+            FROM analysis_runs
+            WHERE control_id = ? AND COALESCE(cache_hit, 0) = 0
+            ORDER BY executed_at DESC, id DESC LIMIT ?""",
+        (control_id, limit)
+    ).fetchall()
+
+    versions = {}
+    for row in rows:
+        versions.setdefault(row['script_sha256'], []).append(row)
+
+    by_version = []
+    for script_sha256, version_rows in versions.items():
+        by_version.append({
+            'script_sha256': script_sha256,
+            'first_executed_at': version_rows[-1]['executed_at'],
+            'last_executed_at': version_rows[0]['executed_at'],
+            **summarize_runs(version_rows),
+        })
+
+    return {
+        'control_id': control_id,
+        'overall': summarize_runs(rows),
+        'by_script_version': by_version,   # Version la plus récente en premier
+    }
+
+
+# En dessous de cette taille d'entrée, le rapport mémoire / Mo d'entrée mesure surtout le coût fixe du script
+_MIN_INPUT_MB_FOR_RATIO = 1.0
+
+
+def predict_peak_memory(db, control_id, input_bytes, max_rss_mb=None):
+    """
+    Prévoit le pic de mémoire (Mo) d'une exécution du contrôle sur input_bytes octets d'entrée :
+    MEMORY_WORKER_BASELINE_MB + rapport * Mo d'entrée, où le rapport est le p95 de
+    (pic - mémoire au repos) / Mo d'entrée sur les dernières exécutions, ou
+    MEMORY_DEFAULT_MB_PER_INPUT_MB sans historique suffisant. Plafonnée à max_rss_mb (limite du
+    script au-delà de laquelle le worker est arrêté). Retourne le détail du calcul.
+    """
+    baseline = config.MEMORY_WORKER_BASELINE_MB
+    rows = db.execute(
+        """SELECT peak_rss_mb, input_bytes FROM analysis_runs
+           WHERE control_id = ? AND COALESCE(cache_hit, 0) = 0
+             AND peak_rss_mb IS NOT NULL AND input_bytes >= ?
+           ORDER BY executed_at DESC, id DESC LIMIT ?""",
+        (control_id, _MIN_INPUT_MB_FOR_RATIO * 1024 * 1024, config.MEMORY_HISTORY_RUNS)
+    ).fetchall()
+    ratios = [max(0.0, row['peak_rss_mb'] - baseline) / (row['input_bytes'] / (1024 * 1024)) for row in rows]
+    if len(ratios) >= config.MEMORY_HISTORY_MIN_RUNS:
+        basis, ratio = 'history', percentile(ratios, 0.95)
+    else:
+        basis, ratio = 'default', config.MEMORY_DEFAULT_MB_PER_INPUT_MB
+
+    input_mb = input_bytes / (1024 * 1024)
+    predicted = baseline + ratio * input_mb
+    capped = bool(max_rss_mb) and predicted > max_rss_mb
+    return {
+        'predicted_mb': round(min(predicted, max_rss_mb) if capped else predicted, 1),
+        'input_mb': round(input_mb, 2),
+        'mb_per_input_mb': round(ratio, 3),
+        'basis': basis,
+        'history_runs': len(ratios),
+        'capped_by_script_limit': capped,
+    }
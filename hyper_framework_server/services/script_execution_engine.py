@@ -1,35 +1,143 @@
 #---> FICHIER MODIFIÉ : hyper_framework_server/services/script_execution_engine.py
 
 import sys
+import ast
+import hashlib
 import importlib.util
+import threading
+import time
+from collections import OrderedDict
 from pathlib import Path
 import os
+from .. import config
+from ..sdk.pipeline import find_pipeline
 
-def execute_script_from_file(script_path: str, input_file_paths: dict, output_dir_path: str) -> list:
+# Limites surchargeables par script (clé de __hyper_limits__ -> valeur globale dans config)
+SCRIPT_LIMIT_DEFAULTS = {
+    'timeout': 'SCRIPT_EXECUTION_TIMEOUT',
+    'cpu_seconds': 'SCRIPT_CPU_TIME_LIMIT',
+    'max_rss_mb': 'SCRIPT_MAX_RSS_MB',
+}
+
+def read_script_limits(script_path: str) -> dict:
     """
-    Exécute un script Python de manière directe et synchrone.
-    Le script est importé dynamiquement et sa fonction 'run' est appelée.
+    Retourne les limites d'exécution d'un script : les valeurs globales de config,
+    surchargées par la variable optionnelle __hyper_limits__ du script.
     """
+    limits = {key: getattr(config, setting, None) for key, setting in SCRIPT_LIMIT_DEFAULTS.items()}
     try:
+        with open(script_path, 'r', encoding='utf-8') as f:
+            tree = ast.parse(f.read())
+    except (OSError, SyntaxError, ValueError):
+        return limits
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and any(isinstance(t, ast.Name) and t.id == '__hyper_limits__' for t in node.targets):
+            try:
+                overrides = ast.literal_eval(node.value)
+            except ValueError:
+                break
+            if isinstance(overrides, dict):
+                limits.update({k: v for k, v in overrides.items() if k in SCRIPT_LIMIT_DEFAULTS})
+    return limits
+
+class ScriptModuleCache:
+    """
+    Cache des modules de scripts, indexé par le SHA-256 du contenu du script.
+    Le code d'un script n'est compilé et son niveau module exécuté qu'une fois par version.
+    Une nouvelle version d'un fichier remplace l'ancienne, et les modules les moins
+    récemment utilisés sont évincés (y compris de sys.modules) au-delà de SCRIPT_MODULE_CACHE_SIZE.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._modules = OrderedDict()   # sha256 -> module
+        self._hash_by_path = {}         # chemin du script -> sha256 de la version en cache
+
+    def _evict(self, digest):
+        module = self._modules.pop(digest, None)
+        if module is not None:
+            sys.modules.pop(module.__name__, None)
+        for path, cached_digest in list(self._hash_by_path.items()):
+            if cached_digest == digest:
+                del self._hash_by_path[path]
+
+    def invalidate(self, script_path):
+        """Oublie la version en cache d'un script (appelé quand son code est modifié ou supprimé)."""
+        with self._lock:
+            digest = self._hash_by_path.get(os.path.abspath(script_path))
+            if digest:
+                self._evict(digest)
+
+    def clear(self):
+        with self._lock:
+            for digest in list(self._modules):
+                self._evict(digest)
+
+    def load(self, script_path):
         script_path_obj = Path(script_path)
         if not script_path_obj.exists():
             raise FileNotFoundError(f"Le fichier de script n'a pas été trouvé : {script_path}")
+        source = script_path_obj.read_bytes()
+        digest = hashlib.sha256(source).hexdigest()
+        path_key = os.path.abspath(script_path)
+
+        with self._lock:
+            previous_digest = self._hash_by_path.get(path_key)
+            if previous_digest and previous_digest != digest:
+                self._evict(previous_digest)
+            if digest in self._modules:
+                self._modules.move_to_end(digest)
+                self._hash_by_path[path_key] = digest
+                return self._modules[digest]
+
+            # Nom de module stable pour une version donnée du script
+            module_name = f"dynamic_script_{script_path_obj.stem}_{digest[:16]}"
+            spec = importlib.util.spec_from_file_location(module_name, script_path)
+            if spec is None:
+                raise ImportError(f"Impossible de créer la spécification pour le module : {script_path}")
+
+            code = compile(source, str(script_path_obj), 'exec')
+            analysis_module = importlib.util.module_from_spec(spec)
+            sys.modules[module_name] = analysis_module
+            try:
+                exec(code, analysis_module.__dict__)
+            except BaseException:
+                sys.modules.pop(module_name, None)
+                raise
+
+            self._modules[digest] = analysis_module
+            self._hash_by_path[path_key] = digest
+            while len(self._modules) > max(1, config.SCRIPT_MODULE_CACHE_SIZE):
+                self._evict(next(iter(self._modules)))
+            return analysis_module
 
-        # Crée un nom de module unique pour éviter les conflits de cache
-        module_name = f"dynamic_script_{script_path_obj.stem}_{os.getpid()}"
-        
-        spec = importlib.util.spec_from_file_location(module_name, script_path)
-        if spec is None:
-            raise ImportError(f"Impossible de créer la spécification pour le module : {script_path}")
-        
-        analysis_module = importlib.util.module_from_spec(spec)
-        sys.modules[module_name] = analysis_module
-        spec.loader.exec_module(analysis_module)
 
-        if not hasattr(analysis_module, 'run'):
-            raise AttributeError(f"Le script '{script_path_obj.name}' doit définir une fonction 'run(...)'.")
+script_module_cache = ScriptModuleCache()
+
+def execute_script_from_file(script_path: str, input_file_paths: dict, output_dir_path: str, telemetry: dict = None,
+                             input_hashes: dict = None) -> list:
+    """
+    Exécute un script Python de manière directe et synchrone.
+    Le module du script est obtenu via le cache (une compilation par version) et sa fonction 'run' est appelée.
+    Un script sans fonction 'run' peut déclarer un Pipeline d'étapes (voir sdk/pipeline.py), qui est alors exécuté.
+    Si telemetry (dict) est fourni, il reçoit les durées de chargement et d'exécution du script.
+    input_hashes ({clé d'entrée: sha256}) est transmis au Pipeline pour les clés de son cache d'étapes.
+    """
+    telemetry = telemetry if telemetry is not None else {}
+    try:
+        started = time.perf_counter()
+        analysis_module = script_module_cache.load(script_path)
+        loaded = time.perf_counter()
+        telemetry['script_load_seconds'] = round(loaded - started, 4)
 
-        results = analysis_module.run(input_file_paths, output_dir_path)
+        if hasattr(analysis_module, 'run'):
+            results = analysis_module.run(input_file_paths, output_dir_path)
+        else:
+            pipeline = find_pipeline(analysis_module)
+            if pipeline is None:
+                raise AttributeError(f"Le script '{Path(script_path).name}' doit définir une fonction 'run(...)' ou un Pipeline.")
+            results = pipeline.run(input_file_paths, output_dir_path, input_hashes=input_hashes)
+        telemetry['script_run_seconds'] = round(time.perf_counter() - loaded, 4)
         
         if not isinstance(results, list):
              raise TypeError("La fonction 'run' du script doit retourner une liste.")
@@ -0,0 +1,36 @@
+#---> NOUVEAU FICHIER : hyper_framework_server/services/upload_ingest.py
+
+from flask import Request, current_app, has_app_context
+from werkzeug.exceptions import RequestEntityTooLarge, UnsupportedMediaType
+
+from .compression import supported_encodings, upload_encoding
+from .input_store import input_store
+
+
+class IngestRequest(Request):
+    """
+    Requête Flask dont les fichiers multipart sont écrits, au fur et à mesure de leur réception, directement
+    dans le stockage des entrées (au lieu d'un fichier temporaire ensuite recopié), avec calcul du SHA-256
+    au passage. Une partie de type application/gzip ou application/zstd est décompressée pendant la
+    réception (voir compression.upload_encoding). Un fichier qui dépasse UPLOAD_MAX_FILE_BYTES interrompt la lecture de la requête (413) ;
+    la taille totale d'une requête est bornée par MAX_CONTENT_LENGTH.
+    """
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        if not has_app_context() or not filename:
+            return super()._get_file_stream(total_content_length, content_type, filename, content_length)
+        max_bytes = current_app.config.get('UPLOAD_MAX_FILE_BYTES')
+        if max_bytes and content_length and content_length > max_bytes:
+            raise RequestEntityTooLarge(f"Fichier trop volumineux (limite : {max_bytes // (1024 * 1024)} Mo par fichier).")
+        encoding = upload_encoding(content_type, filename)
+        if encoding and encoding not in supported_encodings():
+            raise UnsupportedMediaType(f"Compression '{encoding}' non prise en charge par le serveur.")
+        ingested = input_store.open_ingest(current_app.config['INPUTS_DIR'], max_bytes, encoding)
+        self.__dict__.setdefault('_ingested_files', []).append(ingested)
+        return ingested
+
+    def close(self):
+        super().close()
+        # Fichiers en cours de réception quand la lecture a été interrompue (limite dépassée, client déconnecté)
+        for ingested in self.__dict__.get('_ingested_files', []):
+            ingested.close()
@@ -0,0 +1,132 @@
+#---> NOUVEAU FICHIER : hyper_framework_server/services/warmup.py
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+from .. import config
+from .security_service import analyze_code_security
+from .worker_pool import preload_libraries, worker_pool
+
+WARMUP_PENDING = 'pending'
+WARMUP_RUNNING = 'warming'
+WARMUP_READY = 'ready'
+WARMUP_FAILED = 'failed'
+
+
+class ServerWarmup:
+    """
+    Préchauffage du serveur au démarrage, pour que la première analyse soit aussi rapide que les suivantes :
+      1. import des bibliothèques lourdes (pandas, numpy, openpyxl...) dans le processus serveur ;
+      2. compilation et vérification (syntaxe, règles de sécurité) de chaque script de SCRIPTS_DIR ;
+      3. démarrage des workers et chargement des scripts valides dans leur cache de modules.
+    Un script en erreur est signalé sans empêcher le serveur d'être prêt. L'état est exposé par
+    /api/health/ready, que les lanceurs attendent au lieu d'un délai fixe.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._thread = None
+        self.state = WARMUP_PENDING
+        self.started_at = None
+        self.finished_at = None
+        self.steps = {}         # étape -> durée en secondes
+        self.scripts = {}       # nom du script -> liste des erreurs (vide si le script est valide)
+        self.error = None
+
+    @property
+    def is_ready(self):
+        return self.state == WARMUP_READY
+
+    def start(self, app, start_workers=True):
+        """Lance le préchauffage dans un thread : le serveur HTTP répond pendant ce temps."""
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self.run, args=(app, start_workers), daemon=True, name="server-warmup")
+            self._thread.start()
+
+    def run(self, app, start_workers=True):
+        """Exécute le préchauffage (bloquant). start_workers=False : seules les vérifications côté serveur sont faites."""
+        with self._lock:
+            self.state, self.error = WARMUP_RUNNING, None
+            self.started_at, self.finished_at = datetime.now(), None
+            self.steps, self.scripts = {}, {}
+        try:
+            with self._measure('libraries'):
+                preload_libraries()
+            with self._measure('scripts'):
+                valid_scripts = self._check_scripts(app.config['SCRIPTS_DIR'])
+            if start_workers:
+                with self._measure('workers'):
+                    worker_pool.start()
+                    # Au-delà de la taille du cache des workers, seuls les scripts modifiés le plus récemment sont chargés
+                    valid_scripts.sort(key=os.path.getmtime, reverse=True)
+                    load_errors = worker_pool.warm_up(valid_scripts[:max(1, config.SCRIPT_MODULE_CACHE_SIZE)])
+                for script_path, error in load_errors.items():
+                    self.scripts[os.path.basename(script_path)].append(error)
+            state = WARMUP_READY
+        except Exception as e:
+            print(f"Erreur lors du préchauffage du serveur: {e}")
+            self.error = str(e)
+            state = WARMUP_FAILED
+        with self._lock:
+            self.state, self.finished_at = state, datetime.now()
+
+        invalid = sorted(name for name, errors in self.scripts.items() if errors)
+        if invalid:
+            print(f"Avertissement : script(s) en erreur au démarrage : {', '.join(invalid)}")
+        print(f"Préchauffage terminé ({self.state}) : {len(self.scripts)} script(s) en {self._total_seconds()} s.")
+
+    @contextmanager
+    def _measure(self, step):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.steps[step] = round(time.perf_counter() - started, 3)
+
+    def _check_scripts(self, scripts_dir):
+        """Compile et vérifie chaque script ; retourne les chemins des scripts valides."""
+        valid = []
+        try:
+            filenames = sorted(f for f in os.listdir(scripts_dir) if f.endswith('.py'))
+        except FileNotFoundError:
+            filenames = []
+        for filename in filenames:
+            script_path = os.path.join(scripts_dir, filename)
+            try:
+                with open(script_path, 'r', encoding='utf-8') as f:
+                    source = f.read()
+                compile(source, script_path, 'exec')
+                errors = analyze_code_security(source)
+            except (SyntaxError, ValueError, OSError) as e:
+                errors = [f"{type(e).__name__}: {e}"]
+            self.scripts[filename] = errors
+            if not errors:
+                valid.append(script_path)
+        return valid
+
+    def _total_seconds(self):
+        if not self.started_at:
+            return None
+        end = self.finished_at or datetime.now()
+        return round((end - self.started_at).total_seconds(), 3)
+
+    def status(self):
+        with self._lock:
+            return {
+                'status': self.state,
+                'started_at': self.started_at.isoformat() if self.started_at else None,
+                'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+                'duration_seconds': self._total_seconds(),
+                'steps': dict(self.steps),
+                'scripts_checked': len(self.scripts),
+                'script_errors': {name: errors for name, errors in self.scripts.items() if errors},
+                'error': self.error,
+            }
+
+
+server_warmup = ServerWarmup()
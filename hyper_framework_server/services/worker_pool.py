@@ -0,0 +1,402 @@
+#---> NOUVEAU FICHIER : hyper_framework_server/services/worker_pool.py
+
+import atexit
+import importlib
+import multiprocessing
+import os
+import pickle
+import threading
+import time
+import traceback
+
+from .. import config
+from ..sdk.profiling import start_collection, stop_collection
+from ..sdk.progress import set_reporter
+from .exceptions import ScriptCancelled, ScriptLimitExceeded
+from .result_store import spill_large_sections
+from .script_execution_engine import execute_script_from_file, read_script_limits, script_module_cache
+
+try:
+    import psutil
+except ImportError:
+    # Sans psutil, seul le délai d'horloge (timeout) peut être surveillé
+    psutil = None
+
+# Bibliothèques lourdes importées une seule fois au démarrage de chaque worker
+PRELOADED_LIBRARIES = ('pandas', 'numpy', 'openpyxl', 'chardet')
+
+
+def preload_libraries():
+    for module_name in PRELOADED_LIBRARIES:
+        try:
+            importlib.import_module(module_name)
+        except ImportError:
+            print(f"Avertissement : la bibliothèque '{module_name}' n'a pas pu être préchargée.")
+
+
+def _lifetime_peak_rss_mb():
+    """Pic de mémoire (RSS) du processus courant depuis son démarrage, en Mo, ou None si indisponible."""
+    if psutil:
+        peak = getattr(psutil.Process().memory_info(), 'peak_wset', None)  # Windows
+        if peak:
+            return peak / (1024 * 1024)
+    try:
+        import resource
+    except ImportError:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # Linux : ru_maxrss en Ko
+
+
+def _picklable_exception(exc):
+    """Garantit que l'exception peut traverser le pipe vers le processus serveur."""
+    try:
+        pickle.dumps(exc)
+        return exc
+    except Exception:
+        return RuntimeError(f"{type(exc).__name__}: {exc}")
+
+
+def _worker_main(conn):
+    """
+    Boucle principale d'un processus worker. Messages reçus :
+      ('run', script, entrées, dossier de sortie, dossier des résultats volumineux, hashes des entrées) -> exécute le script
+        et renvoie le résultat (voir result_store.spill_large_sections) ;
+      ('invalidate', script) -> retire la version en cache du script (pas de réponse) ;
+      ('warm', scripts) -> charge les scripts dans le cache et renvoie ('warmed', {script: erreur}).
+    Pendant une exécution, les appels à sdk.progress.progress() sont envoyés sous la forme ('progress', événement).
+    La réponse d'une exécution réussie est ('ok', résultats, mesures) (voir sdk.profiling).
+    """
+    preload_libraries()
+    while True:
+        try:
+            message = conn.recv()
+        except (EOFError, KeyboardInterrupt):
+            break
+        if message is None:
+            break
+
+        if message[0] == 'invalidate':
+            script_module_cache.invalidate(message[1])
+            continue
+        if message[0] == 'warm':
+            errors = {}
+            for script_path in message[1]:
+                try:
+                    script_module_cache.load(script_path)
+                except Exception as e:
+                    errors[script_path] = f"{type(e).__name__}: {e}"
+            conn.send(('warmed', errors))
+            continue
+
+        _, script_path, input_file_paths, output_dir_path, spill_dir, input_hashes = message
+        # Le worker ne traite qu'une exécution à la fois : il peut se placer dans le dossier
+        # de l'exécution pour que les chemins relatifs des scripts y soient aussi écrits.
+        previous_cwd = os.getcwd()
+        set_reporter(lambda event: conn.send(('progress', event)))
+        start_collection()
+        telemetry = {}
+        times_before, peak_before = os.times(), _lifetime_peak_rss_mb()
+        try:
+            os.chdir(output_dir_path)
+            results = execute_script_from_file(script_path, input_file_paths, output_dir_path, telemetry, input_hashes)
+            spill_started = time.perf_counter()
+            results = spill_large_sections(results, spill_dir)
+            telemetry['result_spill_seconds'] = round(time.perf_counter() - spill_started, 4)
+            reply = ('ok', results, telemetry)
+        except Exception as e:
+            reply = ('error', _picklable_exception(e), traceback.format_exc())
+        finally:
+            # Plus aucun événement ne doit suivre la réponse (threads laissés par le script)
+            set_reporter(None)
+            telemetry['stages'] = stop_collection()
+            times_after, peak_after = os.times(), _lifetime_peak_rss_mb()
+            telemetry['cpu_user_seconds'] = round(times_after.user - times_before.user, 3)
+            telemetry['cpu_system_seconds'] = round(times_after.system - times_before.system, 3)
+            # Si le pic historique du worker a augmenté, c'est exactement le pic de cette exécution ;
+            # sinon seul l'échantillonnage fait par le serveur est disponible.
+            if peak_before is not None and peak_after > peak_before:
+                telemetry['peak_rss_mb'] = round(peak_after, 1)
+            os.chdir(previous_cwd)
+        conn.send(reply)
+
+
+class _ResourceMonitor:
+    """
+    Mesure le temps CPU et la mémoire d'un worker depuis le début de l'exécution en cours.
+    peak_rss_mb retient la plus haute mémoire observée lors des échantillonnages.
+    """
+
+    def __init__(self, pid):
+        self._process = psutil.Process(pid) if psutil else None
+        self._cpu_baseline = self._total_cpu_seconds()
+        self.peak_rss_mb = 0.0
+
+    def _total_cpu_seconds(self):
+        if not self._process:
+            return 0.0
+        try:
+            times = self._process.cpu_times()
+            return times.user + times.system
+        except psutil.Error:
+            return 0.0
+
+    def cpu_seconds(self):
+        return self._total_cpu_seconds() - self._cpu_baseline
+
+    def rss_mb(self):
+        if not self._process:
+            return 0.0
+        try:
+            rss = self._process.memory_info().rss / (1024 * 1024)
+        except psutil.Error:
+            return 0.0
+        self.peak_rss_mb = max(self.peak_rss_mb, rss)
+        return rss
+
+
+class _ScriptWorker:
+    """Un processus Python de longue durée avec les bibliothèques d'analyse déjà chargées."""
+
+    def __init__(self, context):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_worker_main, args=(child_conn,), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.runs = 0
+        self.pending_invalidations = set()
+
+    def is_alive(self):
+        return self.process.is_alive()
+
+    def stop(self):
+        try:
+            self.conn.send(None)
+        except (OSError, BrokenPipeError):
+            pass
+        self.process.join(timeout=5)
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join(timeout=5)
+        self.conn.close()
+
+
+class ScriptWorkerPool:
+    """
+    Pool de processus workers qui exécutent les scripts de contrôle hors du thread Waitress.
+    Chaque worker traite une exécution à la fois et est recyclé après SCRIPT_WORKER_MAX_RUNS exécutions.
+    """
+
+    def __init__(self):
+        self._context = multiprocessing.get_context('spawn')
+        self._condition = threading.Condition()
+        self._idle_workers = []
+        self._all_workers = set()
+        self._worker_count = 0
+        self._shutdown = False
+
+    @property
+    def size(self):
+        return max(1, int(config.SCRIPT_WORKER_POOL_SIZE))
+
+    @property
+    def max_runs_per_worker(self):
+        return max(1, int(config.SCRIPT_WORKER_MAX_RUNS))
+
+    def start(self):
+        """Démarre les workers à l'avance pour que la première analyse n'attende pas les imports."""
+        with self._condition:
+            self._shutdown = False
+            while self._worker_count < self.size:
+                self._idle_workers.append(self._spawn_worker())
+                self._worker_count += 1
+
+    def warm_up(self, script_paths, timeout=None):
+        """
+        Charge les scripts donnés dans le cache de modules de chaque worker du pool, pour que leur
+        première exécution ne paie pas la compilation. Les workers sont réservés pendant le chargement.
+        Retourne {chemin du script: message d'erreur} pour les scripts qui n'ont pas pu être chargés.
+        """
+        timeout = timeout or config.WARMUP_SCRIPT_TIMEOUT_SECONDS
+        workers = [self._acquire_worker() for _ in range(self.size)]
+        errors, failed = {}, set()
+        for worker in workers:
+            try:
+                worker.conn.send(('warm', list(script_paths)))
+            except (EOFError, OSError):
+                failed.add(worker)
+        deadline = time.monotonic() + timeout
+        for worker in workers:
+            if worker in failed:
+                continue
+            try:
+                # Un script qui bloque à l'import ne doit pas empêcher le serveur d'être prêt
+                if not worker.conn.poll(max(0.0, deadline - time.monotonic())):
+                    self._kill(worker)
+                    raise EOFError()
+                errors.update(worker.conn.recv()[1])
+            except (EOFError, OSError):
+                failed.add(worker)
+        healthy = [worker for worker in workers if worker not in failed]
+        with self._condition:
+            stopped = self._shutdown
+            if stopped:
+                self._worker_count -= len(healthy)
+                self._all_workers.difference_update(healthy)
+            else:
+                # Le chargement ne compte pas comme une exécution pour le recyclage des workers
+                self._idle_workers.extend(healthy)
+            self._condition.notify_all()
+        if stopped:
+            for worker in healthy:
+                worker.stop()
+        for worker in failed:
+            self._release_worker(worker, healthy=False)
+        if failed:
+            print(f"Avertissement : {len(failed)} worker(s) n'ont pas terminé le chargement des scripts dans le délai imparti.")
+        return errors
+
+    def _spawn_worker(self):
+        worker = _ScriptWorker(self._context)
+        self._all_workers.add(worker)
+        return worker
+
+    def invalidate_script(self, script_path):
+        """
+        Demande à tous les workers d'oublier la version compilée d'un script.
+        L'ordre est transmis à chaque worker juste avant sa prochaine exécution.
+        """
+        with self._condition:
+            for worker in self._all_workers:
+                worker.pending_invalidations.add(script_path)
+
+    def shutdown(self):
+        with self._condition:
+            self._shutdown = True
+            workers, self._idle_workers = self._idle_workers, []
+            self._worker_count -= len(workers)
+            self._all_workers.difference_update(workers)
+            self._condition.notify_all()
+        for worker in workers:
+            worker.stop()
+
+    def _acquire_worker(self):
+        with self._condition:
+            while True:
+                if self._shutdown:
+                    raise RuntimeError("Le pool de workers est arrêté.")
+                while self._idle_workers:
+                    worker = self._idle_workers.pop()
+                    if worker.is_alive():
+                        return worker
+                    self._worker_count -= 1
+                if self._worker_count < self.size:
+                    self._worker_count += 1
+                    return self._spawn_worker()
+                self._condition.wait()
+
+    def _release_worker(self, worker, healthy):
+        worker.runs += 1
+        recycle = not healthy or worker.runs >= self.max_runs_per_worker or not worker.is_alive()
+        if recycle:
+            worker.stop()
+        with self._condition:
+            if recycle:
+                self._all_workers.discard(worker)
+                self._worker_count -= 1
+                # Un remplaçant est lancé immédiatement pour rester "chaud"
+                if not self._shutdown and self._worker_count < self.size:
+                    self._idle_workers.append(self._spawn_worker())
+                    self._worker_count += 1
+            elif self._shutdown:
+                self._worker_count -= 1
+                self._all_workers.discard(worker)
+                worker.stop()
+            else:
+                self._idle_workers.append(worker)
+            self._condition.notify()
+
+    def _kill(self, worker):
+        worker.process.kill()
+        worker.process.join(timeout=5)
+
+    def _wait_for_reply(self, worker, monitor, limits, cancel_event=None, on_progress=None):
+        """
+        Attend et retourne la réponse du worker en surveillant ses limites et une éventuelle annulation.
+        Les événements d'avancement reçus entre-temps sont transmis à on_progress(événement).
+        En cas de dépassement, le worker est tué : sa mémoire est rendue au système.
+        """
+        started = time.monotonic()
+        last_check = started
+        while True:
+            if worker.conn.poll(config.SCRIPT_LIMIT_POLL_INTERVAL):
+                message = worker.conn.recv()
+                if message[0] != 'progress':
+                    monitor.rss_mb()  # Au moins un échantillon, même pour une exécution très courte
+                    return message
+                if on_progress:
+                    on_progress(message[1])
+                # Des événements fréquents ne doivent pas multiplier les mesures psutil
+                if time.monotonic() - last_check < config.SCRIPT_LIMIT_POLL_INTERVAL:
+                    continue
+            last_check = time.monotonic()
+            if not worker.is_alive():
+                raise EOFError()
+            if cancel_event is not None and cancel_event.is_set():
+                self._kill(worker)
+                raise ScriptCancelled("L'exécution a été annulée.")
+            checks = (
+                ('timeout', time.monotonic() - started),
+                ('cpu_seconds', monitor.cpu_seconds()),
+                ('max_rss_mb', monitor.rss_mb()),
+            )
+            for limit, observed in checks:
+                threshold = limits.get(limit)
+                if threshold and observed > threshold:
+                    self._kill(worker)
+                    raise ScriptLimitExceeded(limit, observed, threshold)
+
+    def execute(self, script_path: str, input_file_paths: dict, output_dir_path: str,
+                limits: dict = None, cancel_event: threading.Event = None, on_progress=None,
+                telemetry: dict = None, spill_dir: str = None, input_hashes: dict = None) -> list:
+        """
+        Exécute un script dans un worker du pool et retourne sa liste de résultats.
+        Bloque le thread appelant jusqu'à la fin de l'exécution.
+        on_progress(événement) reçoit les appels du script à sdk.progress.progress().
+        Si telemetry (dict) est fourni, il reçoit les mesures faites dans le worker (chargement, étapes,
+        temps CPU utilisateur/système) et le pic de mémoire de l'exécution (peak_rss_mb).
+        Si spill_dir est fourni, les sections de plus de RESULT_SPILL_ROW_THRESHOLD lignes y sont écrites
+        par le worker et ne reviennent qu'avec leur première page.
+        input_hashes ({clé d'entrée: sha256} déjà connus) évite au cache d'étapes d'un Pipeline de relire les fichiers.
+        Lève ScriptLimitExceeded si le temps, le CPU ou la mémoire autorisés sont dépassés,
+        et ScriptCancelled si cancel_event est déclenché pendant l'exécution.
+        """
+        if limits is None:
+            limits = read_script_limits(script_path)
+        worker = self._acquire_worker()
+        healthy = False
+        try:
+            with self._condition:
+                invalidations, worker.pending_invalidations = worker.pending_invalidations, set()
+            for invalidated_path in invalidations:
+                worker.conn.send(('invalidate', invalidated_path))
+            worker.conn.send(('run', script_path, input_file_paths, output_dir_path, spill_dir, input_hashes))
+            monitor = _ResourceMonitor(worker.process.pid)
+            reply = self._wait_for_reply(worker, monitor, limits, cancel_event, on_progress)
+            healthy = True
+        except (EOFError, OSError):
+            raise RuntimeError(f"Le processus d'exécution s'est arrêté de manière inattendue pendant le script '{script_path}'.")
+        finally:
+            self._release_worker(worker, healthy)
+
+        status, payload = reply[0], reply[1]
+        if status == 'error':
+            print(f"Erreur lors de l'exécution du script '{script_path}':\n{reply[2]}")
+            raise payload
+        if telemetry is not None:
+            telemetry.update(reply[2])
+            telemetry['peak_rss_mb'] = round(max(telemetry.get('peak_rss_mb') or 0.0, monitor.peak_rss_mb), 1) or None
+        return payload
+
+
+worker_pool = ScriptWorkerPool()
+atexit.register(worker_pool.shutdown)
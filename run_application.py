@@ -1,13 +1,21 @@
 #---> FICHIER MODIFIÉ : run_application.py
 
+import json
 import subprocess
 import sys
 import time
 import atexit
+import urllib.error
+import urllib.request
 
 # Garder une référence au processus serveur pour pouvoir le terminer
 server_process = None
 
+# Point de disponibilité du serveur local (voir hyper_framework_server/api/health_routes.py)
+READY_URL = "http://127.0.0.1:5000/api/health/ready"
+READY_TIMEOUT_SECONDS = 180
+READY_POLL_SECONDS = 0.5
+
 def start_server():
     """Lance le serveur Flask dans un processus séparé."""
     global server_process
@@ -17,6 +25,34 @@ def start_server():
     server_process = subprocess.Popen(command)
     print(f"Server process started with PID: {server_process.pid}")
 
+def wait_for_server():
+    """Attend que le serveur ait terminé son préchauffage. Retourne False si le délai est dépassé."""
+    deadline = time.monotonic() + READY_TIMEOUT_SECONDS
+    while time.monotonic() < deadline:
+        if server_process.poll() is not None:
+            raise RuntimeError(f"Server process exited with code {server_process.returncode}.")
+        try:
+            with urllib.request.urlopen(READY_URL, timeout=2) as response:
+                status = json.load(response)
+            print(f"Server ready in {status.get('duration_seconds')} s ({status.get('scripts_checked')} scripts checked).")
+            for script_name, errors in status.get('script_errors', {}).items():
+                print(f"  Warning: {script_name}: {'; '.join(errors)}")
+            return True
+        except urllib.error.HTTPError as e:
+            # 503 : préchauffage en cours ; 'failed' : le serveur répond mais sans workers préchauffés
+            try:
+                failed = json.load(e).get('status') == 'failed'
+            except ValueError:
+                failed = False
+            if failed:
+                print("Server warm-up failed, continuing anyway.")
+                return True
+        except (urllib.error.URLError, OSError, ValueError):
+            pass  # Le serveur n'écoute pas encore
+        time.sleep(READY_POLL_SECONDS)
+    print(f"Server not ready after {READY_TIMEOUT_SECONDS} s, launching client anyway.")
+    return False
+
 def start_client():
     """Lance l'application client Tkinter."""
     print("Launching GUI Client...")
@@ -40,8 +76,8 @@ if __name__ == '__main__':
 
     try:
         start_server()
-        # Laisse un peu de temps au serveur pour démarrer
-        time.sleep(3)
+        # Attend la fin du préchauffage au lieu d'un délai fixe
+        wait_for_server()
         start_client()
     except Exception as e:
         print(f"An error occurred: {e}")